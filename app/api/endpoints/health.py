@@ -2,10 +2,13 @@
 Health check endpoints
 """
 from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
 from typing import Dict, Any
 import time
 import sys
 from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.pipeline import publish_queue_depths
 
 router = APIRouter()
 
@@ -61,4 +64,16 @@ async def liveness_check() -> Dict[str, Any]:
     return {
         "status": "alive",
         "timestamp": int(time.time())
-    }
\ No newline at end of file
+    }
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint() -> str:
+    """
+    Process metrics in Prometheus text format
+    """
+    try:
+        publish_queue_depths()
+    except Exception:
+        metrics.inc("metrics_collection_errors_total", source="queue_depth")
+    return metrics.render()
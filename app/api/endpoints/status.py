@@ -3,13 +3,20 @@ Job status tracking endpoints
 """
 from fastapi import APIRouter, HTTPException
 from typing import Dict, Any, Optional
+from datetime import datetime, timedelta
 import logging
 
+from app.core.config import settings
+from app.models.video_job import VideoJob, JobStatus, InvalidTransitionError
+from app.models.video_job_event import VideoJobEvent
+from app.services import coalescing, status_cache, upload_store
+from app.schemas.video import JobStatusBatchRequest
+from app.api.endpoints.video import video_generator
+
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-# In-memory job storage (replace with database in production)
-job_storage = {}
+TERMINAL_STATUSES = {JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED}
 
 
 @router.get("/jobs/{job_id}")
@@ -24,23 +31,119 @@ async def get_job_status(job_id: str) -> Dict[str, Any]:
         Job status information
     """
     try:
-        # TODO: Replace with database lookup
-        if job_id not in job_storage:
+        # Job writes go through to the status cache; the database only serves misses
+        cached = await status_cache.get(job_id)
+        if cached:
+            return cached
+
+        job = await VideoJob.get(job_id, use_replica=True)
+        if not job:
             raise HTTPException(status_code=404, detail="Job not found")
         
-        job = job_storage[job_id]
+        # Not cached: a lagging replica could store an older status than the writers'
+        return status_cache.record(job)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting job status for {job_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/jobs/{job_id}/events")
+async def get_job_events(job_id: str) -> Dict[str, Any]:
+    """
+    Get the event history of a job
+
+    Args:
+        job_id: Unique identifier for the job
+
+    Returns:
+        Events of the job in sequence order
+    """
+    try:
+        events = await VideoJobEvent.for_job(job_id)
+        if not events and not await VideoJob.get(job_id, use_replica=True):
+            raise HTTPException(status_code=404, detail="Job not found")
+
+        return {"job_id": job_id, "events": [event.to_dict() for event in events]}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting events for {job_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/events")
+async def list_events(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    type: Optional[str] = None,
+    limit: int = 1000
+) -> Dict[str, Any]:
+    """
+    List job events of all jobs in a time range
+
+    Args:
+        since: Start of the range (default: one hour ago)
+        until: End of the range (default: now)
+        type: Only events of this type, e.g. "failed" or "await_provider"
+        limit: Maximum number of events
+
+    Returns:
+        Events ordered by time
+    """
+    try:
+        since = since or datetime.utcnow() - timedelta(hours=1)
+        events = await VideoJobEvent.in_range(
+            since, until, event_type=type, limit=min(limit, 10000)
+        )
+        return {"events": [event.to_dict() for event in events], "count": len(events)}
+
+    except Exception as e:
+        logger.error(f"Error listing events: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/jobs:batch")
+async def get_job_statuses(request: JobStatusBatchRequest) -> Dict[str, Any]:
+    """
+    Get the status of many jobs in one call
+
+    Args:
+        request: Job ids to look up (at most STATUS_BATCH_MAX_IDS)
+
+    Returns:
+        Map of job id to status, stage, progress, output_url and error,
+        plus the ids that do not exist
+    """
+    try:
+        job_ids = list(dict.fromkeys(request.job_ids))
+        if len(job_ids) > settings.STATUS_BATCH_MAX_IDS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"At most {settings.STATUS_BATCH_MAX_IDS} job ids can be requested at once"
+            )
+
+        # Warm entries come from the cache; the rest with one IN query
+        records = await status_cache.get_many(job_ids)
+        missing = [job_id for job_id in job_ids if job_id not in records]
+        if missing:
+            # Replica rows are not cached, see get_job_status
+            jobs = await VideoJob.get_many(missing, use_replica=True)
+            records.update({str(job.id): status_cache.record(job) for job in jobs})
+        summaries = {job_id: status_cache.summary(record) for job_id, record in records.items()}
+
         return {
-            "job_id": job_id,
-            "status": job.get("status", "unknown"),
-            "progress": job.get("progress", 0),
-            "message": job.get("message", ""),
-            "created_at": job.get("created_at"),
-            "updated_at": job.get("updated_at"),
-            "result": job.get("result")
+            "jobs": summaries,
+            "not_found": [job_id for job_id in job_ids if job_id not in summaries]
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error getting job status for {job_id}: {str(e)}")
+        logger.error(f"Error in batch status lookup: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -64,32 +167,35 @@ async def list_jobs(
         List of jobs matching the criteria
     """
     try:
-        # TODO: Replace with database query
-        jobs = []
-        for job_id, job_data in job_storage.items():
-            if user_id and job_data.get("user_id") != user_id:
-                continue
-            if status and job_data.get("status") != status:
-                continue
+        try:
+            status_filter = JobStatus(status) if status else None
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Unknown job status: {status}")
             
-            jobs.append({
-                "job_id": job_id,
-                "status": job_data.get("status"),
-                "created_at": job_data.get("created_at"),
-                "user_id": job_data.get("user_id")
-            })
-        
-        # Apply pagination
-        total = len(jobs)
-        jobs = jobs[offset:offset + limit]
+        jobs, total = await VideoJob.list_jobs(
+            user_id=user_id,
+            status=status_filter,
+            limit=limit,
+            offset=offset
+        )
         
         return {
-            "jobs": jobs,
+            "jobs": [
+                {
+                    "job_id": job.id,
+                    "status": job.status.value,
+                    "created_at": job.created_at.isoformat() if job.created_at else None,
+                    "user_id": job.user_id
+                }
+                for job in jobs
+            ],
             "total": total,
             "limit": limit,
             "offset": offset
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error listing jobs: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -107,19 +213,52 @@ async def cancel_job(job_id: str) -> Dict[str, Any]:
         Cancellation confirmation
     """
     try:
-        # TODO: Replace with database update and Celery task cancellation
-        if job_id not in job_storage:
+        job = await VideoJob.get(job_id)
+        if not job:
             raise HTTPException(status_code=404, detail="Job not found")
         
-        job = job_storage[job_id]
-        if job.get("status") in ["completed", "failed", "cancelled"]:
+        if job.status in TERMINAL_STATUSES:
             raise HTTPException(
                 status_code=400, 
-                detail=f"Cannot cancel job with status: {job.get('status')}"
+                detail=f"Cannot cancel job with status: {job.status.value}"
             )
         
-        job["status"] = "cancelled"
-        job["message"] = "Job cancelled by user request"
+        # Background stages check for cancellation between steps; if one of
+        # them finished the job first, the transition check rejects this
+        try:
+            await job.append_event(
+                "cancelled",
+                {"status": JobStatus.CANCELLED.value},
+                stage="cancelled",
+                status=JobStatus.CANCELLED,
+                error_message="Job cancelled by user request"
+            )
+        except InvalidTransitionError as e:
+            raise HTTPException(
+                status_code=400, detail=f"Cannot cancel job with status: {e.current.value}"
+            )
+        await coalescing.release_job(job)
+        released = [job_id]
+
+        # Cancelling a multi-variant request cancels its pending variants
+        for child in await VideoJob.get_children(job_id):
+            if child.status not in TERMINAL_STATUSES:
+                try:
+                    await child.append_event(
+                        "cancelled",
+                        {"status": JobStatus.CANCELLED.value, "parent_job_id": job_id},
+                        stage="cancelled",
+                        status=JobStatus.CANCELLED,
+                        error_message="Parent job cancelled by user request"
+                    )
+                except InvalidTransitionError:
+                    # The variant finished while we were cancelling
+                    continue
+                released.append(str(child.id))
+        if job.input_type == "image":
+            await upload_store.release(released)
+        if job.parent_job_id:
+            await video_generator.refresh_parent(str(job.parent_job_id))
         
         return {
             "job_id": job_id,
@@ -127,6 +266,8 @@ async def cancel_job(job_id: str) -> Dict[str, Any]:
             "message": "Job cancelled successfully"
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error cancelling job {job_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -1,20 +1,23 @@
 """
 Video generation API endpoints
 """
-from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Depends, BackgroundTasks
-from fastapi.responses import JSONResponse
-from typing import Optional, Dict, Any
-import aiofiles
-import uuid
+from fastapi import APIRouter, UploadFile, File, HTTPException, Form
+from typing import Optional, Dict, Any, List
+import hashlib
+import json
 from pathlib import Path
 import logging
 
 from app.services.video_generator import VideoGenerator
+from app.services import upload_store
 from app.core.config import settings
 from app.schemas.video import (
     VideoGenerationRequest,
     VideoGenerationResponse,
-    VideoFromImageRequest
+    VideoVariant,
+    CacheMode,
+    BulkVideoGenerationRequest,
+    BulkVideoGenerationResponse
 )
 
 logger = logging.getLogger(__name__)
@@ -24,10 +27,18 @@ router = APIRouter()
 video_generator = VideoGenerator()
 
 
-@router.post("/generate/text", response_model=VideoGenerationResponse)
+def _check_variant_count(variants: Optional[List[VideoVariant]]) -> None:
+    """Reject multi-variant requests above MAX_VARIANTS"""
+    if variants is not None and not 1 <= len(variants) <= settings.MAX_VARIANTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Between 1 and {settings.MAX_VARIANTS} variants can be requested"
+        )
+
+
+@router.post("/generate/text", response_model=VideoGenerationResponse, status_code=202)
 async def generate_video_from_text(
-    request: VideoGenerationRequest,
-    background_tasks: BackgroundTasks
+    request: VideoGenerationRequest
 ) -> VideoGenerationResponse:
     """
     Generate video from text prompt
@@ -36,7 +47,8 @@ async def generate_video_from_text(
         request: Video generation request with prompt and parameters
         
     Returns:
-        Job information for tracking generation progress
+        Job information for tracking generation progress (the job is
+        processed in the background)
     """
     try:
         # Validate parameters
@@ -45,6 +57,7 @@ async def generate_video_from_text(
                 status_code=400,
                 detail=f"Duration cannot exceed {settings.MAX_VIDEO_DURATION} seconds"
             )
+        _check_variant_count(request.variants)
         
         # Create generation job
         result = await video_generator.generate_from_prompt(
@@ -55,30 +68,46 @@ async def generate_video_from_text(
                 "aspect_ratio": request.aspect_ratio,
                 "style": request.style,
                 "quality": request.quality
-            }
+            },
+            public=request.public,
+            use_cache=request.cache != CacheMode.BYPASS,
+            variants=(
+                [variant.style_overrides() for variant in request.variants]
+                if request.variants else None
+            )
         )
         
+        # Enhancement, submission and polling run as pipeline stages; a
+        # coalesced request is already being processed by its original job
+        if not result.get("coalesced"):
+            await video_generator.dispatch_new([result["job_id"]])
+        
         return VideoGenerationResponse(
             job_id=result["job_id"],
             status=result["status"],
-            message=result.get("message", "Video generation started"),
-            estimated_time=result.get("estimated_time", 120)
+            message=result.get("message", "Video generation queued"),
+            estimated_time=result.get("estimated_time", 120),
+            child_job_ids=result.get("child_job_ids")
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in text-to-video generation: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/generate/image", response_model=VideoGenerationResponse)
+@router.post("/generate/image", response_model=VideoGenerationResponse, status_code=202)
 async def generate_video_from_image(
-    background_tasks: BackgroundTasks,
     image: UploadFile = File(...),
     prompt: Optional[str] = Form(None),
     duration: int = Form(5),
     motion_intensity: str = Form("medium"),
     camera_movement: str = Form("static"),
-    user_id: Optional[str] = Form(None)
+    user_id: Optional[str] = Form(None),
+    public: bool = Form(False),
+    cache: CacheMode = Form(CacheMode.USE),
+    variants: Optional[str] = Form(None)
 ) -> VideoGenerationResponse:
     """
     Generate video from uploaded image
@@ -90,9 +119,13 @@ async def generate_video_from_image(
         motion_intensity: Motion intensity (low, medium, high)
         camera_movement: Camera movement type
         user_id: User identifier
+        public: Share identical in-flight generations with other users
+        cache: "bypass" always generates a fresh video
+        variants: JSON list of variant overrides (motion_intensity, camera_movement, seed)
         
     Returns:
-        Job information for tracking generation progress
+        Job information for tracking generation progress (analysis and
+        generation run in the background)
     """
     try:
         # Validate file type
@@ -110,13 +143,19 @@ async def generate_video_from_image(
                 detail=f"File size exceeds maximum of {settings.MAX_UPLOAD_SIZE / 1024 / 1024}MB"
             )
         
-        # Save uploaded image
-        file_id = str(uuid.uuid4())
-        file_path = settings.UPLOAD_DIR / f"{file_id}{file_ext}"
+        # Variants share the upload and the image analysis
+        try:
+            parsed_variants = (
+                [VideoVariant(**item) for item in json.loads(variants)] if variants else None
+            )
+        except (ValueError, TypeError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid variants: {str(e)}")
+        _check_variant_count(parsed_variants)
         
-        async with aiofiles.open(file_path, 'wb') as f:
-            content = await image.read()
-            await f.write(content)
+        # Save uploaded image (identical content is stored once)
+        content = await image.read()
+        image_digest = hashlib.sha256(content).hexdigest()
+        file_path = await upload_store.save(content, image_digest, file_ext)
         
         logger.info(f"Image saved to {file_path}")
         
@@ -127,23 +166,193 @@ async def generate_video_from_image(
             user_id=user_id or "anonymous",
             motion_params={
                 "intensity": motion_intensity,
-                "camera": camera_movement,
+                "camera_movement": camera_movement,
                 "duration": duration
-            }
+            },
+            public=public,
+            image_digest=image_digest,
+            use_cache=cache != CacheMode.BYPASS,
+            variants=(
+                [variant.motion_overrides() for variant in parsed_variants]
+                if parsed_variants else None
+            )
         )
         
+        # A coalesced request uses the original job's (identical, shared) upload
+        if not result.get("coalesced"):
+            await video_generator.dispatch_new([result["job_id"]])
+        
+        message = result["message"]
+        if not result.get("coalesced"):
+            message = "Image uploaded and video generation queued"
         return VideoGenerationResponse(
             job_id=result["job_id"],
             status=result["status"],
-            message="Image uploaded and video generation started",
-            estimated_time=result.get("estimated_time", 90)
+            message=message,
+            estimated_time=result.get("estimated_time", 90),
+            child_job_ids=result.get("child_job_ids")
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in image-to-video generation: {str(e)}")
-        # Clean up uploaded file if it exists
-        if 'file_path' in locals() and file_path.exists():
-            file_path.unlink()
+        # The upload may be shared; the storage collector removes it once unreferenced
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/generate/bulk", response_model=BulkVideoGenerationResponse, status_code=202)
+async def generate_videos_bulk(request: BulkVideoGenerationRequest) -> BulkVideoGenerationResponse:
+    """
+    Generate many videos from text prompts in one call
+    
+    Args:
+        request: List of text-to-video requests
+        
+    Returns:
+        Job ids of all accepted requests, in request order
+    """
+    try:
+        # Validate everything before creating any job
+        if len(request.items) > settings.BULK_MAX_ITEMS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"At most {settings.BULK_MAX_ITEMS} items can be submitted at once"
+            )
+        for index, item in enumerate(request.items):
+            if item.duration > settings.MAX_VIDEO_DURATION:
+                raise HTTPException(
+                    status_code=400,
+                    detail=(
+                        f"Item {index}: duration cannot exceed "
+                        f"{settings.MAX_VIDEO_DURATION} seconds"
+                    )
+                )
+            if item.variants:
+                raise HTTPException(
+                    status_code=400, detail=f"Item {index}: variants are not supported in bulk"
+                )
+        
+        job_ids = await video_generator.generate_bulk("text", [
+            (
+                item.user_id or request.user_id or "anonymous",
+                video_generator.text_input(
+                    item.prompt,
+                    {
+                        "duration": item.duration,
+                        "aspect_ratio": item.aspect_ratio,
+                        "style": item.style,
+                        "quality": item.quality
+                    },
+                    use_cache=item.cache != CacheMode.BYPASS
+                )
+            )
+            for item in request.items
+        ])
+        
+        # All stage messages go out over one broker connection
+        await video_generator.dispatch_new(job_ids)
+        
+        return BulkVideoGenerationResponse(
+            job_ids=job_ids,
+            status="pending",
+            message=f"{len(job_ids)} video generations queued"
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in bulk text-to-video generation: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/generate/bulk/images", response_model=BulkVideoGenerationResponse, status_code=202)
+async def generate_videos_from_images_bulk(
+    images: List[UploadFile] = File(...),
+    prompt: Optional[str] = Form(None),
+    duration: int = Form(5),
+    motion_intensity: str = Form("medium"),
+    camera_movement: str = Form("static"),
+    user_id: Optional[str] = Form(None),
+    cache: CacheMode = Form(CacheMode.USE)
+) -> BulkVideoGenerationResponse:
+    """
+    Generate one video per uploaded image in one call
+    
+    Args:
+        images: Uploaded image files
+        prompt: Optional motion description applied to every image
+        duration: Video duration in seconds
+        motion_intensity: Motion intensity (low, medium, high)
+        camera_movement: Camera movement type
+        user_id: User identifier
+        cache: "bypass" always generates fresh videos
+        
+    Returns:
+        Job ids of all accepted images, in upload order
+    """
+    try:
+        # Validate every file before writing any of them
+        if len(images) > settings.BULK_MAX_ITEMS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"At most {settings.BULK_MAX_ITEMS} images can be submitted at once"
+            )
+        for image in images:
+            file_ext = Path(image.filename).suffix.lower()
+            if file_ext not in settings.ALLOWED_IMAGE_TYPES:
+                raise HTTPException(
+                    status_code=400,
+                    detail=(
+                        f"Invalid file type for {image.filename}. "
+                        f"Allowed types: {settings.ALLOWED_IMAGE_TYPES}"
+                    )
+                )
+            if image.size > settings.MAX_UPLOAD_SIZE:
+                raise HTTPException(
+                    status_code=400,
+                    detail=(
+                        f"{image.filename} exceeds maximum of "
+                        f"{settings.MAX_UPLOAD_SIZE / 1024 / 1024}MB"
+                    )
+                )
+        
+        motion_params = {
+            "intensity": motion_intensity,
+            "camera_movement": camera_movement,
+            "duration": duration
+        }
+        jobs = []
+        for image in images:
+            content = await image.read()
+            image_digest = hashlib.sha256(content).hexdigest()
+            file_ext = Path(image.filename).suffix.lower()
+            file_path = await upload_store.save(content, image_digest, file_ext)
+            jobs.append((
+                user_id or "anonymous",
+                video_generator.image_input(
+                    str(file_path),
+                    image_digest,
+                    prompt,
+                    motion_params,
+                    use_cache=cache != CacheMode.BYPASS
+                )
+            ))
+        
+        job_ids = await video_generator.generate_bulk("image", jobs)
+        await video_generator.dispatch_new(job_ids)
+        
+        return BulkVideoGenerationResponse(
+            job_ids=job_ids,
+            status="pending",
+            message=f"{len(job_ids)} images uploaded and video generations queued"
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in bulk image-to-video generation: {str(e)}")
+        # Uploads may be shared; the storage collector removes them once unreferenced
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -2,16 +2,27 @@
 Google AI Studio (Gemini) client for prompt enhancement and image analysis
 """
 import google.generativeai as genai
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Tuple
+import asyncio
+import json
 import logging
+import time
 import base64
 from pathlib import Path
 
 from app.core.config import settings
+from app.core.rate_limiter import TokenBucket, RateLimitExceeded
+from app.core.circuit_breaker import CircuitBreaker, get_breaker
+from app.core.latency import LatencyTracker, get_latency_tracker
 
 logger = logging.getLogger(__name__)
 
 
+def _is_provider_failure(exc: BaseException) -> bool:
+    """Whether an error says Gemini is unhealthy (not blocked content or local throttling)"""
+    return not isinstance(exc, (ValueError, RateLimitExceeded, FileNotFoundError))
+
+
 class GoogleAIClient:
     """
     Client for Google AI Studio (Gemini) API
@@ -24,6 +35,60 @@ class GoogleAIClient:
         self.model = genai.GenerativeModel('gemini-pro')
         self.vision_model = genai.GenerativeModel('gemini-pro-vision')
         
+        # Per-key request budget shared by every process using this key
+        self.bucket = TokenBucket(
+            "google_ai:generate",
+            settings.GOOGLE_AI_REQUESTS_PER_MINUTE,
+            settings.GOOGLE_AI_BURST,
+            key_id=settings.GOOGLE_AI_API_KEY
+        )
+        
+        # Shared breakers: while Gemini is down, callers fall back immediately
+        self.text_breaker = get_breaker("google_ai", "generate", _is_provider_failure)
+        self.vision_breaker = get_breaker("google_ai", "vision", _is_provider_failure)
+        # Multi-prompt calls take longer: a slow batch must neither time out on
+        # the single-prompt p99 nor open the breaker of single-prompt calls
+        self.batch_breaker = get_breaker("google_ai", "generate_batch", _is_provider_failure)
+        
+        # Observed latencies bound how long each Gemini call may take
+        self.text_latency = get_latency_tracker("google_ai", "generate")
+        self.vision_latency = get_latency_tracker("google_ai", "vision")
+        self.batch_latency = get_latency_tracker("google_ai", "generate_batch")
+    
+    async def _generate(
+        self,
+        model: Any,
+        contents: Any,
+        breaker: CircuitBreaker,
+        latency: LatencyTracker
+    ) -> Any:
+        """
+        Call Gemini through the breaker, rate limit and adaptive timeout
+        
+        Args:
+            model: GenerativeModel to call
+            contents: Prompt or list of prompt parts
+            breaker: Circuit breaker for this endpoint
+            latency: Latency tracker that sets the timeout
+            
+        Returns:
+            Gemini response
+        """
+        async with breaker.guard():
+            await self.bucket.acquire()
+            timeout = latency.timeout()
+            start = time.monotonic()
+            try:
+                response = await asyncio.wait_for(
+                    model.generate_content_async(contents), timeout=timeout
+                )
+            except asyncio.TimeoutError:
+                # A timed-out call took at least this long; leaving it out would pull p99 down
+                latency.observe(timeout)
+                raise
+            latency.observe(time.monotonic() - start)
+            return response
+        
     async def enhance_prompt(
         self, 
         prompt: str, 
@@ -58,7 +123,9 @@ class GoogleAIClient:
             Return only the enhanced prompt, no explanations.
             """
             
-            response = self.model.generate_content(enhancement_prompt)
+            response = await self._generate(
+                self.model, enhancement_prompt, self.text_breaker, self.text_latency
+            )
             enhanced = response.text.strip()
             
             logger.info(f"Enhanced prompt from '{prompt[:50]}...' to '{enhanced[:50]}...'")
@@ -69,6 +136,61 @@ class GoogleAIClient:
             # Fallback to original prompt if enhancement fails
             return prompt
     
+    async def enhance_prompts_batch(self, items: List[Tuple[str, str]]) -> List[str]:
+        """
+        Enhance several prompts with a single Gemini request
+        
+        Args:
+            items: List of (prompt, context) pairs
+            
+        Returns:
+            Enhanced prompts in the same order as items
+            
+        Raises:
+            ValueError: If the response is not a JSON array of matching length
+        """
+        payload = json.dumps(
+            [{"context": context, "prompt": prompt} for prompt, context in items],
+            ensure_ascii=False
+        )
+        batch_prompt = f"""
+        You are a creative director for AI video generation.
+        For each item below, enhance its prompt into a more detailed, cinematic description
+        that will result in a high-quality AI-generated video, taking its context into account.
+        Include visual style and mood, camera movements if relevant, lighting and atmosphere,
+        key actions or transitions, and color palette suggestions.
+        Keep each enhancement concise but descriptive (max 150 words).
+        
+        Items:
+        {payload}
+        
+        Return only a JSON array of {len(items)} strings: the enhanced prompts,
+        in the same order as the items.
+        """
+        
+        response = await self._generate(
+            self.model, batch_prompt, self.batch_breaker, self.batch_latency
+        )
+        text = response.text.strip()
+        
+        # Tolerate a fenced ```json block around the array
+        if text.startswith("```"):
+            text = text.strip("`")
+            text = text[text.find("["):]
+        
+        enhanced = json.loads(text)
+        if (
+            not isinstance(enhanced, list)
+            or len(enhanced) != len(items)
+            or not all(isinstance(item, str) and item.strip() for item in enhanced)
+        ):
+            raise ValueError(
+                f"Expected a JSON array of {len(items)} strings from batch enhancement"
+            )
+        
+        logger.info(f"Enhanced {len(items)} prompts in one request")
+        return [item.strip() for item in enhanced]
+    
     async def analyze_image(self, image_path: str) -> Dict[str, Any]:
         """
         Analyze uploaded image to generate context
@@ -106,7 +228,12 @@ class GoogleAIClient:
             Format as a comprehensive description suitable for video generation.
             """
             
-            response = self.vision_model.generate_content([analysis_prompt, image_part])
+            response = await self._generate(
+                self.vision_model,
+                [analysis_prompt, image_part],
+                self.vision_breaker,
+                self.vision_latency
+            )
             
             return {
                 "description": response.text.strip(),
@@ -153,7 +280,9 @@ class GoogleAIClient:
             Format as a structured list.
             """
             
-            response = self.model.generate_content(storyboard_prompt)
+            response = await self._generate(
+                self.model, storyboard_prompt, self.text_breaker, self.text_latency
+            )
             
             # Parse response into structured format
             scenes = self._parse_storyboard(response.text)
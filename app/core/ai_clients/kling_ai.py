@@ -8,14 +8,37 @@ import json
 import time
 import logging
 from typing import Dict, Any, Optional
-from datetime import datetime
 import base64
 
 from app.core.config import settings
+from app.core.rate_limiter import TokenBucket
+from app.core.concurrency import AIMDLimiter, get_limiter
+from app.core.circuit_breaker import CircuitBreaker, get_breaker
+from app.core.retry import retry_async
+from app.core.latency import LatencyTracker, get_latency_tracker, hedged
 
 logger = logging.getLogger(__name__)
 
 
+class KlingAPIError(Exception):
+    """Error response from the Kling AI API"""
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        self.status_code = status_code
+        super().__init__(message)
+
+
+def _is_overload(exc: BaseException) -> bool:
+    """Whether an error means Kling is over capacity (429, 5xx or timeout)"""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code == 429 or exc.response.status_code >= 500
+    return isinstance(exc, httpx.TimeoutException)
+
+
+def _is_provider_failure(exc: BaseException) -> bool:
+    """Whether an error says Kling is unhealthy (overload or transport failure)"""
+    return _is_overload(exc) or isinstance(exc, httpx.TransportError)
+
+
 class KlingAIClient:
     """
     Client for Kling AI API
@@ -26,7 +49,48 @@ class KlingAIClient:
         self.access_key = settings.KLING_API_ACCESS_KEY
         self.secret_key = settings.KLING_API_SECRET_KEY
         self.base_url = settings.KLING_API_BASE_URL
-        self.client = httpx.AsyncClient(timeout=30.0)
+        # Per-request timeouts come from the endpoint latency trackers
+        self.client = httpx.AsyncClient(
+            timeout=settings.PROVIDER_TIMEOUT_CEILING,
+            limits=httpx.Limits(max_connections=settings.KLING_MAX_CONNECTIONS)
+        )
+        
+        # Separate provider budgets for submissions and status/control calls
+        self.submit_bucket = TokenBucket(
+            "kling:submit",
+            settings.KLING_SUBMIT_REQUESTS_PER_MINUTE,
+            settings.KLING_SUBMIT_BURST,
+            key_id=self.access_key
+        )
+        self.status_bucket = TokenBucket(
+            "kling:status",
+            settings.KLING_STATUS_REQUESTS_PER_MINUTE,
+            settings.KLING_STATUS_BURST,
+            key_id=self.access_key
+        )
+        
+        # In-flight submissions adapt to Kling's current capacity (shared per process)
+        self.submit_limiter = get_limiter(
+            "kling_submit",
+            initial_limit=settings.KLING_SUBMIT_CONCURRENCY_INITIAL,
+            min_limit=settings.KLING_SUBMIT_CONCURRENCY_MIN,
+            max_limit=settings.KLING_SUBMIT_CONCURRENCY_MAX,
+            decrease_factor=settings.KLING_SUBMIT_CONCURRENCY_DECREASE,
+            latency_tolerance=settings.KLING_SUBMIT_LATENCY_TOLERANCE,
+            is_overload=_is_overload
+        )
+        
+        # Shared per-endpoint breakers fail fast while Kling is down
+        self.text_breaker = get_breaker("kling", "text_to_video", _is_provider_failure)
+        self.image_breaker = get_breaker("kling", "image_to_video", _is_provider_failure)
+        self.status_breaker = get_breaker("kling", "status", _is_provider_failure)
+        self.cancel_breaker = get_breaker("kling", "cancel", _is_provider_failure)
+        
+        # Observed latencies drive per-endpoint timeouts and status hedging
+        self.text_latency = get_latency_tracker("kling", "text_to_video")
+        self.image_latency = get_latency_tracker("kling", "image_to_video")
+        self.status_latency = get_latency_tracker("kling", "status")
+        self.cancel_latency = get_latency_tracker("kling", "cancel")
         
     def _generate_signature(self, method: str, path: str, timestamp: str, body: str = "") -> str:
         """
@@ -77,12 +141,80 @@ class KlingAIClient:
             "X-Signature": signature
         }
     
+    async def _request(
+        self,
+        method: str,
+        endpoint: str,
+        bucket: TokenBucket,
+        breaker: CircuitBreaker,
+        latency: LatencyTracker,
+        body: Optional[Dict] = None,
+        limiter: Optional[AIMDLimiter] = None,
+        timeout: Optional[float] = None
+    ) -> httpx.Response:
+        """
+        Send an authenticated request once a rate limit token is available
+        
+        Args:
+            method: HTTP method
+            endpoint: API endpoint path
+            bucket: Rate limit budget the call is charged to
+            breaker: Circuit breaker guarding this endpoint
+            latency: Latency tracker that sets the timeout for this endpoint
+            body: Request body dictionary
+            limiter: Optional adaptive concurrency limiter to hold a slot in
+            timeout: Fixed timeout instead of the adaptive one (for calls that
+                must not be cut short)
+            
+        Returns:
+            Successful HTTP response
+        """
+        async with breaker.guard():
+            await bucket.acquire()
+            
+            if limiter is None:
+                return await self._send(method, endpoint, latency, body, timeout)
+            
+            async with limiter.slot():
+                return await self._send(method, endpoint, latency, body, timeout)
+    
+    async def _send(
+        self,
+        method: str,
+        endpoint: str,
+        latency: LatencyTracker,
+        body: Optional[Dict] = None,
+        timeout: Optional[float] = None
+    ) -> httpx.Response:
+        """Sign and send one request with the adaptive or fixed timeout, raising on HTTP errors"""
+        headers = self._get_headers(method, endpoint, body)
+        timeout = timeout or latency.timeout()
+        start = time.monotonic()
+        try:
+            response = await self.client.request(
+                method,
+                f"{self.base_url}{endpoint}",
+                headers=headers,
+                json=body,
+                timeout=timeout
+            )
+        except httpx.TimeoutException:
+            # A timed-out call took at least this long; leaving it out would pull p99 down
+            latency.observe(timeout)
+            raise
+        latency.observe(time.monotonic() - start)
+        
+        response.raise_for_status()
+        return response
+    
     async def text_to_video(
         self,
         prompt: str,
         duration: Optional[int] = None,
         aspect_ratio: Optional[str] = None,
-        style: Optional[str] = None
+        style: Optional[str] = None,
+        seed: Optional[int] = None,
+        quality: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Generate video from text prompt
@@ -92,12 +224,15 @@ class KlingAIClient:
             duration: Video duration in seconds (3-10)
             aspect_ratio: Video aspect ratio (16:9, 9:16, 1:1)
             style: Visual style (realistic, anime, cartoon, etc.)
+            seed: Optional seed for reproducible variations
+            quality: Quality level (standard, high, ultra)
             
         Returns:
             Dict containing job_id and initial response
         """
         try:
             endpoint = "/generate/text-to-video"
+            breaker, latency = self.text_breaker, self.text_latency
             
             # Prepare request body
             body = {
@@ -108,18 +243,17 @@ class KlingAIClient:
             
             if style:
                 body["style"] = style
-            
-            # Get headers with authentication
-            headers = self._get_headers("POST", endpoint, body)
-            
-            # Make API request
-            response = await self.client.post(
-                f"{self.base_url}{endpoint}",
-                headers=headers,
-                json=body
+            if seed is not None:
+                body["seed"] = seed
+            if quality:
+                body["quality"] = quality
+            
+            # Make authenticated API request
+            # Fixed timeout: a submit cut short may still create a job we never hear about
+            response = await self._request(
+                "POST", endpoint, self.submit_bucket, breaker, latency, body,
+                limiter=self.submit_limiter, timeout=settings.KLING_SUBMIT_TIMEOUT
             )
-            
-            response.raise_for_status()
             result = response.json()
             
             logger.info(f"Text-to-video job created: {result.get('job_id')}")
@@ -132,7 +266,10 @@ class KlingAIClient:
             
         except httpx.HTTPStatusError as e:
             logger.error(f"HTTP error in text-to-video: {e.response.status_code} - {e.response.text}")
-            raise Exception(f"Kling AI API error: {e.response.text}")
+            raise KlingAPIError(
+                f"Kling AI API error: {e.response.text}",
+                status_code=e.response.status_code
+            ) from e
         except Exception as e:
             logger.error(f"Error in text-to-video generation: {str(e)}")
             raise
@@ -149,13 +286,14 @@ class KlingAIClient:
         Args:
             image_path: Path to input image
             prompt: Optional text prompt for motion guidance
-            motion_params: Motion parameters (intensity, direction, etc.)
+            motion_params: Motion parameters (intensity, direction, camera_movement, quality, seed)
             
         Returns:
             Dict containing job_id and initial response
         """
         try:
             endpoint = "/generate/image-to-video"
+            breaker, latency = self.image_breaker, self.image_latency
             
             # Read and encode image
             with open(image_path, 'rb') as f:
@@ -173,20 +311,23 @@ class KlingAIClient:
             if motion_params:
                 if "direction" in motion_params:
                     body["motion_direction"] = motion_params["direction"]
-                if "camera_movement" in motion_params:
-                    body["camera_movement"] = motion_params["camera_movement"]
-            
-            # Get headers with authentication
-            headers = self._get_headers("POST", endpoint, body)
-            
-            # Make API request
-            response = await self.client.post(
-                f"{self.base_url}{endpoint}",
-                headers=headers,
-                json=body
+                # Jobs stored before the key was normalized use "camera"
+                camera_movement = (
+                    motion_params.get("camera_movement") or motion_params.get("camera")
+                )
+                if camera_movement:
+                    body["camera_movement"] = camera_movement
+                if motion_params.get("quality"):
+                    body["quality"] = motion_params["quality"]
+                if motion_params.get("seed") is not None:
+                    body["seed"] = motion_params["seed"]
+            
+            # Make authenticated API request
+            # Fixed timeout: a submit cut short may still create a job we never hear about
+            response = await self._request(
+                "POST", endpoint, self.submit_bucket, breaker, latency, body,
+                limiter=self.submit_limiter, timeout=settings.KLING_SUBMIT_TIMEOUT
             )
-            
-            response.raise_for_status()
             result = response.json()
             
             logger.info(f"Image-to-video job created: {result.get('job_id')}")
@@ -199,7 +340,10 @@ class KlingAIClient:
             
         except httpx.HTTPStatusError as e:
             logger.error(f"HTTP error in image-to-video: {e.response.status_code} - {e.response.text}")
-            raise Exception(f"Kling AI API error: {e.response.text}")
+            raise KlingAPIError(
+                f"Kling AI API error: {e.response.text}",
+                status_code=e.response.status_code
+            ) from e
         except Exception as e:
             logger.error(f"Error in image-to-video generation: {str(e)}")
             raise
@@ -217,16 +361,28 @@ class KlingAIClient:
         try:
             endpoint = f"/jobs/{job_id}/status"
             
-            # Get headers with authentication
-            headers = self._get_headers("GET", endpoint)
-            
-            # Make API request
-            response = await self.client.get(
-                f"{self.base_url}{endpoint}",
-                headers=headers
+            # Status checks are idempotent: slow calls are hedged past p95
+            # and transient failures are retried
+            hedge_after = (
+                self.status_latency.percentile(0.95)
+                if settings.KLING_STATUS_HEDGING_ENABLED else None
+            )
+            response = await retry_async(
+                lambda: hedged(
+                    lambda: self._request(
+                        "GET",
+                        endpoint,
+                        self.status_bucket,
+                        self.status_breaker,
+                        self.status_latency
+                    ),
+                    hedge_after
+                ),
+                attempts=settings.PROVIDER_RETRY_ATTEMPTS,
+                base_delay=settings.PROVIDER_RETRY_BASE_DELAY,
+                max_delay=settings.PROVIDER_RETRY_MAX_DELAY,
+                retry_on=_is_provider_failure
             )
-            
-            response.raise_for_status()
             result = response.json()
             
             status_map = {
@@ -246,7 +402,10 @@ class KlingAIClient:
             
         except httpx.HTTPStatusError as e:
             logger.error(f"HTTP error checking status: {e.response.status_code} - {e.response.text}")
-            raise Exception(f"Kling AI API error: {e.response.text}")
+            raise KlingAPIError(
+                f"Kling AI API error: {e.response.text}",
+                status_code=e.response.status_code
+            ) from e
         except Exception as e:
             logger.error(f"Error checking job status: {str(e)}")
             raise
@@ -264,17 +423,11 @@ class KlingAIClient:
         try:
             endpoint = f"/jobs/{job_id}/cancel"
             
-            # Get headers with authentication
-            headers = self._get_headers("POST", endpoint)
-            
-            # Make API request
-            response = await self.client.post(
-                f"{self.base_url}{endpoint}",
-                headers=headers
+            # Make authenticated API request
+            await self._request(
+                "POST", endpoint, self.status_bucket, self.cancel_breaker, self.cancel_latency
             )
             
-            response.raise_for_status()
-            
             logger.info(f"Job {job_id} cancelled successfully")
             return True
             
@@ -0,0 +1,206 @@
+"""
+Per-provider, per-endpoint circuit breakers for AI provider calls
+
+While a provider is failing, calls fail fast with CircuitOpenError instead
+of waiting on network timeouts. After a recovery timeout a limited number
+of trial calls is let through (half-open) to probe whether it is back.
+"""
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager
+from enum import Enum
+from typing import Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(Enum):
+    """Circuit breaker states"""
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+# Numeric encoding for the state gauge
+_STATE_VALUES = {CircuitState.CLOSED: 0, CircuitState.OPEN: 1, CircuitState.HALF_OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit is open"""
+    def __init__(self, provider: str, endpoint: str, retry_after: float):
+        self.provider = provider
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+        super().__init__(f"Circuit open for {provider}:{endpoint} (retry in {retry_after:.1f}s)")
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open circuit breaker for one provider endpoint
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        endpoint: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        is_failure: Optional[Callable[[BaseException], bool]] = None
+    ):
+        """
+        Args:
+            provider: Provider name (e.g. "kling")
+            endpoint: Endpoint name (e.g. "status")
+            failure_threshold: Consecutive failures that open the circuit
+            recovery_timeout: Seconds to stay open before probing
+            half_open_max_calls: Concurrent trial calls allowed while half-open
+            is_failure: Classifies an exception as a provider failure
+        """
+        self.provider = provider
+        self.endpoint = endpoint
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._is_failure = is_failure or (lambda exc: True)
+
+        self._lock = threading.Lock()
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+
+        self._publish()
+
+    @property
+    def state(self) -> CircuitState:
+        """Current state, moving from open to half-open once the timeout passed"""
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    @asynccontextmanager
+    async def guard(self):
+        """
+        Run a provider call through the breaker
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+        """
+        self._before_call()
+        try:
+            yield
+        except BaseException as e:
+            if self._is_failure(e):
+                self._on_failure()
+            else:
+                self._on_release()
+            raise
+        else:
+            self._on_success()
+
+    def _maybe_half_open(self) -> None:
+        if self._state != CircuitState.OPEN:
+            return
+        if time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._transition(CircuitState.HALF_OPEN)
+
+    def _before_call(self) -> None:
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == CircuitState.OPEN:
+                retry_after = self.recovery_timeout - (time.monotonic() - self._opened_at)
+                metrics.inc(
+                    "circuit_breaker_rejected_total", provider=self.provider, endpoint=self.endpoint
+                )
+                raise CircuitOpenError(self.provider, self.endpoint, max(0.0, retry_after))
+            if self._state == CircuitState.HALF_OPEN:
+                if self._half_open_calls >= self.half_open_max_calls:
+                    metrics.inc(
+                        "circuit_breaker_rejected_total",
+                        provider=self.provider,
+                        endpoint=self.endpoint
+                    )
+                    raise CircuitOpenError(self.provider, self.endpoint, 0.0)
+                self._half_open_calls += 1
+
+    def _on_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            if self._state == CircuitState.HALF_OPEN:
+                self._transition(CircuitState.CLOSED)
+
+    def _on_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == CircuitState.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._transition(CircuitState.OPEN)
+
+    def _on_release(self) -> None:
+        # Call ended with an error that says nothing about provider health
+        with self._lock:
+            if self._state == CircuitState.HALF_OPEN and self._half_open_calls > 0:
+                self._half_open_calls -= 1
+
+    def _transition(self, new_state: CircuitState) -> None:
+        if new_state == self._state:
+            return
+        logger.warning(
+            f"Circuit {self.provider}:{self.endpoint} {self._state.value} -> {new_state.value}"
+        )
+        self._state = new_state
+        self._half_open_calls = 0
+        if new_state == CircuitState.CLOSED:
+            self._failures = 0
+        metrics.inc(
+            "circuit_breaker_transitions_total",
+            provider=self.provider, endpoint=self.endpoint, state=new_state.value
+        )
+        self._publish()
+
+    def _publish(self) -> None:
+        metrics.set_gauge(
+            "circuit_breaker_state", _STATE_VALUES[self._state],
+            provider=self.provider, endpoint=self.endpoint
+        )
+
+
+# Process-wide registry so every client instance shares breaker state
+_breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+_registry_lock = threading.Lock()
+
+
+def get_breaker(
+    provider: str,
+    endpoint: str,
+    is_failure: Optional[Callable[[BaseException], bool]] = None
+) -> CircuitBreaker:
+    """
+    Get (or create) the shared breaker for a provider endpoint
+
+    Args:
+        provider: Provider name
+        endpoint: Endpoint name
+        is_failure: Failure classifier used when the breaker is created
+
+    Returns:
+        CircuitBreaker instance
+    """
+    with _registry_lock:
+        breaker = _breakers.get((provider, endpoint))
+        if breaker is None:
+            breaker = CircuitBreaker(
+                provider,
+                endpoint,
+                failure_threshold=settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+                recovery_timeout=settings.CIRCUIT_BREAKER_RECOVERY_TIMEOUT,
+                half_open_max_calls=settings.CIRCUIT_BREAKER_HALF_OPEN_CALLS,
+                is_failure=is_failure
+            )
+            _breakers[(provider, endpoint)] = breaker
+        return breaker
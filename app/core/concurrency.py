@@ -0,0 +1,192 @@
+"""
+AIMD adaptive concurrency limiter for provider submissions
+
+The allowed number of in-flight calls grows additively while the provider
+keeps up and is cut multiplicatively on overload signals (429/5xx,
+timeouts or latency well above the observed baseline).
+
+Celery tasks each run in their own event loop, so limiters are shared per
+process through get_limiter (like circuit breakers) and keep the learned
+limit across tasks; waiters are woken on their own loop.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Deque, Dict, Optional
+
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class AIMDLimiter:
+    """
+    Additive-increase / multiplicative-decrease limit on concurrent calls
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial_limit: int,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        decrease_factor: float = 0.5,
+        latency_tolerance: float = 2.0,
+        is_overload: Optional[Callable[[BaseException], bool]] = None
+    ):
+        """
+        Args:
+            name: Limiter name used for metrics labels
+            initial_limit: Starting concurrency limit
+            min_limit: Lower bound for the limit
+            max_limit: Upper bound for the limit
+            decrease_factor: Multiplier applied to the limit on overload
+            latency_tolerance: Latency above baseline * tolerance counts as overload
+            is_overload: Classifies an exception as an overload signal
+        """
+        self.name = name
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self._is_overload = is_overload or (lambda exc: False)
+
+        self._lock = threading.Lock()
+        self._limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        # Overload signals from calls started before the last decrease are
+        # ignored so one burst of errors only cuts the limit once.
+        self._epoch = 0
+        self._baseline_latency: Optional[float] = None
+
+        self._publish()
+
+    @property
+    def limit(self) -> int:
+        """Current integer concurrency limit"""
+        return max(self.min_limit, int(self._limit))
+
+    @property
+    def in_flight(self) -> int:
+        """Number of calls currently holding a slot"""
+        return self._in_flight
+
+    @asynccontextmanager
+    async def slot(self):
+        """
+        Hold one concurrency slot for the duration of a provider call
+        """
+        await self._acquire()
+        epoch = self._epoch
+        start = time.monotonic()
+        try:
+            yield
+        except BaseException as e:
+            self._release(epoch, overload=self._is_overload(e))
+            raise
+        else:
+            self._release(epoch, latency=time.monotonic() - start)
+
+    async def _acquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                if self._in_flight < self.limit:
+                    self._in_flight += 1
+                    break
+                waiter = loop.create_future()
+                self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                with self._lock:
+                    # Popped by _wake: pass on the wake-up we can no longer use
+                    woken = waiter not in self._waiters
+                    if not woken:
+                        self._waiters.remove(waiter)
+                if woken:
+                    self._wake()
+                raise
+        self._publish()
+
+    def _release(self, epoch: int, overload: bool = False, latency: Optional[float] = None) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+            if latency is not None:
+                baseline = self._baseline_latency
+                if baseline is not None and latency > baseline * self.latency_tolerance:
+                    overload = True
+                # Slow-moving baseline so gradual drift is not mistaken for overload
+                self._baseline_latency = (
+                    latency if self._baseline_latency is None
+                    else 0.95 * self._baseline_latency + 0.05 * latency
+                )
+
+            if overload:
+                if epoch == self._epoch:
+                    self._limit = max(float(self.min_limit), self._limit * self.decrease_factor)
+                    self._epoch += 1
+                    logger.warning(
+                        f"{self.name}: overload detected, concurrency limit cut to {self.limit}"
+                    )
+            elif latency is not None:
+                # Roughly +1 per window of `limit` successful calls
+                self._limit = min(float(self.max_limit), self._limit + 1.0 / self._limit)
+
+        self._publish()
+        self._wake()
+
+    def _wake(self) -> None:
+        woken = []
+        with self._lock:
+            free = self.limit - self._in_flight
+            while free > 0 and self._waiters:
+                waiter = self._waiters.popleft()
+                # Waiters of a finished task's loop are gone
+                if not waiter.done() and not waiter.get_loop().is_closed():
+                    woken.append(waiter)
+                    free -= 1
+        for waiter in woken:
+            try:
+                waiter.get_loop().call_soon_threadsafe(_resolve, waiter)
+            except RuntimeError:
+                # Loop closed in the meantime
+                continue
+
+    def _publish(self) -> None:
+        metrics.set_gauge("aimd_concurrency_limit", self.limit, limiter=self.name)
+        metrics.set_gauge("aimd_in_flight", self._in_flight, limiter=self.name)
+
+
+def _resolve(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+# Process-wide registry so every client instance and Celery task shares the learned limit
+_limiters: Dict[str, AIMDLimiter] = {}
+_registry_lock = threading.Lock()
+
+
+def get_limiter(name: str, **options: Any) -> AIMDLimiter:
+    """
+    Get (or create) the shared limiter with a given name
+
+    Args:
+        name: Limiter name
+        **options: AIMDLimiter arguments used when the limiter is created
+
+    Returns:
+        AIMDLimiter instance
+    """
+    with _registry_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            limiter = AIMDLimiter(name, **options)
+            _limiters[name] = limiter
+        return limiter
@@ -25,17 +25,211 @@ class Settings(BaseSettings):
     KLING_API_ACCESS_KEY: Optional[str] = Field(default=None, description="Kling AI Access Key")
     KLING_API_SECRET_KEY: Optional[str] = Field(default=None, description="Kling AI Secret Key")
     KLING_API_BASE_URL: str = Field(default="https://api.klingai.com/v1")
+    KLING_MAX_CONNECTIONS: int = Field(default=200)
     
     # Database
     DATABASE_URL: str = Field(default="sqlite:///./ai_video_creator.db")
+    DATABASE_READ_URLS: str = Field(
+        default="",
+        description="Comma-separated read replica URLs for status and listing queries"
+    )
+    READ_YOUR_WRITES_WINDOW: int = Field(
+        default=5,
+        description="Seconds a written job (and its user) is read from the primary"
+    )
     
     # Redis
     REDIS_URL: str = Field(default="redis://localhost:6379/0")
     
+    # Provider Rate Limits (shared across processes via Redis token buckets)
+    RATE_LIMIT_ENABLED: bool = Field(default=True)
+    RATE_LIMIT_MAX_WAIT: float = Field(
+        default=10.0,
+        description="Max seconds a caller waits for a token"
+    )
+    GOOGLE_AI_REQUESTS_PER_MINUTE: int = Field(default=60)
+    GOOGLE_AI_BURST: int = Field(default=10)
+    KLING_SUBMIT_REQUESTS_PER_MINUTE: int = Field(default=30)
+    KLING_SUBMIT_BURST: int = Field(default=5)
+    KLING_STATUS_REQUESTS_PER_MINUTE: int = Field(default=300)
+    KLING_STATUS_BURST: int = Field(default=50)
+    
+    # Adaptive (AIMD) concurrency for Kling submissions
+    KLING_SUBMIT_CONCURRENCY_INITIAL: int = Field(default=4)
+    KLING_SUBMIT_CONCURRENCY_MIN: int = Field(default=1)
+    KLING_SUBMIT_CONCURRENCY_MAX: int = Field(default=32)
+    KLING_SUBMIT_CONCURRENCY_DECREASE: float = Field(
+        default=0.5,
+        description="Multiplicative cut on overload"
+    )
+    KLING_SUBMIT_LATENCY_TOLERANCE: float = Field(
+        default=2.0,
+        description="Latency over baseline * tolerance counts as overload"
+    )
+    
+    # Circuit breakers and retries for provider calls
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD: int = Field(default=5)
+    CIRCUIT_BREAKER_RECOVERY_TIMEOUT: float = Field(default=30.0)
+    CIRCUIT_BREAKER_HALF_OPEN_CALLS: int = Field(default=1)
+    PROVIDER_RETRY_ATTEMPTS: int = Field(
+        default=3,
+        description="Attempts for idempotent calls such as status checks"
+    )
+    PROVIDER_RETRY_BASE_DELAY: float = Field(default=0.2)
+    PROVIDER_RETRY_MAX_DELAY: float = Field(default=5.0)
+    
+    # Adaptive provider timeouts (p99 latency * factor, clamped) and hedging
+    PROVIDER_TIMEOUT_FLOOR: float = Field(default=1.0)
+    PROVIDER_TIMEOUT_CEILING: float = Field(default=30.0)
+    PROVIDER_TIMEOUT_P99_FACTOR: float = Field(default=3.0)
+    PROVIDER_LATENCY_MIN_SAMPLES: int = Field(
+        default=20,
+        description="Samples needed before timeouts adapt"
+    )
+    KLING_SUBMIT_TIMEOUT: float = Field(
+        default=30.0,
+        description="Fixed timeout of submissions, which are not idempotent"
+    )
+    KLING_STATUS_HEDGING_ENABLED: bool = Field(
+        default=True,
+        description="Hedge status checks slower than p95"
+    )
+    
+    # Prompt Enhancement
+    PROMPT_ENHANCEMENT_MODE: str = Field(
+        default="auto",
+        description="remote, local or auto (local when queue is deep)"
+    )
+    PROMPT_ENHANCEMENT_DEADLINE: float = Field(
+        default=3.0,
+        description="Seconds to wait for Gemini before using the local template"
+    )
+    PROMPT_ENHANCEMENT_AUTO_QUEUE_DEPTH: int = Field(default=50)
+    PROMPT_CACHE_TTL: int = Field(default=7 * 24 * 3600)
+    PROMPT_BATCH_ENABLED: bool = Field(
+        default=True,
+        description="Micro-batch concurrent Gemini enhancements"
+    )
+    PROMPT_BATCH_MAX_SIZE: int = Field(default=16)
+    PROMPT_BATCH_MAX_WAIT_MS: int = Field(default=50)
+    PROMPT_SIMILARITY_ENABLED: bool = Field(
+        default=True,
+        description="Reuse enhancements of near-duplicate prompts"
+    )
+    PROMPT_SIMILARITY_THRESHOLD: float = Field(
+        default=0.8,
+        description="Minimum Jaccard similarity of prompt content words"
+    )
+    
+    # Pipeline stages (inprocess: asyncio pools in the API, celery: one queue per stage)
+    PIPELINE_BACKEND: str = Field(default="inprocess")
+    STAGE_PREPARE_CONCURRENCY: int = Field(default=8)
+    STAGE_SUBMIT_CONCURRENCY: int = Field(default=4)
+    STAGE_AWAIT_CONCURRENCY: int = Field(default=32)
+    STAGE_DOWNLOAD_CONCURRENCY: int = Field(default=4)
+    STAGE_POSTPROCESS_CONCURRENCY: int = Field(default=2)
+    PIPELINE_RECOVERY_ENABLED: bool = Field(
+        default=True,
+        description="Resume unfinished jobs when the in-process pipeline starts (one API process)"
+    )
+    STATUS_POLL_INTERVAL: float = Field(default=10.0)
+    STATUS_POLL_TIMEOUT: float = Field(default=600.0)
+    PROGRESS_WRITE_DELTA: int = Field(
+        default=10,
+        description="Percentage points progress must move before it is persisted"
+    )
+    
+    # Status checks with PIPELINE_BACKEND=celery:
+    # "asyncio" (app.status_worker) or "celery" (prefork task)
+    STATUS_CHECK_BACKEND: str = Field(default="asyncio")
+    STATUS_WORKER_CONCURRENCY: int = Field(default=1000)
+    STATUS_WORKER_BATCH_SIZE: int = Field(default=100)
+    STATUS_WORKER_VISIBILITY_TIMEOUT: float = Field(
+        default=60.0,
+        description="Seconds before a claimed check is retried"
+    )
+    
+    # Write-behind group commit of job state changes
+    JOB_WRITER_ENABLED: bool = Field(default=True)
+    JOB_WRITER_FLUSH_MS: int = Field(
+        default=20,
+        description="Longest a job write waits for its group commit"
+    )
+    JOB_WRITER_MAX_BATCH: int = Field(
+        default=200,
+        description="Pending jobs that trigger an immediate flush"
+    )
+    
+    # Write-through job status cache and batch lookups
+    STATUS_CACHE_TTL: int = Field(
+        default=300,
+        description="Expiry of an active job's record, a safety net for missed writes"
+    )
+    STATUS_CACHE_TERMINAL_TTL: int = Field(default=3600)
+    STATUS_BATCH_MAX_IDS: int = Field(default=200)
+    
+    # Archival of old terminal jobs into video_jobs_archive (app.services.archiver)
+    ARCHIVE_ENABLED: bool = Field(default=True)
+    ARCHIVE_AFTER: int = Field(
+        default=259200,
+        description="Seconds after its last update a terminal job is archived"
+    )
+    ARCHIVE_BATCH_SIZE: int = Field(default=500, description="Jobs moved per transaction")
+    ARCHIVE_MAX_BATCHES: int = Field(default=20, description="Batches per archival run")
+    ARCHIVE_INTERVAL: float = Field(default=3600.0)
+    
+    # Delayed stage retries (Redis sorted set, see app.services.retry_scheduler)
+    RETRY_MAX_ATTEMPTS: int = Field(default=5)
+    RETRY_BASE_DELAY: float = Field(default=5.0)
+    RETRY_MAX_DELAY: float = Field(default=300.0)
+    RETRY_MAX_AGE: float = Field(
+        default=3600.0,
+        description="Seconds after the first failure before a job is dead-lettered"
+    )
+    RETRY_PUMP_BATCH_SIZE: int = Field(default=500)
+    RETRY_PUMP_INTERVAL: float = Field(default=1.0)
+    RETRY_CLAIM_TIMEOUT: float = Field(
+        default=60.0,
+        description="Seconds before retries claimed by a failed pump are due again"
+    )
+    
+    # Single-flight coalescing of identical in-flight requests
+    COALESCING_ENABLED: bool = Field(default=True)
+    COALESCING_LEASE_TTL: int = Field(
+        default=900,
+        description="Upper bound in seconds on how long a request stays attachable"
+    )
+    
+    # Result cache: reuse completed outputs for identical inputs (opt-in)
+    RESULT_CACHE_ENABLED: bool = Field(default=False)
+    RESULT_CACHE_MAX_ENTRIES: int = Field(default=10000)
+    
     # Storage
     UPLOAD_DIR: Path = Field(default=Path("./uploads"))
     OUTPUT_DIR: Path = Field(default=Path("./outputs"))
+    OUTPUT_RETENTION: int = Field(
+        default=604800,
+        description="Seconds generated outputs are kept"
+    )  # 7 days
     MAX_UPLOAD_SIZE: int = Field(default=104857600)  # 100MB
+    TEMP_DIR: Path = Field(default=Path("./temp"))
+    
+    # Storage garbage collection (app.services.storage)
+    STORAGE_GC_ENABLED: bool = Field(default=True)
+    STORAGE_GC_INTERVAL: float = Field(default=600.0)
+    OUTPUT_DISK_BUDGET: int = Field(
+        default=50 * 1024 ** 3,
+        description="Bytes OUTPUT_DIR may use before LRU eviction"
+    )
+    UPLOAD_RETENTION: int = Field(
+        default=3600,
+        description="Seconds an upload no job references is kept"
+    )
+    UPLOAD_ANALYSIS_TTL: int = Field(
+        default=604800,
+        description="Seconds an image analysis is cached by content digest"
+    )
+    TEMP_FILE_MAX_AGE: int = Field(default=3600)
     
     # File Validation
     ALLOWED_IMAGE_TYPES: List[str] = Field(
@@ -52,6 +246,8 @@ class Settings(BaseSettings):
     # Video Generation
     DEFAULT_VIDEO_DURATION: int = Field(default=5)
     MAX_VIDEO_DURATION: int = Field(default=30)
+    MAX_VARIANTS: int = Field(default=4, description="Variants per multi-variant request")
+    BULK_MAX_ITEMS: int = Field(default=500, description="Requests per bulk submission")
     DEFAULT_ASPECT_RATIO: str = Field(default="16:9")
     
     # Security
@@ -71,8 +267,7 @@ class Settings(BaseSettings):
         self.OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
         
         # Create temp directory
-        temp_dir = Path("./temp")
-        temp_dir.mkdir(exist_ok=True)
+        self.TEMP_DIR.mkdir(parents=True, exist_ok=True)
 
 
 # Create global settings instance
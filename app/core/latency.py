@@ -0,0 +1,129 @@
+"""
+Per-endpoint latency tracking, adaptive timeouts and request hedging
+
+Timeouts are derived from the observed p99 latency times a safety factor,
+clamped between a configurable floor and ceiling, so a hung status check
+is abandoned after a few hundred milliseconds instead of 30 seconds.
+"""
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class LatencyTracker:
+    """
+    Rolling window of call latencies for one provider endpoint
+    """
+
+    def __init__(self, provider: str, endpoint: str, window: int = 500):
+        """
+        Args:
+            provider: Provider name
+            endpoint: Endpoint name
+            window: Number of most recent samples kept
+        """
+        self.provider = provider
+        self.endpoint = endpoint
+        self._lock = threading.Lock()
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._sorted: Optional[List[float]] = None
+
+    def observe(self, seconds: float) -> None:
+        """Record one call latency"""
+        with self._lock:
+            self._samples.append(seconds)
+            self._sorted = None
+        metrics.inc("provider_calls_total", provider=self.provider, endpoint=self.endpoint)
+        metrics.inc(
+            "provider_latency_seconds_sum", seconds, provider=self.provider, endpoint=self.endpoint
+        )
+
+    def percentile(self, q: float) -> Optional[float]:
+        """
+        Latency at quantile q (0-1), or None until enough samples are collected
+        """
+        with self._lock:
+            if len(self._samples) < settings.PROVIDER_LATENCY_MIN_SAMPLES:
+                return None
+            if self._sorted is None:
+                self._sorted = sorted(self._samples)
+            index = min(len(self._sorted) - 1, int(q * len(self._sorted)))
+            return self._sorted[index]
+
+    def timeout(self) -> float:
+        """
+        Adaptive timeout: p99 * safety factor within [floor, ceiling]
+        """
+        p99 = self.percentile(0.99)
+        if p99 is None:
+            timeout = settings.PROVIDER_TIMEOUT_CEILING
+        else:
+            timeout = min(
+                settings.PROVIDER_TIMEOUT_CEILING,
+                max(settings.PROVIDER_TIMEOUT_FLOOR, p99 * settings.PROVIDER_TIMEOUT_P99_FACTOR)
+            )
+        metrics.set_gauge(
+            "provider_timeout_seconds", timeout, provider=self.provider, endpoint=self.endpoint
+        )
+        return timeout
+
+
+_trackers: Dict[Tuple[str, str], LatencyTracker] = {}
+_registry_lock = threading.Lock()
+
+
+def get_latency_tracker(provider: str, endpoint: str) -> LatencyTracker:
+    """
+    Get (or create) the process-wide latency tracker for a provider endpoint
+    """
+    with _registry_lock:
+        tracker = _trackers.get((provider, endpoint))
+        if tracker is None:
+            tracker = LatencyTracker(provider, endpoint)
+            _trackers[(provider, endpoint)] = tracker
+        return tracker
+
+
+async def hedged(call: Callable[[], Awaitable[T]], hedge_after: Optional[float]) -> T:
+    """
+    Run an idempotent call, firing a second copy if the first is slow
+
+    Args:
+        call: Zero-argument coroutine factory
+        hedge_after: Seconds to wait before hedging (None disables hedging)
+
+    Returns:
+        Result of whichever call succeeds first
+    """
+    if hedge_after is None:
+        return await call()
+
+    primary = asyncio.ensure_future(call())
+    tasks = {primary}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+        if not done:
+            metrics.inc("provider_hedged_requests_total")
+            tasks.add(asyncio.ensure_future(call()))
+
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+        # Every attempt failed: surface the primary's error
+        return primary.result()
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
@@ -0,0 +1,60 @@
+"""
+Lightweight in-process metrics registry exposed in Prometheus text format
+"""
+import threading
+from typing import Dict, Tuple
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class MetricsRegistry:
+    """
+    Process-local gauges and counters keyed by name and labels
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+
+    @staticmethod
+    def _labels(labels: Dict[str, str]) -> LabelKey:
+        return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def set_gauge(self, name: str, value: float, **labels) -> None:
+        """Set a gauge to an absolute value"""
+        with self._lock:
+            self._gauges.setdefault(name, {})[self._labels(labels)] = float(value)
+
+    def inc(self, name: str, amount: float = 1.0, **labels) -> None:
+        """Increment a counter"""
+        key = self._labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + amount
+
+    def get(self, name: str, **labels) -> float:
+        """Read the current value of a gauge or counter (0 if unset)"""
+        key = self._labels(labels)
+        with self._lock:
+            for store in (self._gauges, self._counters):
+                if name in store and key in store[name]:
+                    return store[name][key]
+        return 0.0
+
+    def render(self) -> str:
+        """Render all series in Prometheus exposition format"""
+        lines = []
+        with self._lock:
+            for kind, store in (("gauge", self._gauges), ("counter", self._counters)):
+                for name in sorted(store):
+                    lines.append(f"# TYPE {name} {kind}")
+                    for key, value in store[name].items():
+                        label_str = ",".join(f'{k}="{v}"' for k, v in key)
+                        series = f"{name}{{{label_str}}}" if label_str else name
+                        lines.append(f"{series} {value}")
+        return "\n".join(lines) + "\n"
+
+
+# Global registry used across the application
+metrics = MetricsRegistry()
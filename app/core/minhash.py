@@ -0,0 +1,209 @@
+"""
+MinHash signatures and LSH banding for near-duplicate text detection
+
+Pure Python with no dependencies, so the same code backs the Redis index
+used by the prompt enhancer and the in-memory index of the replay script.
+Texts are reduced to normalized words (lowercase, stopwords removed,
+plural "s" stripped) and compared as word sets, so punctuation, casing
+and word order do not matter: "sunset beach, cat" matches "a cat on a
+beach at sunset". Word sets cannot tell who does what to whom, so
+matches are also checked with roles_reversed(): "a dog chasing a cat" is
+not "a cat chasing a dog".
+"""
+import hashlib
+import random
+import re
+from collections import defaultdict
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+STOPWORDS = frozenset({
+    "a", "an", "the", "and", "or", "but", "of", "in", "on", "at", "to", "for",
+    "with", "by", "from", "into", "onto", "over", "under", "as", "is", "are",
+    "was", "were", "be", "been", "it", "its", "this", "that", "these", "those",
+    "some", "very", "please", "make", "create", "generate", "show", "video",
+})
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def words(text: str) -> List[str]:
+    """
+    Normalize text into its content words, in order
+
+    Args:
+        text: Free text such as a user prompt
+
+    Returns:
+        Lowercased words without stopwords or plural "s"
+    """
+    result = []
+    for word in _WORD.findall(text.lower()):
+        if word in STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        result.append(word)
+    return result
+
+
+def tokenize(text: str) -> FrozenSet[str]:
+    """
+    Normalize text into a set of content tokens (word order is lost)
+
+    Args:
+        text: Free text such as a user prompt
+
+    Returns:
+        Lowercased tokens without stopwords or plural "s"
+    """
+    return frozenset(words(text))
+
+
+def roles_reversed(a: Sequence[str], b: Sequence[str]) -> bool:
+    """
+    Whether two word sequences swap the roles around a shared action
+
+    Actions are "-ing" words ("chasing", "feeding"); the word right before
+    one is taken as its agent. The roles are reversed when each text's
+    agent comes after the action in the other text, as in "a dog chasing
+    a cat" vs "a cat chasing a dog". Reordered descriptions without such
+    a swap ("a dog running on a beach" vs "on the beach a dog running")
+    are not reversals.
+
+    Args:
+        a: Words of one text, as returned by words()
+        b: Words of the other text
+
+    Returns:
+        True if the texts describe different roles
+    """
+    actions = {word for word in a if len(word) > 4 and word.endswith("ing")} & set(b)
+    for action in actions:
+        i, j = a.index(action), b.index(action)
+        agent_a = a[i - 1] if i else None
+        agent_b = b[j - 1] if j else None
+        if not agent_a or not agent_b or agent_a == agent_b:
+            continue
+        if agent_a in b[j + 1:] and agent_b in a[i + 1:]:
+            return True
+    return False
+
+
+def jaccard(a: Iterable[str], b: Iterable[str]) -> float:
+    """Jaccard similarity of two token sets"""
+    a, b = set(a), set(b)
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def _token_hash(token: str) -> int:
+    # Stable across processes, unlike hash()
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class MinHasher:
+    """
+    MinHash signatures split into LSH bands
+
+    With b bands of r rows, two sets with Jaccard similarity s share at
+    least one band with probability 1 - (1 - s^r)^b; the defaults (16 x 4)
+    put the 50% point near s = 0.5, below the usual reuse thresholds.
+    """
+
+    def __init__(self, bands: int = 16, rows: int = 4, seed: int = 1):
+        """
+        Args:
+            bands: Number of LSH bands
+            rows: Signature rows per band
+            seed: Seed of the permutation coefficients (must match across processes)
+        """
+        self.bands = bands
+        self.rows = rows
+        rng = random.Random(seed)
+        self._perms = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(bands * rows)
+        ]
+
+    def signature(self, tokens: Iterable[str]) -> List[int]:
+        """MinHash signature of a non-empty token set"""
+        hashes = [_token_hash(token) for token in tokens]
+        return [
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self._perms
+        ]
+
+    def band_keys(self, tokens: Iterable[str]) -> List[str]:
+        """
+        LSH bucket keys of a token set, one per band
+
+        Args:
+            tokens: Non-empty token set
+
+        Returns:
+            "band:digest" strings; similar sets share at least one of them
+        """
+        signature = self.signature(tokens)
+        keys = []
+        for band in range(self.bands):
+            rows = signature[band * self.rows:(band + 1) * self.rows]
+            digest = hashlib.blake2b(
+                ",".join(map(str, rows)).encode("ascii"), digest_size=8
+            ).hexdigest()
+            keys.append(f"{band}:{digest}")
+        return keys
+
+
+class LSHIndex:
+    """
+    In-memory near-duplicate index (see app.services.prompt_similarity for Redis)
+    """
+
+    def __init__(self, hasher: Optional[MinHasher] = None):
+        self.hasher = hasher or MinHasher()
+        self._buckets: Dict[str, Set[str]] = defaultdict(set)
+        self._words: Dict[str, Tuple[str, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    def add(self, item_id: str, sequence: Sequence[str]) -> None:
+        """Index an item by its words (as returned by words())"""
+        if not sequence or item_id in self._words:
+            return
+        self._words[item_id] = tuple(sequence)
+        for key in self.hasher.band_keys(frozenset(sequence)):
+            self._buckets[key].add(item_id)
+
+    def query(self, sequence: Sequence[str], threshold: float) -> Optional[Tuple[str, float]]:
+        """
+        Find the most similar indexed item
+
+        Args:
+            sequence: Words to look up
+            threshold: Minimum Jaccard similarity of the word sets
+
+        Returns:
+            (item id, similarity) of the best match at or above the
+            threshold whose roles are not reversed, or None
+        """
+        if not sequence:
+            return None
+        tokens = frozenset(sequence)
+        candidates = set()
+        for key in self.hasher.band_keys(tokens):
+            candidates |= self._buckets.get(key, set())
+
+        best = None
+        for item_id in candidates:
+            other = self._words[item_id]
+            score = jaccard(tokens, other)
+            if score < threshold or (best is not None and score <= best[1]):
+                continue
+            if not roles_reversed(sequence, other):
+                best = (item_id, score)
+        return best
@@ -0,0 +1,121 @@
+"""
+Distributed token bucket rate limiter backed by Redis
+
+Every API process and Celery worker shares one bucket per provider key,
+so provider RPM limits are respected cluster-wide instead of being
+discovered through 429 responses.
+"""
+import asyncio
+import hashlib
+import logging
+from typing import Optional
+
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.redis_client import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+# Refill and take tokens atomically. Uses the Redis clock so that all
+# processes agree on elapsed time. Returns the wait in milliseconds
+# (0 when the tokens were granted).
+TOKEN_BUCKET_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local wait_ms = 0
+if tokens >= requested then
+    tokens = tokens - requested
+else
+    wait_ms = math.ceil((requested - tokens) / rate * 1000)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return wait_ms
+"""
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a token cannot be obtained within the allowed wait"""
+    def __init__(self, bucket: str, wait: float):
+        self.bucket = bucket
+        self.wait = wait
+        super().__init__(f"Rate limit exceeded for {bucket} (next token in {wait:.2f}s)")
+
+
+class TokenBucket:
+    """
+    Redis token bucket shared by all processes using the same provider key
+    """
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: int,
+        burst: int,
+        key_id: Optional[str] = None
+    ):
+        """
+        Args:
+            name: Bucket name, e.g. "kling:submit"
+            requests_per_minute: Sustained refill rate
+            burst: Bucket capacity
+            key_id: Provider credential the budget belongs to (hashed, never stored)
+        """
+        self.name = name
+        self.rate = requests_per_minute / 60.0
+        self.capacity = max(1, burst)
+        key_hash = hashlib.sha256((key_id or "default").encode("utf-8")).hexdigest()[:16]
+        self.key = f"ratelimit:{name}:{key_hash}"
+
+    async def acquire(self, tokens: int = 1, max_wait: Optional[float] = None) -> None:
+        """
+        Take tokens from the bucket, waiting briefly if it is empty
+
+        Args:
+            tokens: Number of tokens to take
+            max_wait: Max seconds to wait (defaults to RATE_LIMIT_MAX_WAIT)
+
+        Raises:
+            RateLimitExceeded: If the tokens are not available in time
+        """
+        if not settings.RATE_LIMIT_ENABLED or self.rate <= 0:
+            return
+
+        loop = asyncio.get_running_loop()
+        max_wait = settings.RATE_LIMIT_MAX_WAIT if max_wait is None else max_wait
+        deadline = loop.time() + max_wait
+
+        while True:
+            try:
+                script = get_async_redis().register_script(TOKEN_BUCKET_SCRIPT)
+                wait_ms = int(await script(
+                    keys=[self.key], args=[self.rate, self.capacity, tokens]
+                ))
+            except RedisError as e:
+                # Fail open: a Redis outage must not stop video generation
+                logger.warning(
+                    f"Rate limiter unavailable for {self.name}, allowing request: {str(e)}"
+                )
+                return
+
+            if wait_ms <= 0:
+                return
+
+            wait = wait_ms / 1000.0
+            if loop.time() + wait > deadline:
+                raise RateLimitExceeded(self.name, wait)
+
+            logger.debug(f"Rate limited on {self.name}, waiting {wait:.2f}s")
+            await asyncio.sleep(wait)
@@ -0,0 +1,48 @@
+"""
+Shared Redis connections for coordination state (rate limits, caches, leases)
+"""
+import asyncio
+import logging
+import weakref
+
+import redis
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# One async client per event loop: Celery tasks run each job in a fresh loop
+# and redis.asyncio connections cannot be shared between loops.
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aioredis.Redis]" = (
+    weakref.WeakKeyDictionary()
+)
+_sync_client = None
+
+
+def get_async_redis() -> aioredis.Redis:
+    """
+    Get the asyncio Redis client bound to the running event loop
+
+    Returns:
+        redis.asyncio.Redis instance
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = aioredis.from_url(settings.REDIS_URL)
+        _async_clients[loop] = client
+    return client
+
+
+def get_sync_redis() -> redis.Redis:
+    """
+    Get the process-wide synchronous Redis client
+
+    Returns:
+        redis.Redis instance
+    """
+    global _sync_client
+    if _sync_client is None:
+        _sync_client = redis.Redis.from_url(settings.REDIS_URL)
+    return _sync_client
@@ -0,0 +1,79 @@
+"""
+Retry helpers with decorrelated-jitter backoff
+
+Only use these for idempotent provider calls (status checks); retrying a
+submission could create duplicate provider jobs.
+"""
+import asyncio
+import logging
+import random
+from typing import Awaitable, Callable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def decorrelated_jitter(previous: float, base: float, cap: float) -> float:
+    """
+    Next backoff delay using the "decorrelated jitter" scheme
+
+    Args:
+        previous: Previous delay in seconds (use base for the first retry)
+        base: Minimum delay in seconds
+        cap: Maximum delay in seconds
+
+    Returns:
+        Delay in seconds
+    """
+    return min(cap, random.uniform(base, max(base, previous * 3)))
+
+
+async def retry_async(
+    call: Callable[[], Awaitable[T]],
+    attempts: int,
+    base_delay: float,
+    max_delay: float,
+    retry_on: Callable[[BaseException], bool]
+) -> T:
+    """
+    Await `call` until it succeeds, retrying retryable errors with jittered backoff
+
+    Args:
+        call: Zero-argument coroutine factory for the idempotent operation
+        attempts: Total attempts including the first one
+        base_delay: Minimum backoff delay in seconds
+        max_delay: Maximum backoff delay in seconds
+        retry_on: Whether an exception is worth retrying
+
+    Returns:
+        Result of the first successful call
+    """
+    delay = base_delay
+    for attempt in range(1, attempts + 1):
+        try:
+            return await call()
+        except Exception as e:
+            if attempt >= attempts or not retry_on(e):
+                raise
+            delay = decorrelated_jitter(delay, base_delay, max_delay)
+            logger.warning(
+                f"Attempt {attempt}/{attempts} failed ({str(e)}), retrying in {delay:.2f}s"
+            )
+            await asyncio.sleep(delay)
+
+
+def exponential_jitter(attempt: int, base: float, cap: float) -> float:
+    """
+    Exponential backoff with jitter for the nth retry (1-based)
+
+    Args:
+        attempt: Retry number, starting at 1
+        base: Delay of the first retry in seconds
+        cap: Maximum delay in seconds
+
+    Returns:
+        Delay in seconds, uniformly drawn from [base, min(cap, base * 2^(attempt-1))]
+    """
+    ceiling = min(cap, base * (2 ** max(0, attempt - 1)))
+    return random.uniform(min(base, ceiling), ceiling)
@@ -1,11 +1,16 @@
 """
 Database initialization and connection management
 """
+import itertools
 import logging
+from typing import Iterable, Optional
+
+from redis.exceptions import RedisError
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from .core.config import settings
+from .core.redis_client import get_async_redis
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +19,17 @@ try:
     engine = create_engine(settings.DATABASE_URL)
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
     logger.info(f"Database engine created for: {settings.DATABASE_URL}")
+
+    # Optional read replicas for status and listing queries, used round-robin
+    read_engines = [
+        create_engine(url.strip()) for url in settings.DATABASE_READ_URLS.split(",") if url.strip()
+    ]
+    _read_sessions = itertools.cycle([
+        sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+        for read_engine in read_engines
+    ])
+    if read_engines:
+        logger.info(f"Routing read-only queries to {len(read_engines)} replica(s)")
 except Exception as e:
     logger.error(f"Failed to create database engine: {e}")
     raise
@@ -21,6 +37,64 @@ except Exception as e:
 # Create declarative base
 Base = declarative_base()
 
+# Jobs (and users) written within READ_YOUR_WRITES_WINDOW are read from the primary
+RYW_PREFIX = "ryw:"
+
+
+async def mark_written(job_ids: Iterable[str] = (), user_ids: Iterable[str] = ()) -> None:
+    """
+    Open a read-your-writes window after a write
+
+    Replicas lag the primary, so for READ_YOUR_WRITES_WINDOW seconds reads
+    of these jobs (and listings of these users) go to the primary. The
+    window lives in Redis so API processes see writes made by workers.
+
+    Args:
+        job_ids: Jobs just written
+        user_ids: Users who just created jobs
+    """
+    if not read_engines:
+        return
+    keys = [f"{RYW_PREFIX}{job_id}" for job_id in job_ids]
+    keys += [f"{RYW_PREFIX}user:{user_id}" for user_id in user_ids]
+    if not keys:
+        return
+    try:
+        async with get_async_redis().pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.set(key, 1, ex=settings.READ_YOUR_WRITES_WINDOW)
+            await pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Could not record read-your-writes window: {str(e)}")
+
+
+async def read_session(job_ids: Iterable[str] = (), user_id: Optional[str] = None) -> Session:
+    """
+    Session for a read-only query, on a replica when that is safe
+
+    Args:
+        job_ids: Jobs the query reads
+        user_id: User whose jobs the query lists
+
+    Returns:
+        Session bound to a replica, or to the primary when no replicas are
+        configured or one of the jobs/user was written within the window
+    """
+    if not read_engines:
+        return SessionLocal()
+    keys = [f"{RYW_PREFIX}{job_id}" for job_id in job_ids]
+    if user_id:
+        keys.append(f"{RYW_PREFIX}user:{user_id}")
+    if keys:
+        try:
+            if await get_async_redis().exists(*keys):
+                return SessionLocal()
+        except RedisError as e:
+            # Can't tell whether the replica is fresh enough
+            logger.warning(f"Read-your-writes check failed, reading from primary: {str(e)}")
+            return SessionLocal()
+    return next(_read_sessions)()
+
 
 async def init_db():
     """Initialize database tables"""
@@ -37,7 +111,7 @@ async def init_db():
 
 
 # Export SessionLocal for direct use in models
-__all__ = ['Base', 'SessionLocal', 'engine', 'init_db', 'get_db']
+__all__ = ['Base', 'SessionLocal', 'engine', 'init_db', 'get_db', 'read_session', 'mark_written']
 
 
 def get_db():
@@ -13,6 +13,7 @@ import uvicorn
 from .api.endpoints import video, status, health
 from .core.config import settings
 from .database import init_db
+from .services.pipeline import start_inprocess_pipeline, stop_inprocess_pipeline
 from .middleware.error_handler import (
     ErrorHandlerMiddleware,
     APIError,
@@ -46,10 +47,14 @@ async def lifespan(app: FastAPI):
         logger.warning(f"Database initialization failed: {e}")
         logger.warning("Application will start without database connectivity")
     
+    # Run pipeline stages in this process unless Celery workers handle them
+    await start_inprocess_pipeline(video.video_generator)
+    
     yield
     
     # Shutdown
     logger.info("Shutting down application")
+    await stop_inprocess_pipeline()
 
 
 # Create FastAPI app
@@ -3,6 +3,12 @@ Database models for the AI Video Creator application
 """
 
 # Import all models here for SQLAlchemy discovery
-from .video_job import VideoJob, JobStatus
+from .video_job import VideoJob, JobStatus, InvalidTransitionError, ConcurrentUpdateError
+from .video_job_event import VideoJobEvent
+from .video_job_archive import VideoJobArchive
+from .upload_ref import UploadRef
 
-__all__ = ["VideoJob", "JobStatus"]
\ No newline at end of file
+__all__ = [
+    "VideoJob", "JobStatus", "InvalidTransitionError", "ConcurrentUpdateError", "VideoJobEvent",
+    "VideoJobArchive", "UploadRef"
+]
\ No newline at end of file
@@ -0,0 +1,86 @@
+"""
+References from jobs to content-addressed uploads
+"""
+from sqlalchemy import Column, String, DateTime, delete, insert
+from sqlalchemy.sql import func
+from typing import Iterable, List, Set, Tuple
+
+from app.database import Base, SessionLocal
+
+
+class UploadRef(Base):
+    """
+    One job's use of an uploaded file
+
+    Identical uploads share one file (named by its SHA-256 digest); every
+    job that uses it gets its own row, so the file's reference count is the
+    number of rows for its digest. Rows are removed when the job finishes,
+    and files without rows become eligible for garbage collection.
+    """
+    __tablename__ = "upload_refs"
+
+    digest = Column(String, primary_key=True)
+    job_id = Column(String, primary_key=True, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    @classmethod
+    async def add_many(cls, refs: List[Tuple[str, str]]) -> None:
+        """
+        Record references in one multi-row INSERT
+
+        Args:
+            refs: (digest, job_id) pairs
+        """
+        if not refs:
+            return
+        db = SessionLocal()
+        try:
+            rows = [{"digest": digest, "job_id": job_id} for digest, job_id in refs]
+            db.execute(insert(cls), rows)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            raise e
+        finally:
+            db.close()
+
+    @classmethod
+    async def release(cls, job_ids: Iterable[str]) -> int:
+        """
+        Drop the references of finished jobs
+
+        Args:
+            job_ids: Jobs that no longer need their uploads
+
+        Returns:
+            Number of references removed
+        """
+        job_ids = list(job_ids)
+        if not job_ids:
+            return 0
+        db = SessionLocal()
+        try:
+            result = db.execute(delete(cls).where(cls.job_id.in_(job_ids)))
+            db.commit()
+            return result.rowcount
+        except Exception as e:
+            db.rollback()
+            raise e
+        finally:
+            db.close()
+
+    @classmethod
+    def referenced_digests(cls, db) -> Set[str]:
+        """
+        Digests with at least one reference
+
+        Args:
+            db: Open session
+
+        Returns:
+            Set of digests that must not be collected
+        """
+        return {row.digest for row in db.query(cls.digest).distinct().all()}
+
+    def __repr__(self) -> str:
+        return f"<UploadRef(digest={self.digest}, job_id={self.job_id})>"
@@ -1,15 +1,19 @@
 """
 VideoJob database model for tracking video generation jobs
 """
-from sqlalchemy import Column, String, DateTime, Text, JSON, Enum as SQLEnum
+from sqlalchemy import (
+    Column, Integer, String, DateTime, Text, JSON, Enum as SQLEnum, insert, update
+)
 from sqlalchemy.sql import func
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
 from enum import Enum
 import uuid
-from typing import Dict, Any, Optional, ClassVar
+from typing import Dict, Any, List, Optional, Tuple, ClassVar
 
-from app.database import Base, SessionLocal
+from app.database import Base, SessionLocal, mark_written, read_session
+from app.models.video_job_event import VideoJobEvent
+from app.models.video_job_archive import VideoJobArchive
 
 
 class JobStatus(Enum):
@@ -19,6 +23,50 @@ class JobStatus(Enum):
     COMPLETED = "completed"
     FAILED = "failed"
     CANCELLED = "cancelled"
+    
+    def can_transition_to(self, target: 'JobStatus') -> bool:
+        """Whether a job in this status may move to target (staying put is always allowed)"""
+        return target == self or target in _TRANSITIONS[self]
+    
+    @staticmethod
+    def allowed_from(target: 'JobStatus') -> List['JobStatus']:
+        """Statuses a job may be in to move to target"""
+        return [status for status in JobStatus if status.can_transition_to(target)]
+
+
+# Legal status changes; terminal statuses never change again
+_TRANSITIONS = {
+    JobStatus.PENDING: {
+        JobStatus.PROCESSING, JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED
+    },
+    JobStatus.PROCESSING: {JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED},
+    JobStatus.COMPLETED: set(),
+    JobStatus.FAILED: set(),
+    JobStatus.CANCELLED: set(),
+}
+
+# JSON columns written as patches so concurrent writers' keys survive a retry
+JSON_COLUMNS = ('input_data', 'output_data')
+
+# Compare-and-set attempts before giving up on a contended job
+UPDATE_MAX_ATTEMPTS = 5
+
+
+class InvalidTransitionError(ValueError):
+    """Raised when a status change is not allowed from the job's current status"""
+    def __init__(self, job_id: str, current: JobStatus, target: JobStatus):
+        self.job_id = job_id
+        self.current = current
+        self.target = target
+        super().__init__(f"Job {job_id} cannot go from {current.value} to {target.value}")
+
+
+class ConcurrentUpdateError(Exception):
+    """Raised when a compare-and-set update loses to concurrent writers"""
+    def __init__(self, job_id: str, attempts: int):
+        self.job_id = job_id
+        self.attempts = attempts
+        super().__init__(f"Job {job_id} was updated concurrently ({attempts} attempt(s))")
 
 
 class VideoJob(Base):
@@ -41,6 +89,9 @@ class VideoJob(Base):
     # Input type (text or image)
     input_type = Column(String, nullable=False)
     
+    # Parent of a multi-variant request; variants share its enhancement
+    parent_job_id = Column(String, nullable=True, index=True)
+    
     # JSON fields for flexible data storage
     input_data = Column(JSON, nullable=False, default=dict)
     output_data = Column(JSON, nullable=True, default=dict)
@@ -48,6 +99,16 @@ class VideoJob(Base):
     # Error message for failed jobs
     error_message = Column(Text, nullable=True)
     
+    # Current-state projection of the event log (video_job_events)
+    stage = Column(String, nullable=True)
+    provider_job_id = Column(String, nullable=True)
+    output_url = Column(String, nullable=True)
+    progress = Column(Integer, nullable=False, default=0)
+    event_seq = Column(Integer, nullable=False, default=0)
+    
+    # Optimistic concurrency: every write bumps it and checks it (see _cas_write)
+    version = Column(Integer, nullable=False, default=0)
+    
     # Timestamps with auto-update
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
@@ -82,6 +143,7 @@ class VideoJob(Base):
             db.commit()
             db.refresh(job)
             
+            await mark_written([job.id], [job.user_id])
             return job
             
         except Exception as e:
@@ -91,100 +153,365 @@ class VideoJob(Base):
             db.close()
     
     @classmethod
-    async def get(cls, job_id: str) -> Optional['VideoJob']:
+    async def bulk_create(cls, rows: List[Dict[str, Any]]) -> List[str]:
+        """
+        Create many jobs in one transaction with a multi-row INSERT
+        
+        Args:
+            rows: Column values per job; ids are generated when missing
+            
+        Returns:
+            Job ids in the order of rows
+        """
+        if not rows:
+            return []
+        
+        db = SessionLocal()
+        try:
+            rows = [{'id': str(uuid.uuid4()), **row} for row in rows]
+            db.execute(insert(cls), rows)
+            db.commit()
+            job_ids = [row['id'] for row in rows]
+            await mark_written(job_ids, {row['user_id'] for row in rows})
+            return job_ids
+            
+        except Exception as e:
+            db.rollback()
+            raise e
+        finally:
+            db.close()
+    
+    @classmethod
+    async def get(cls, job_id: str, use_replica: bool = False) -> Optional['VideoJob']:
         """
         Get job by ID
         
         Args:
             job_id: Unique job identifier
+            use_replica: Allow a read replica (status reads; pipeline stages need the primary)
             
         Returns:
-            VideoJob instance or None if not found
+            VideoJob instance or None if not found (archived jobs are
+            returned as detached, read-only instances)
         """
-        db = SessionLocal()
+        db = await read_session([job_id]) if use_replica else SessionLocal()
         try:
             job = db.query(cls).filter(cls.id == job_id).first()
             if job:
                 # Detach from session to avoid lazy loading issues
                 db.expunge(job)
-            return job
+                return job
+            
+            # Old terminal jobs live in video_jobs_archive
+            records = VideoJobArchive.load_records(db, [job_id])
+            return cls.from_archive_record(records[0]) if records else None
         except Exception as e:
             raise e
         finally:
             db.close()
     
     @classmethod
-    async def get_by_user(cls, user_id: str, limit: int = 10, offset: int = 0) -> list['VideoJob']:
+    async def get_many(cls, job_ids: List[str], use_replica: bool = False) -> List['VideoJob']:
         """
-        Get jobs by user ID with pagination
+        Get several jobs with a single IN query on the primary key
         
         Args:
-            user_id: User identifier
-            limit: Maximum number of results
-            offset: Number of results to skip
+            job_ids: Job identifiers
+            use_replica: Allow a read replica
             
         Returns:
-            List of VideoJob instances
+            Jobs that exist, in no particular order
+        """
+        if not job_ids:
+            return []
+        
+        db = await read_session(job_ids) if use_replica else SessionLocal()
+        try:
+            jobs = db.query(cls).filter(cls.id.in_(job_ids)).all()
+            for job in jobs:
+                db.expunge(job)
+            
+            found = {job.id for job in jobs}
+            archived = VideoJobArchive.load_records(
+                db, [job_id for job_id in job_ids if job_id not in found]
+            )
+            return jobs + [cls.from_archive_record(record) for record in archived]
+        except Exception as e:
+            raise e
+        finally:
+            db.close()
+    
+    @classmethod
+    async def get_children(cls, parent_job_id: str) -> List['VideoJob']:
+        """
+        Get the variant jobs of a multi-variant parent job
+        
+        Args:
+            parent_job_id: Parent job identifier
+            
+        Returns:
+            List of child VideoJob instances, oldest first (archived
+            children as detached, read-only instances)
         """
         db = SessionLocal()
         try:
             jobs = (
                 db.query(cls)
-                .filter(cls.user_id == user_id)
-                .order_by(cls.created_at.desc())
-                .limit(limit)
-                .offset(offset)
+                .filter(cls.parent_job_id == parent_job_id)
+                .order_by(cls.created_at.asc())
                 .all()
             )
-            # Detach from session
             for job in jobs:
                 db.expunge(job)
-            return jobs
+            
+            # Finished variants of a long-running parent may already be archived
+            archived = (
+                db.query(VideoJobArchive)
+                .filter(VideoJobArchive.parent_job_id == parent_job_id)
+                .all()
+            )
+            jobs += [cls.from_archive_record(row.unpack()) for row in archived]
+            return sorted(jobs, key=lambda job: job.created_at)
         except Exception as e:
             raise e
         finally:
             db.close()
     
-    async def update(self, **kwargs) -> 'VideoJob':
+    @classmethod
+    async def list_unfinished(cls) -> List['VideoJob']:
         """
-        Update job fields
-        
-        Args:
-            **kwargs: Fields to update
-            
+        Get every PENDING or PROCESSING job, oldest first
+
         Returns:
-            Updated VideoJob instance
+            Detached VideoJob instances (unfinished jobs are never archived)
         """
         db = SessionLocal()
         try:
-            # Get fresh instance from database
-            db_job = db.query(VideoJob).filter(VideoJob.id == self.id).first()
-            if not db_job:
-                raise ValueError(f"Job with ID {self.id} not found")
+            jobs = (
+                db.query(cls)
+                .filter(cls.status.in_([JobStatus.PENDING, JobStatus.PROCESSING]))
+                .order_by(cls.created_at.asc())
+                .all()
+            )
+            for job in jobs:
+                db.expunge(job)
+            return jobs
+        finally:
+            db.close()
+
+    @classmethod
+    async def get_by_user(cls, user_id: str, limit: int = 10, offset: int = 0) -> list['VideoJob']:
+        """
+        Get jobs by user ID with pagination
+        
+        Args:
+            user_id: User identifier
+            limit: Maximum number of results
+            offset: Number of results to skip
             
-            # Update fields
-            for key, value in kwargs.items():
-                if hasattr(db_job, key):
-                    setattr(db_job, key, value)
-                    setattr(self, key, value)  # Update local instance too
+        Returns:
+            List of VideoJob instances, archived jobs included
+        """
+        jobs, _ = await cls.list_jobs(user_id=user_id, limit=limit, offset=offset)
+        return jobs
+    
+    @classmethod
+    async def list_jobs(
+        cls,
+        user_id: Optional[str] = None,
+        status: Optional[JobStatus] = None,
+        limit: int = 10,
+        offset: int = 0
+    ) -> Tuple[List['VideoJob'], int]:
+        """
+        List jobs with optional filtering and pagination
+        
+        Live and archived jobs are listed together, newest first. Each
+        table contributes at most offset + limit rows to the merge, and
+        only the archived rows on the page are decompressed.
+        
+        Args:
+            user_id: Filter by user ID
+            status: Filter by job status
+            limit: Maximum number of results
+            offset: Number of results to skip
             
-            # Commit changes
-            db.commit()
-            db.refresh(db_job)
+        Returns:
+            Tuple of (jobs on this page, total matching jobs)
+        """
+        db = await read_session(user_id=user_id)
+        try:
+            query = db.query(cls)
+            archive_query = db.query(VideoJobArchive.id, VideoJobArchive.created_at)
+            if user_id:
+                query = query.filter(cls.user_id == user_id)
+                archive_query = archive_query.filter(VideoJobArchive.user_id == user_id)
+            if status:
+                query = query.filter(cls.status == status)
+                archive_query = archive_query.filter(VideoJobArchive.status == status.value)
+            # Only terminal jobs (no transitions left) are archived
+            search_archive = status is None or not _TRANSITIONS[status]
             
-            # Update local instance with fresh data
-            for key in ['status', 'output_data', 'error_message', 'updated_at']:
-                if hasattr(db_job, key):
-                    setattr(self, key, getattr(db_job, key))
+            total = query.count() + (archive_query.count() if search_archive else 0)
+            jobs = (
+                query.order_by(cls.created_at.desc())
+                .limit(offset + limit)
+                .all()
+            )
+            # Detach from session
+            for job in jobs:
+                db.expunge(job)
             
-            return self
+            archived = (
+                archive_query
+                .order_by(VideoJobArchive.created_at.desc())
+                .limit(offset + limit)
+                .all()
+                if search_archive else []
+            )
+            merged = sorted(
+                [(job.created_at, job) for job in jobs]
+                + [(row.created_at, row.id) for row in archived],
+                key=lambda entry: entry[0],
+                reverse=True
+            )[offset:offset + limit]
             
+            archived_ids = [entry for _, entry in merged if isinstance(entry, str)]
+            records = {
+                record['id']: cls.from_archive_record(record)
+                for record in VideoJobArchive.load_records(db, archived_ids)
+            }
+            page = [records[entry] if isinstance(entry, str) else entry for _, entry in merged]
+            return page, total
         except Exception as e:
-            db.rollback()
             raise e
         finally:
             db.close()
     
+    async def append_event(
+        self,
+        event_type: str,
+        payload: Optional[Dict[str, Any]] = None,
+        **projection
+    ) -> int:
+        """
+        Append an event and update the current-state projection in one transaction
+        
+        Args:
+            event_type: Event type, usually the stage being entered
+            payload: Event details stored on the event row
+            **projection: Column updates (status, stage, provider_job_id, output_url, ...)
+            
+        Returns:
+            Sequence number of the new event
+        """
+        return await self._cas_write(projection, event=(event_type, payload or {}))
+    
+    async def update(self, retry: bool = True, **kwargs) -> 'VideoJob':
+        """
+        Update job fields with a compare-and-set on version
+        
+        Args:
+            retry: Re-apply the change on the fresh row after a conflict;
+                pass False when the values were derived from this instance's
+                state and must not be applied to a newer one
+            **kwargs: Fields to update
+            
+        Returns:
+            Updated VideoJob instance
+            
+        Raises:
+            InvalidTransitionError: If the status change is not allowed
+            ConcurrentUpdateError: On a conflict with retry=False, or when
+                every attempt lost to a concurrent writer
+        """
+        await self._cas_write(kwargs, retry=retry)
+        return self
+    
+    async def _cas_write(
+        self,
+        values: Dict[str, Any],
+        event: Optional[Tuple[str, Dict[str, Any]]] = None,
+        retry: bool = True
+    ) -> int:
+        """
+        Write column values (and optionally an event) if nobody else wrote first
+        
+        The UPDATE only matches the row at the version this instance was
+        loaded at, so no lock is held between read and write. On a
+        conflict the instance is refreshed, the status transition is
+        re-checked and JSON columns are re-applied as a patch of the keys
+        this caller changed.
+        
+        Returns:
+            Sequence number of the new event (the current one without event)
+        """
+        values = {key: value for key, value in values.items() if hasattr(VideoJob, key)}
+        patches = {}
+        for key in JSON_COLUMNS:
+            if isinstance(values.get(key), dict):
+                before = getattr(self, key) or {}
+                patches[key] = (
+                    {k: v for k, v in values[key].items() if k not in before or before[k] != v},
+                    set(before) - set(values[key])
+                )
+        
+        for attempt in range(1, UPDATE_MAX_ATTEMPTS + 1):
+            target = values.get('status')
+            if target is not None and not self.status.can_transition_to(target):
+                raise InvalidTransitionError(self.id, self.status, target)
+            
+            db = SessionLocal()
+            try:
+                extra = {'event_seq': VideoJob.event_seq + 1} if event else {}
+                row = db.execute(
+                    update(VideoJob)
+                    .where(VideoJob.id == self.id, VideoJob.version == self.version)
+                    .values(version=VideoJob.version + 1, **extra, **values)
+                    .returning(VideoJob.version, VideoJob.event_seq, VideoJob.updated_at)
+                ).first()
+                
+                if row is None:
+                    db.rollback()
+                    current = db.query(VideoJob).filter(VideoJob.id == self.id).first()
+                    if current is None:
+                        raise ValueError(f"Job with ID {self.id} not found")
+                    # Someone else wrote first: catch up and rebuild the change
+                    for column in VideoJob.__table__.columns:
+                        setattr(self, column.name, getattr(current, column.name))
+                    if not retry:
+                        raise ConcurrentUpdateError(self.id, attempt)
+                    for key, (changed, removed) in patches.items():
+                        stored = getattr(self, key) or {}
+                        merged = {k: v for k, v in stored.items() if k not in removed}
+                        merged.update(changed)
+                        values[key] = merged
+                    continue
+                
+                if event:
+                    event_type, payload = event
+                    db.add(VideoJobEvent(
+                        job_id=self.id, seq=row.event_seq, type=event_type, payload=payload
+                    ))
+                db.commit()
+                
+            except Exception as e:
+                db.rollback()
+                raise e
+            finally:
+                db.close()
+            
+            # Update local instance
+            for key, value in values.items():
+                setattr(self, key, value)
+            self.version = row.version
+            self.event_seq = row.event_seq
+            self.updated_at = row.updated_at
+            await self._after_write()
+            return row.event_seq
+        
+        raise ConcurrentUpdateError(self.id, UPDATE_MAX_ATTEMPTS)
+    
     async def delete(self) -> bool:
         """
         Delete this job from database
@@ -198,6 +525,8 @@ class VideoJob(Base):
             if db_job:
                 db.delete(db_job)
                 db.commit()
+                from app.services import status_cache
+                await status_cache.invalidate(self.id)
                 return True
             return False
         except Exception as e:
@@ -206,6 +535,49 @@ class VideoJob(Base):
         finally:
             db.close()
     
+    async def _after_write(self) -> None:
+        """Write the committed state to the status cache and pin reads to the primary"""
+        # Imported here: status_cache imports this module
+        from app.services import status_cache
+        await status_cache.set_many([self])
+        await mark_written([self.id])
+    
+    def archive_record(self) -> Dict[str, Any]:
+        """
+        JSON-safe values of every column, for video_jobs_archive
+        
+        Returns:
+            Dictionary of column values
+        """
+        record = {}
+        for column in VideoJob.__table__.columns:
+            value = getattr(self, column.name)
+            if isinstance(value, JobStatus):
+                value = value.value
+            elif isinstance(value, datetime):
+                value = value.isoformat()
+            record[column.name] = value
+        return record
+    
+    @classmethod
+    def from_archive_record(cls, record: Dict[str, Any]) -> 'VideoJob':
+        """
+        Rebuild a detached job from its archive record
+        
+        Args:
+            record: Values produced by archive_record()
+            
+        Returns:
+            VideoJob instance that is not attached to any session
+        """
+        values = dict(record)
+        values['status'] = JobStatus(values['status'])
+        for key in ('created_at', 'updated_at'):
+            if values.get(key):
+                values[key] = datetime.fromisoformat(values[key])
+        known = {column.name for column in cls.__table__.columns}
+        return cls(**{key: value for key, value in values.items() if key in known})
+    
     def to_dict(self) -> Dict[str, Any]:
         """
         Convert job to dictionary for API responses
@@ -218,6 +590,12 @@ class VideoJob(Base):
             'user_id': self.user_id,
             'status': self.status.value if isinstance(self.status, JobStatus) else self.status,
             'input_type': self.input_type,
+            'parent_job_id': self.parent_job_id,
+            'stage': self.stage,
+            'provider_job_id': self.provider_job_id,
+            'output_url': self.output_url,
+            'progress': self.progress,
+            'version': self.version,
             'input_data': self.input_data,
             'output_data': self.output_data,
             'error_message': self.error_message,
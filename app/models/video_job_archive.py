@@ -0,0 +1,71 @@
+"""
+Cold storage of old terminal video generation jobs
+"""
+import json
+import zlib
+from sqlalchemy import Column, String, DateTime, LargeBinary
+from sqlalchemy.sql import func
+from typing import Dict, Any, List
+
+from app.database import Base
+
+
+class VideoJobArchive(Base):
+    """
+    Compressed copy of a job moved out of video_jobs
+
+    Only the columns needed to find a job stay queryable (by id, user,
+    status, parent and age); everything else (input/output data, error,
+    timestamps) is one zlib-compressed JSON record. Rows are written by
+    app.services.archiver and never change.
+    """
+    __tablename__ = "video_jobs_archive"
+
+    id = Column(String, primary_key=True)
+    user_id = Column(String, nullable=False, index=True)
+    parent_job_id = Column(String, nullable=True, index=True)
+    status = Column(String, nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    data = Column(LargeBinary, nullable=False)
+
+    @staticmethod
+    def pack(record: Dict[str, Any]) -> bytes:
+        """
+        Compress a job record
+
+        Args:
+            record: JSON-safe column values of the job
+
+        Returns:
+            zlib-compressed JSON
+        """
+        return zlib.compress(json.dumps(record, separators=(",", ":")).encode("utf-8"))
+
+    def unpack(self) -> Dict[str, Any]:
+        """
+        Decompress the job record
+
+        Returns:
+            Column values of the job as they were when archived
+        """
+        return json.loads(zlib.decompress(self.data).decode("utf-8"))
+
+    @classmethod
+    def load_records(cls, db, job_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Look up archived jobs by id
+
+        Args:
+            db: Open session
+            job_ids: Job identifiers
+
+        Returns:
+            Records of the archived jobs found
+        """
+        if not job_ids:
+            return []
+        return [row.unpack() for row in db.query(cls).filter(cls.id.in_(job_ids)).all()]
+
+    def __repr__(self) -> str:
+        return f"<VideoJobArchive(id={self.id}, status={self.status}, user_id={self.user_id})>"
@@ -0,0 +1,108 @@
+"""
+Append-only event log of video generation jobs
+"""
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Index, UniqueConstraint
+from sqlalchemy.sql import func
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from app.database import Base, read_session
+
+
+class VideoJobEvent(Base):
+    """
+    One state change of a job
+
+    Stages append events with cheap inserts; video_jobs only keeps the
+    current-state projection. seq numbers the events of a job from 1.
+    """
+    __tablename__ = "video_job_events"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    job_id = Column(String, nullable=False)
+    seq = Column(Integer, nullable=False)
+    type = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False, default=dict)
+    ts = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('job_id', 'seq', name='uq_video_job_events_job_seq'),
+        Index('ix_video_job_events_ts', 'ts'),
+        Index('ix_video_job_events_type_ts', 'type', 'ts'),
+    )
+
+    @classmethod
+    async def for_job(cls, job_id: str) -> List['VideoJobEvent']:
+        """
+        Get the history of a job
+
+        Args:
+            job_id: Job identifier
+
+        Returns:
+            Events in sequence order
+        """
+        db = await read_session([job_id])
+        try:
+            events = db.query(cls).filter(cls.job_id == job_id).order_by(cls.seq.asc()).all()
+            for event in events:
+                db.expunge(event)
+            return events
+        except Exception as e:
+            raise e
+        finally:
+            db.close()
+
+    @classmethod
+    async def in_range(
+        cls,
+        since: datetime,
+        until: Optional[datetime] = None,
+        event_type: Optional[str] = None,
+        limit: int = 1000
+    ) -> List['VideoJobEvent']:
+        """
+        Get events of all jobs in a time range
+
+        Args:
+            since: Start of the range (inclusive)
+            until: End of the range (exclusive), open-ended if None
+            event_type: Only events of this type
+            limit: Maximum number of events
+
+        Returns:
+            Events ordered by time
+        """
+        db = await read_session()
+        try:
+            query = db.query(cls).filter(cls.ts >= since)
+            if until:
+                query = query.filter(cls.ts < until)
+            if event_type:
+                query = query.filter(cls.type == event_type)
+            events = query.order_by(cls.ts.asc(), cls.id.asc()).limit(limit).all()
+            for event in events:
+                db.expunge(event)
+            return events
+        except Exception as e:
+            raise e
+        finally:
+            db.close()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert event to dictionary for API responses
+
+        Returns:
+            Dictionary representation of the event
+        """
+        return {
+            'job_id': self.job_id,
+            'seq': self.seq,
+            'type': self.type,
+            'payload': self.payload,
+            'ts': self.ts.isoformat() if self.ts else None
+        }
+
+    def __repr__(self) -> str:
+        return f"<VideoJobEvent(job_id={self.job_id}, seq={self.seq}, type={self.type})>"
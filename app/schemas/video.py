@@ -49,6 +49,45 @@ class CameraMovement(str, Enum):
     TRACKING = "tracking"
 
 
+class CacheMode(str, Enum):
+    """Result cache behaviour for a request"""
+    USE = "use"
+    BYPASS = "bypass"
+
+
+class VideoVariant(BaseModel):
+    """Per-variant overrides for multi-variant generation"""
+    style: Optional[VideoStyle] = Field(default=None, description="Visual style of this variant")
+    quality: Optional[QualityLevel] = Field(
+        default=None,
+        description="Quality level of this variant"
+    )
+    seed: Optional[int] = Field(default=None, ge=0, description="Provider seed for this variant")
+    motion_intensity: Optional[MotionIntensity] = Field(
+        default=None,
+        description="Motion intensity (image input)"
+    )
+    camera_movement: Optional[CameraMovement] = Field(
+        default=None,
+        description="Camera movement (image input)"
+    )
+    
+    def style_overrides(self) -> Dict[str, Any]:
+        """Overrides for text-to-video style params"""
+        overrides = {"style": self.style, "quality": self.quality, "seed": self.seed}
+        return {key: value for key, value in overrides.items() if value is not None}
+    
+    def motion_overrides(self) -> Dict[str, Any]:
+        """Overrides for image-to-video motion params"""
+        overrides = {
+            "intensity": self.motion_intensity,
+            "camera_movement": self.camera_movement,
+            "quality": self.quality,
+            "seed": self.seed
+        }
+        return {key: value for key, value in overrides.items() if value is not None}
+
+
 class VideoGenerationRequest(BaseModel):
     """Request schema for text-to-video generation"""
     prompt: str = Field(..., min_length=1, max_length=1000, description="Text prompt for video generation")
@@ -57,6 +96,18 @@ class VideoGenerationRequest(BaseModel):
     style: Optional[VideoStyle] = Field(default=None, description="Visual style for generation")
     quality: QualityLevel = Field(default=QualityLevel.HIGH, description="Video quality level")
     user_id: Optional[str] = Field(default=None, description="User identifier")
+    public: bool = Field(
+        default=False,
+        description="Share identical in-flight generations with other users"
+    )
+    cache: CacheMode = Field(
+        default=CacheMode.USE,
+        description="'bypass' always generates a fresh video"
+    )
+    variants: Optional[List[VideoVariant]] = Field(
+        default=None,
+        description="Generate one video per variant from a single enhancement"
+    )
     
     @validator('prompt')
     def validate_prompt(cls, v):
@@ -73,6 +124,18 @@ class VideoFromImageRequest(BaseModel):
     motion_intensity: MotionIntensity = Field(default=MotionIntensity.MEDIUM, description="Motion intensity")
     camera_movement: CameraMovement = Field(default=CameraMovement.STATIC, description="Camera movement type")
     user_id: Optional[str] = Field(default=None, description="User identifier")
+    public: bool = Field(
+        default=False,
+        description="Share identical in-flight generations with other users"
+    )
+    cache: CacheMode = Field(
+        default=CacheMode.USE,
+        description="'bypass' always generates a fresh video"
+    )
+    variants: Optional[List[VideoVariant]] = Field(
+        default=None,
+        description="Generate one video per variant from a single enhancement"
+    )
 
 
 class VideoGenerationResponse(BaseModel):
@@ -81,9 +144,34 @@ class VideoGenerationResponse(BaseModel):
     status: str = Field(..., description="Current job status")
     message: str = Field(..., description="Status message")
     estimated_time: Optional[int] = Field(None, description="Estimated completion time in seconds")
+    child_job_ids: Optional[List[str]] = Field(
+        None,
+        description="Variant job identifiers of a multi-variant request"
+    )
     created_at: datetime = Field(default_factory=datetime.utcnow, description="Job creation timestamp")
 
 
+class BulkVideoGenerationRequest(BaseModel):
+    """Request schema for bulk text-to-video generation"""
+    items: List[VideoGenerationRequest] = Field(
+        ...,
+        min_length=1,
+        description="Text-to-video requests"
+    )
+    user_id: Optional[str] = Field(default=None, description="User for items that do not set one")
+
+
+class BulkVideoGenerationResponse(BaseModel):
+    """Response schema for bulk generation requests"""
+    job_ids: List[str] = Field(..., description="Job identifiers in request order")
+    status: str = Field(..., description="Initial status of every job")
+    message: str = Field(..., description="Status message")
+    created_at: datetime = Field(
+        default_factory=datetime.utcnow,
+        description="Submission timestamp"
+    )
+
+
 class VideoJobStatus(BaseModel):
     """Schema for video job status"""
     job_id: str = Field(..., description="Unique job identifier")
@@ -97,6 +185,11 @@ class VideoJobStatus(BaseModel):
     metadata: Optional[Dict[str, Any]] = Field(default_factory=dict, description="Additional metadata")
 
 
+class JobStatusBatchRequest(BaseModel):
+    """Request schema for batch status lookups"""
+    job_ids: List[str] = Field(..., min_length=1, description="Job identifiers to look up")
+
+
 class StoryboardRequest(BaseModel):
     """Request schema for storyboard generation"""
     script: str = Field(..., min_length=10, max_length=5000, description="Video script or description")
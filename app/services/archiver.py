@@ -0,0 +1,124 @@
+"""
+Archival of old terminal jobs
+
+Completed, failed and cancelled jobs are rarely read once they are a few
+days old, yet they keep growing video_jobs and the user_id/status indexes
+every hot query uses. The archiver moves them, ARCHIVE_BATCH_SIZE at a
+time, into video_jobs_archive (id, user_id and status stay queryable, the
+rest is compressed). Each batch is its own short transaction so the hot
+table is never locked for long. VideoJob.get/get_many, get_children and
+list_jobs fall through to the archive, so status lookups and listings
+keep working.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, insert
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.database import SessionLocal
+from app.models.video_job import JobStatus, VideoJob
+from app.models.video_job_archive import VideoJobArchive
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = [JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED]
+
+
+def archive_batch(cutoff: datetime, batch_size: int) -> int:
+    """
+    Move one batch of terminal jobs last updated before cutoff
+
+    On PostgreSQL and MySQL the batch is claimed with FOR UPDATE SKIP
+    LOCKED, so concurrent archivers take different rows. SQLite has no
+    row locks and SQLAlchemy drops the clause there: concurrent runs may
+    pick the same rows, and the loser fails on the archive primary key and
+    rolls back. Run a single archiver on SQLite.
+
+    Args:
+        cutoff: Jobs updated after this stay in video_jobs
+        batch_size: Maximum number of jobs to move
+
+    Returns:
+        Number of jobs moved
+    """
+    db = SessionLocal()
+    try:
+        # SKIP LOCKED lets concurrent archivers (or a slow run) work on different rows
+        jobs = (
+            db.query(VideoJob)
+            .filter(VideoJob.status.in_(TERMINAL_STATUSES), VideoJob.updated_at < cutoff)
+            .order_by(VideoJob.updated_at.asc())
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        if not jobs:
+            return 0
+
+        db.execute(insert(VideoJobArchive), [
+            {
+                "id": job.id,
+                "user_id": job.user_id,
+                "parent_job_id": job.parent_job_id,
+                "status": job.status.value,
+                "created_at": job.created_at,
+                "data": VideoJobArchive.pack(job.archive_record()),
+            }
+            for job in jobs
+        ])
+        # Terminal statuses are final, so the rows copied above are exactly the rows removed
+        db.execute(
+            delete(VideoJob)
+            .where(VideoJob.id.in_([job.id for job in jobs]))
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return len(jobs)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def archive_terminal_jobs(max_batches: int = None) -> int:
+    """
+    Archive terminal jobs older than ARCHIVE_AFTER in small batches
+
+    Args:
+        max_batches: Upper bound of batches in this run (ARCHIVE_MAX_BATCHES)
+
+    Returns:
+        Number of jobs moved
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.ARCHIVE_AFTER)
+    batch_size = settings.ARCHIVE_BATCH_SIZE
+    loop = asyncio.get_running_loop()
+
+    total = 0
+    for _ in range(max_batches or settings.ARCHIVE_MAX_BATCHES):
+        moved = await loop.run_in_executor(None, archive_batch, cutoff, batch_size)
+        total += moved
+        if moved < batch_size:
+            break
+        # Let hot-path writers in between batches
+        await asyncio.sleep(0.1)
+
+    if total:
+        metrics.inc("jobs_archived_total", total)
+        logger.info(f"Archived {total} terminal jobs last updated before {cutoff.isoformat()}")
+    return total
+
+
+async def run_archiver(interval: float = None) -> None:
+    """Archive old jobs forever (used by the in-process pipeline)"""
+    interval = interval or settings.ARCHIVE_INTERVAL
+    while True:
+        try:
+            await archive_terminal_jobs()
+        except Exception as e:
+            logger.error(f"Job archival failed: {str(e)}")
+        await asyncio.sleep(interval)
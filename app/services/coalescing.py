@@ -0,0 +1,107 @@
+"""
+Single-flight coalescing of identical generation requests
+
+A double click or a client retry should not pay for a second Gemini
+enhancement and Kling job. Each request is reduced to a canonical hash of
+(user, input, params); the first request takes a Redis lease holding its
+job id and later identical requests attach to that job until it finishes.
+Requests marked public leave the user out of the hash so identical public
+prompts coalesce across users.
+"""
+import hashlib
+import json
+import logging
+from typing import Any, Dict, Optional
+
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.redis_client import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+LEASE_PREFIX = "singleflight:"
+
+# Delete the lease only if it still belongs to ARGV[1]
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def request_key(user_id: Optional[str], input_type: str, payload: Dict[str, Any]) -> str:
+    """
+    Canonical hash of a generation request
+
+    Args:
+        user_id: Requesting user, or None to coalesce across users
+        input_type: "text" or "image"
+        payload: Input and parameters; prompts should already be normalized
+
+    Returns:
+        Hex digest identifying identical requests
+    """
+    canonical = json.dumps(
+        {"user": user_id, "type": input_type, "input": payload},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def normalize_prompt(prompt: Optional[str]) -> Optional[str]:
+    """Collapse whitespace so trivially different prompts hash the same"""
+    return " ".join(prompt.split()) if prompt else prompt
+
+
+async def claim(key: str, job_id: str) -> Optional[str]:
+    """
+    Take the lease for a request or find the job already running it
+
+    Args:
+        key: Request key from request_key
+        job_id: Job id the caller will create if it wins the lease
+
+    Returns:
+        Id of the in-flight job to attach to, or None if the caller owns the lease
+    """
+    if not settings.COALESCING_ENABLED:
+        return None
+
+    client = get_async_redis()
+    lease = LEASE_PREFIX + key
+    try:
+        if await client.set(lease, job_id, nx=True, ex=settings.COALESCING_LEASE_TTL):
+            return None
+        existing = await client.get(lease)
+    except RedisError as e:
+        # Without Redis every request simply runs on its own
+        logger.warning(f"Coalescing unavailable: {str(e)}")
+        return None
+
+    if existing is None:
+        # Lease expired between SET and GET; just run this request
+        return None
+    metrics.inc("coalesced_requests_total")
+    return existing.decode("utf-8")
+
+
+async def release(key: str, job_id: str) -> None:
+    """Drop the lease of a finished job so new requests start a fresh one"""
+    try:
+        script = get_async_redis().register_script(RELEASE_SCRIPT)
+        await script(keys=[LEASE_PREFIX + key], args=[job_id])
+    except RedisError as e:
+        # The lease expires after COALESCING_LEASE_TTL anyway
+        logger.warning(f"Could not release coalescing lease for job {job_id}: {str(e)}")
+
+
+async def release_job(job) -> None:
+    """Release the lease held by a job, if it took one"""
+    key = (job.input_data or {}).get("coalesce_key")
+    if key:
+        await release(key, job.id)
@@ -0,0 +1,281 @@
+"""
+Write-behind group commit of job state changes
+
+A status sweep touches hundreds of jobs per second; giving each change its
+own session and commit means hundreds of tiny transactions (and lock
+contention on SQLite). The writer queues changes in memory and flushes
+every JOB_WRITER_FLUSH_MS or JOB_WRITER_MAX_BATCH writes in one
+transaction: one compare-and-set UPDATE ... RETURNING per stage write,
+one executemany UPDATE for progress ticks and one multi-row INSERT of
+events.
+
+Stage writes carry the version the caller loaded the job at and only
+apply if nobody wrote in between, exactly like VideoJob.update; callers
+await the flush and get the committed version back, or the conflict.
+Progress ticks are monotonic, unversioned and fire and forget.
+"""
+import asyncio
+import logging
+import weakref
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, insert, or_, update
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.database import SessionLocal, mark_written
+from app.models.video_job import ConcurrentUpdateError, InvalidTransitionError, JobStatus, VideoJob
+from app.models.video_job_event import VideoJobEvent
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = [JobStatus.PENDING, JobStatus.PROCESSING]
+
+
+@dataclass
+class _StageWrite:
+    """One compare-and-set write waiting for the next flush"""
+    job_id: str
+    version: int
+    projection: Dict[str, Any]
+    events: List[Tuple[str, Dict[str, Any]]] = field(default_factory=list)
+    waiter: Optional[asyncio.Future] = None
+
+
+class JobWriter:
+    """
+    Per-event-loop buffer of job writes flushed with group commits
+    """
+
+    def __init__(self, flush_interval_ms: int = None, max_batch: int = None):
+        """
+        Args:
+            flush_interval_ms: Longest a write waits before being flushed
+            max_batch: Number of pending writes that triggers an immediate flush
+        """
+        self.flush_interval = (flush_interval_ms or settings.JOB_WRITER_FLUSH_MS) / 1000
+        self.max_batch = max_batch or settings.JOB_WRITER_MAX_BATCH
+        self._writes: List[_StageWrite] = []
+        self._progress: Dict[str, int] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._lock = asyncio.Lock()
+        self._flushes: set = set()
+
+    async def record(
+        self,
+        job_id: str,
+        version: int,
+        event_type: Optional[str] = None,
+        payload: Optional[Dict[str, Any]] = None,
+        **projection
+    ) -> Any:
+        """
+        Queue a change of a job loaded at version and wait for its commit
+
+        Writes of one job apply in the order they were recorded, each
+        against the version it was made from, so a second write made from
+        the same stale state loses like any other concurrent writer.
+
+        Args:
+            job_id: Job being changed
+            version: Version the caller's copy of the job was loaded at
+            event_type: Event to append to video_job_events, if any
+            payload: Event payload
+            **projection: Column updates
+
+        Returns:
+            Committed row with the new version, event_seq and updated_at
+
+        Raises:
+            InvalidTransitionError: If the status change is not allowed from
+                the job's current status
+            ConcurrentUpdateError: If the job was written since version
+            ValueError: If the job does not exist
+        """
+        waiter = asyncio.get_running_loop().create_future()
+        self._writes.append(_StageWrite(
+            job_id, version, projection, [(event_type, payload or {})] if event_type else [], waiter
+        ))
+        self._schedule()
+        return await waiter
+
+    def record_progress(self, job_id: str, progress: int) -> None:
+        """
+        Queue a provider progress update (fire and forget)
+
+        Progress only ever moves forward and only on active jobs, so it is
+        applied without a version check and does not bump version: a tick
+        can neither undo a concurrent cancel nor make a stage write conflict.
+
+        Args:
+            job_id: Job being polled
+            progress: Progress percentage
+        """
+        if job_id in self._progress:
+            metrics.inc("job_writer_coalesced_total")
+        self._progress[job_id] = max(progress, self._progress.get(job_id, 0))
+        self._schedule()
+
+    async def flush(self) -> None:
+        """Commit everything queued so far (call before the event loop ends)"""
+        self._cancel_timer()
+        await self._flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    def _schedule(self) -> None:
+        if len(self._writes) + len(self._progress) >= self.max_batch:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(
+                self.flush_interval, self._start_flush
+            )
+
+    def _cancel_timer(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _start_flush(self) -> None:
+        self._cancel_timer()
+        task = asyncio.ensure_future(self._flush())
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self) -> None:
+        # One flush at a time keeps the writes of a job in order
+        async with self._lock:
+            if not self._writes and not self._progress:
+                return
+            writes, self._writes = self._writes, []
+            progress, self._progress = self._progress, {}
+            metrics.set_gauge("job_writer_last_batch_size", len(writes) + len(progress))
+
+            try:
+                results = await asyncio.get_running_loop().run_in_executor(
+                    None, self._write, writes, progress
+                )
+            except Exception as e:
+                logger.error(
+                    f"Job writer flush of {len(writes) + len(progress)} writes failed: {str(e)}"
+                )
+                for write in writes:
+                    if not write.waiter.done():
+                        write.waiter.set_exception(e)
+                return
+
+            metrics.inc("job_writer_commits_total")
+            metrics.inc("job_writer_rows_total", len(writes) + len(progress))
+            # Open the read-your-writes window before callers move on
+            committed = {
+                write.job_id
+                for write, result in zip(writes, results)
+                if not isinstance(result, Exception)
+            }
+            await mark_written(committed | set(progress))
+            for write, result in zip(writes, results):
+                if write.waiter.done():
+                    continue
+                if isinstance(result, Exception):
+                    metrics.inc("job_writer_conflicts_total")
+                    write.waiter.set_exception(result)
+                else:
+                    write.waiter.set_result(result)
+
+    @staticmethod
+    def _write(writes: List[_StageWrite], progress: Dict[str, int]) -> List[Any]:
+        """
+        Apply a batch in one transaction
+
+        Returns:
+            Per stage write, the committed (version, event_seq, updated_at)
+            row or the error that rejected it
+        """
+        db = SessionLocal()
+        try:
+            results: List[Any] = []
+            events = []
+            for write in writes:
+                # Reserve a block of sequence numbers for this write's events
+                count = len(write.events)
+                statement = update(VideoJob).where(
+                    VideoJob.id == write.job_id, VideoJob.version == write.version
+                )
+                target = write.projection.get("status")
+                if target is not None:
+                    statement = statement.where(VideoJob.status.in_(JobStatus.allowed_from(target)))
+                row = db.execute(
+                    statement
+                    .values(
+                        event_seq=VideoJob.event_seq + count,
+                        version=VideoJob.version + 1,
+                        **write.projection
+                    )
+                    .returning(VideoJob.version, VideoJob.event_seq, VideoJob.updated_at)
+                ).first()
+                if row is None:
+                    current = db.query(VideoJob.status).filter(VideoJob.id == write.job_id).first()
+                    if current is None:
+                        results.append(ValueError(f"Job with ID {write.job_id} not found"))
+                    elif target is not None and not current.status.can_transition_to(target):
+                        results.append(InvalidTransitionError(write.job_id, current.status, target))
+                    else:
+                        results.append(ConcurrentUpdateError(write.job_id, 1))
+                    continue
+                results.append(row)
+                first_seq = row.event_seq - count + 1
+                events.extend(
+                    {
+                        "job_id": write.job_id,
+                        "seq": first_seq + offset,
+                        "type": event_type,
+                        "payload": payload
+                    }
+                    for offset, (event_type, payload) in enumerate(write.events)
+                )
+
+            if progress:
+                # One executemany UPDATE (bind names may not equal column names; an
+                # expanding IN is not allowed with executemany, hence the OR)
+                table = VideoJob.__table__
+                db.execute(
+                    update(table)
+                    .where(
+                        table.c.id == bindparam("_id"),
+                        table.c.progress < bindparam("_progress"),
+                        or_(*(table.c.status == status for status in ACTIVE_STATUSES))
+                    )
+                    .values(progress=bindparam("_progress")),
+                    [{"_id": job_id, "_progress": value} for job_id, value in progress.items()]
+                )
+            if events:
+                db.execute(insert(VideoJobEvent), events)
+            db.commit()
+            return results
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+# One writer per event loop, like the async Redis clients
+_writers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, JobWriter]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_job_writer() -> JobWriter:
+    """
+    Get the job writer bound to the running event loop
+
+    Returns:
+        JobWriter instance
+    """
+    loop = asyncio.get_running_loop()
+    writer = _writers.get(loop)
+    if writer is None:
+        writer = JobWriter()
+        _writers[loop] = writer
+    return writer
@@ -0,0 +1,72 @@
+"""
+Media helpers for the download and post-processing stages
+"""
+import logging
+from pathlib import Path
+
+import aiofiles
+import cv2
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+async def download_file(url: str, destination: Path, timeout: float = 300.0) -> int:
+    """
+    Stream a remote file to disk
+
+    Args:
+        url: Source URL
+        destination: Local file path
+        timeout: Overall timeout in seconds
+
+    Returns:
+        Number of bytes written
+    """
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    partial = destination.with_suffix(destination.suffix + ".part")
+    size = 0
+
+    async with httpx.AsyncClient(timeout=timeout, follow_redirects=True) as client:
+        async with client.stream("GET", url) as response:
+            response.raise_for_status()
+            async with aiofiles.open(partial, "wb") as f:
+                async for chunk in response.aiter_bytes(1024 * 1024):
+                    await f.write(chunk)
+                    size += len(chunk)
+
+    # Only expose complete files under the final name
+    partial.replace(destination)
+    return size
+
+
+def extract_thumbnail(video_path: Path, thumbnail_path: Path, max_width: int = 640) -> bool:
+    """
+    Save a JPEG thumbnail from the middle frame of a video (CPU bound)
+
+    Args:
+        video_path: Local video file
+        thumbnail_path: Output JPEG path
+        max_width: Maximum thumbnail width in pixels
+
+    Returns:
+        True if a thumbnail was written
+    """
+    capture = cv2.VideoCapture(str(video_path))
+    try:
+        frame_count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        if frame_count > 0:
+            capture.set(cv2.CAP_PROP_POS_FRAMES, frame_count // 2)
+        ok, frame = capture.read()
+        if not ok:
+            logger.warning(f"Could not read a frame from {video_path}")
+            return False
+
+        height, width = frame.shape[:2]
+        if width > max_width:
+            frame = cv2.resize(frame, (max_width, int(height * max_width / width)))
+
+        thumbnail_path.parent.mkdir(parents=True, exist_ok=True)
+        return bool(cv2.imwrite(str(thumbnail_path), frame))
+    finally:
+        capture.release()
@@ -0,0 +1,326 @@
+"""
+Staged video generation pipeline
+
+A job moves through explicit stages:
+
+    prepare (enhance/analyze) -> submit -> await_provider -> download -> postprocess
+
+Each stage has its own queue and concurrency so a slow Gemini stage cannot
+block downloads. With PIPELINE_BACKEND=celery every stage is a Celery task
+on its own queue (scaled by dedicated workers); with "inprocess" the API
+process runs one asyncio worker pool per stage.
+"""
+import asyncio
+import logging
+from enum import Enum
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class Stage(str, Enum):
+    """Pipeline stages in execution order"""
+    PREPARE = "prepare"
+    SUBMIT = "submit"
+    AWAIT_PROVIDER = "await_provider"
+    DOWNLOAD = "download"
+    POSTPROCESS = "postprocess"
+
+
+# Celery queue and task per stage
+STAGE_QUEUES: Dict[Stage, str] = {
+    Stage.PREPARE: "video_prepare",
+    Stage.SUBMIT: "video_submit",
+    Stage.AWAIT_PROVIDER: "status_check",
+    Stage.DOWNLOAD: "video_download",
+    Stage.POSTPROCESS: "video_postprocess",
+}
+
+STAGE_TASKS: Dict[Stage, str] = {
+    Stage.PREPARE: "app.tasks.video_tasks.prepare_job",
+    Stage.SUBMIT: "app.tasks.video_tasks.submit_job",
+    Stage.AWAIT_PROVIDER: "app.tasks.video_tasks.check_kling_status",
+    Stage.DOWNLOAD: "app.tasks.video_tasks.download_output",
+    Stage.POSTPROCESS: "app.tasks.video_tasks.postprocess_output",
+}
+
+
+def stage_concurrency(stage: Stage) -> int:
+    """Configured worker count for a stage"""
+    return {
+        Stage.PREPARE: settings.STAGE_PREPARE_CONCURRENCY,
+        Stage.SUBMIT: settings.STAGE_SUBMIT_CONCURRENCY,
+        Stage.AWAIT_PROVIDER: settings.STAGE_AWAIT_CONCURRENCY,
+        Stage.DOWNLOAD: settings.STAGE_DOWNLOAD_CONCURRENCY,
+        Stage.POSTPROCESS: settings.STAGE_POSTPROCESS_CONCURRENCY,
+    }[stage]
+
+
+# Result of running a stage: the next stage and how long to wait before it
+NextStage = Optional[Tuple[Stage, float]]
+
+
+async def run_stage(
+    generator,
+    stage: Stage,
+    job_id: str,
+    attempt: int = 0,
+    first_failed_at: Optional[float] = None
+) -> NextStage:
+    """
+    Run one stage for a job and report what should happen next
+
+    Transient failures are handed to the delayed retry scheduler; everything
+    else (or running out of retries) fails the job.
+
+    Args:
+        generator: VideoGenerator providing the stage handlers
+        stage: Stage to run
+        job_id: Job being processed
+        attempt: Number of retries of this stage so far
+        first_failed_at: When this stage first failed (epoch seconds)
+
+    Returns:
+        (next stage, delay in seconds) or None when the job is finished
+    """
+    from app.models.video_job import InvalidTransitionError
+    from app.services import retry_scheduler
+
+    handlers = {
+        Stage.PREPARE: generator.prepare,
+        Stage.SUBMIT: generator.submit,
+        Stage.AWAIT_PROVIDER: generator.poll,
+        Stage.DOWNLOAD: generator.download,
+        Stage.POSTPROCESS: generator.postprocess,
+    }
+    metrics.inc("pipeline_stage_runs_total", stage=stage.value)
+    try:
+        return await handlers[stage](job_id)
+    except InvalidTransitionError as e:
+        # A concurrent writer (usually a cancellation) already finished the job
+        logger.info(f"Stage {stage.value} stopped for job {job_id}: {str(e)}")
+        return None
+    except Exception as e:
+        logger.error(f"Stage {stage.value} failed for job {job_id}: {str(e)}")
+        metrics.inc("pipeline_stage_failures_total", stage=stage.value)
+        if retry_scheduler.is_transient_error(e, stage.value):
+            try:
+                if await retry_scheduler.schedule_retry(
+                    stage.value, job_id, attempt + 1, str(e), first_failed_at
+                ):
+                    return None
+            except Exception as schedule_error:
+                logger.error(f"Could not schedule retry for job {job_id}: {str(schedule_error)}")
+        await generator.fail(job_id, f"{stage.value} failed: {str(e)}")
+        return None
+
+
+class InProcessPipeline:
+    """
+    One asyncio queue and worker pool per stage inside the current process
+    """
+
+    def __init__(self, generator):
+        self.generator = generator
+        self.queues: Dict[Stage, asyncio.Queue] = {}
+        self._workers: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        """Start the worker pools, resume unfinished jobs, then the retry pump and housekeeping"""
+        from app.services.archiver import run_archiver
+        from app.services.retry_scheduler import run_pump
+        from app.services.storage import run_collector
+
+        for stage in Stage:
+            self.queues[stage] = asyncio.Queue()
+            for _ in range(stage_concurrency(stage)):
+                self._workers.append(asyncio.create_task(self._worker(stage)))
+        if settings.PIPELINE_RECOVERY_ENABLED:
+            await self.recover()
+        self._workers.append(asyncio.create_task(run_pump()))
+        if settings.ARCHIVE_ENABLED:
+            self._workers.append(asyncio.create_task(run_archiver()))
+        if settings.STORAGE_GC_ENABLED:
+            self._workers.append(asyncio.create_task(run_collector()))
+        logger.info("In-process pipeline started")
+
+    async def stop(self) -> None:
+        """Cancel the worker pools (queued jobs stay in their current stage)"""
+        from app.services.job_writer import get_job_writer
+        from app.services.prompt_enhancer import cancel_background
+
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        await get_job_writer().flush()
+        await cancel_background()
+
+    async def recover(self) -> None:
+        """Re-queue the jobs a previous process left unfinished"""
+        try:
+            for stage, job_id in await self.generator.recover():
+                self.enqueue(stage, job_id)
+        except Exception as e:
+            # Without the database nothing can run anyway; don't block startup
+            logger.error(f"Could not resume unfinished jobs: {str(e)}")
+
+    def enqueue(
+        self,
+        stage: Stage,
+        job_id: str,
+        delay: float = 0.0,
+        attempt: int = 0,
+        first_failed_at: Optional[float] = None
+    ) -> None:
+        """Queue a job for a stage, optionally after a delay"""
+        if delay > 0:
+            asyncio.get_running_loop().call_later(
+                delay, self.enqueue, stage, job_id, 0.0, attempt, first_failed_at
+            )
+            return
+        self.queues[stage].put_nowait((job_id, attempt, first_failed_at))
+        self._publish(stage)
+
+    def queue_depths(self) -> Dict[str, int]:
+        """Jobs waiting per stage"""
+        return {stage.value: queue.qsize() for stage, queue in self.queues.items()}
+
+    async def _worker(self, stage: Stage) -> None:
+        queue = self.queues[stage]
+        while True:
+            job_id, attempt, first_failed_at = await queue.get()
+            self._publish(stage)
+            try:
+                next_stage = await run_stage(
+                    self.generator, stage, job_id, attempt, first_failed_at
+                )
+                if next_stage:
+                    following, delay = next_stage
+                    self.enqueue(following, job_id, delay)
+            except Exception as e:
+                # Keep the worker alive if even failure handling failed
+                logger.error(f"Unhandled error in {stage.value} worker for job {job_id}: {str(e)}")
+            finally:
+                queue.task_done()
+
+    def _publish(self, stage: Stage) -> None:
+        metrics.set_gauge("pipeline_queue_depth", self.queues[stage].qsize(), stage=stage.value)
+
+
+# Pipeline started by the API lifespan when PIPELINE_BACKEND=inprocess
+_inprocess: Optional[InProcessPipeline] = None
+
+
+async def start_inprocess_pipeline(generator) -> None:
+    """Start the in-process stage pools (no-op for the Celery backend)"""
+    global _inprocess
+    if settings.PIPELINE_BACKEND != "inprocess" or _inprocess is not None:
+        return
+    _inprocess = InProcessPipeline(generator)
+    await _inprocess.start()
+
+
+async def stop_inprocess_pipeline() -> None:
+    """Stop the in-process stage pools"""
+    global _inprocess
+    if _inprocess is not None:
+        await _inprocess.stop()
+        _inprocess = None
+
+
+def dispatch(
+    stage: Stage,
+    job_id: str,
+    delay: float = 0.0,
+    attempt: int = 0,
+    first_failed_at: Optional[float] = None
+) -> None:
+    """
+    Hand a job to the queue of a stage
+
+    Args:
+        stage: Stage to run next
+        job_id: Job to process
+        delay: Seconds to wait before the stage runs
+        attempt: Retry number when re-running a failed stage
+        first_failed_at: When the stage first failed (epoch seconds)
+    """
+    dispatch_many([(stage, job_id, attempt, first_failed_at)], delay)
+
+
+def dispatch_many(items: List[Tuple[Stage, str, int, Optional[float]]], delay: float = 0.0) -> None:
+    """
+    Hand several jobs to their stage queues, sharing one broker connection
+
+    Args:
+        items: (stage, job_id, attempt, first_failed_at) tuples
+        delay: Seconds to wait before the stages run
+    """
+    if settings.PIPELINE_BACKEND == "celery":
+        from app.worker import celery_app
+
+        delayed = []
+        with celery_app.producer_or_acquire() as producer:
+            for stage, job_id, attempt, first_failed_at in items:
+                if stage == Stage.AWAIT_PROVIDER and settings.STATUS_CHECK_BACKEND == "asyncio":
+                    from app.services.status_queue import schedule_status_check
+
+                    # Picked up by the asyncio status worker (python -m app.status_worker)
+                    schedule_status_check(job_id, delay, attempt, first_failed_at)
+                    continue
+                if delay > 0:
+                    delayed.append((stage, job_id, attempt, first_failed_at))
+                    continue
+
+                kwargs = None
+                if attempt:
+                    kwargs = {"attempt": attempt, "first_failed_at": first_failed_at}
+                celery_app.send_task(
+                    STAGE_TASKS[stage],
+                    args=[job_id],
+                    kwargs=kwargs,
+                    queue=STAGE_QUEUES[stage],
+                    producer=producer
+                )
+        if delayed:
+            from app.services.retry_scheduler import schedule_delayed
+
+            # No countdown (ETA) messages: the retry pump dispatches them when due
+            schedule_delayed(delayed, delay)
+        return
+
+    if _inprocess is None:
+        raise RuntimeError("In-process pipeline is not running")
+    for stage, job_id, attempt, first_failed_at in items:
+        _inprocess.enqueue(stage, job_id, delay, attempt, first_failed_at)
+
+
+def publish_queue_depths() -> Dict[str, int]:
+    """
+    Refresh the pipeline_queue_depth gauges
+
+    Returns:
+        Jobs waiting per stage
+    """
+    if settings.PIPELINE_BACKEND == "celery":
+        from app.core.redis_client import get_sync_redis
+
+        # The Celery Redis transport keeps each queue as a list named after it
+        client = get_sync_redis()
+        depths = {stage.value: int(client.llen(STAGE_QUEUES[stage])) for stage in Stage}
+        if settings.STATUS_CHECK_BACKEND == "asyncio":
+            from app.services.status_queue import DUE_KEY
+
+            depths[Stage.AWAIT_PROVIDER.value] = int(client.zcard(DUE_KEY))
+    elif _inprocess is not None:
+        depths = _inprocess.queue_depths()
+    else:
+        depths = {}
+
+    for stage, depth in depths.items():
+        metrics.set_gauge("pipeline_queue_depth", depth, stage=stage)
+    return depths
@@ -0,0 +1,131 @@
+"""
+Micro-batching of prompt enhancement requests
+
+Concurrent enhance calls are collected for up to PROMPT_BATCH_MAX_WAIT_MS
+or PROMPT_BATCH_MAX_SIZE items and sent to Gemini as one structured
+request, paying the instruction preamble and request overhead once.
+
+Batches only form if every enhancer in the process feeds the same
+batcher, so it is shared through get_prompt_batcher: one per event loop,
+since pending futures and the flush timer belong to a loop.
+"""
+import asyncio
+import logging
+import weakref
+from typing import List, Optional, Set, Tuple
+
+from app.core.ai_clients.google_ai import GoogleAIClient
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+PendingItem = Tuple[str, str, asyncio.Future]
+
+
+class PromptBatcher:
+    """
+    Collects pending prompts and scatters batched Gemini results back to callers
+    """
+
+    def __init__(
+        self,
+        google_client: GoogleAIClient,
+        max_batch_size: Optional[int] = None,
+        max_wait_ms: Optional[int] = None
+    ):
+        """
+        Args:
+            google_client: Client used for batched and per-item calls
+            max_batch_size: Flush once this many prompts are pending
+            max_wait_ms: Flush this long after the first pending prompt
+        """
+        self.google_client = google_client
+        self.max_batch_size = max_batch_size or settings.PROMPT_BATCH_MAX_SIZE
+        if max_wait_ms is None:
+            max_wait_ms = settings.PROMPT_BATCH_MAX_WAIT_MS
+        self.max_wait = max_wait_ms / 1000.0
+        self._pending: List[PendingItem] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushes: Set[asyncio.Task] = set()
+
+    async def enhance(self, prompt: str, context: str = "text-to-video") -> str:
+        """
+        Enhance a prompt as part of the next batch
+
+        Args:
+            prompt: Original prompt
+            context: Context type (text-to-video, image-to-video)
+
+        Returns:
+            Enhanced prompt (the original prompt if Gemini failed)
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((prompt, context, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        task = asyncio.ensure_future(self._run(batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _run(self, batch: List[PendingItem]) -> None:
+        items = [(prompt, context) for prompt, context, _ in batch]
+        metrics.inc("prompt_batch_flushes_total")
+        metrics.inc("prompt_batch_items_total", len(batch))
+
+        try:
+            if len(batch) == 1:
+                results = [await self.google_client.enhance_prompt(*items[0])]
+            else:
+                results = await self.google_client.enhance_prompts_batch(items)
+        except Exception as e:
+            logger.warning(
+                f"Batch enhancement of {len(batch)} prompts failed, falling back per item: {str(e)}"
+            )
+            metrics.inc("prompt_batch_fallbacks_total")
+            results = await asyncio.gather(
+                *(self.google_client.enhance_prompt(prompt, context) for prompt, context in items)
+            )
+
+        for (_, _, future), enhanced in zip(batch, results):
+            if not future.done():
+                future.set_result(enhanced)
+
+
+# One batcher per event loop, like the job writer
+_batchers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, PromptBatcher]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_prompt_batcher(google_client: GoogleAIClient) -> PromptBatcher:
+    """
+    Get the prompt batcher bound to the running event loop
+
+    Args:
+        google_client: Client used if the batcher has to be created
+
+    Returns:
+        PromptBatcher instance
+    """
+    loop = asyncio.get_running_loop()
+    batcher = _batchers.get(loop)
+    if batcher is None:
+        batcher = PromptBatcher(google_client)
+        _batchers[loop] = batcher
+    return batcher
@@ -0,0 +1,192 @@
+"""
+Deadline-bounded prompt enhancement
+
+Gemini enhancement sits on the critical path of every request. The
+enhancer gives Gemini a fixed deadline and otherwise continues with the
+deterministic local template. Where the event loop outlives the request
+(API, in-process pipeline) late Gemini answers are still cached so the
+next identical prompt gets the remote enhancement; Celery tasks cancel
+them with cancel_background before their event loop ends. Prompts that are only
+near-duplicates of a cached one (same words, different order or
+punctuation) reuse its enhancement through the similarity index.
+"""
+import asyncio
+import hashlib
+import logging
+import threading
+import weakref
+from typing import Any, Collection, Dict, Optional, Set
+
+from redis.exceptions import RedisError
+
+from app.core.ai_clients.google_ai import GoogleAIClient
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.redis_client import get_async_redis
+from app.services import prompt_similarity
+from app.services.prompt_batcher import get_prompt_batcher
+from app.services.prompt_templates import local_enhance
+
+logger = logging.getLogger(__name__)
+
+# Remote enhancements outstanding in this process, across enhancer instances and event loops
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+
+# Late Gemini calls still running after their caller moved on, per event loop
+_background: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Set[asyncio.Task]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _track_in_flight(delta: int) -> None:
+    global _in_flight
+    with _in_flight_lock:
+        _in_flight += delta
+
+
+async def cancel_background() -> int:
+    """
+    Cancel late enhancements of the running event loop (call before it ends)
+
+    Returns:
+        Number of cancelled enhancements
+    """
+    tasks = [task for task in _background.pop(asyncio.get_running_loop(), set()) if not task.done()]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    if tasks:
+        metrics.inc("prompt_enhancement_late_cancelled_total", len(tasks))
+    return len(tasks)
+
+
+class PromptEnhancer:
+    """
+    Prompt enhancement with a remote deadline, local fallback and shared cache
+    """
+
+    def __init__(self, google_client: GoogleAIClient):
+        self.google_client = google_client
+
+    @staticmethod
+    def _cache_key(prompt: str, context: str) -> str:
+        digest = hashlib.sha256(f"{context}\n{prompt}".encode("utf-8")).hexdigest()
+        return f"enhance:{digest}"
+
+    async def _cache_get(self, prompt: str, context: str) -> Optional[str]:
+        try:
+            value = await get_async_redis().get(self._cache_key(prompt, context))
+        except RedisError as e:
+            logger.warning(f"Enhancement cache unavailable: {str(e)}")
+            return None
+        return value.decode("utf-8") if value else None
+
+    async def _cache_set(self, prompt: str, context: str, enhanced: str) -> None:
+        key = self._cache_key(prompt, context)
+        try:
+            await get_async_redis().set(key, enhanced, ex=settings.PROMPT_CACHE_TTL)
+        except RedisError as e:
+            logger.warning(f"Enhancement cache unavailable: {str(e)}")
+            return
+        if settings.PROMPT_SIMILARITY_ENABLED:
+            await prompt_similarity.add(key, prompt, context)
+
+    async def _similar_get(self, prompt: str, context: str) -> Optional[str]:
+        match = await prompt_similarity.find(prompt, context)
+        if not match:
+            return None
+        key, score = match
+        try:
+            value = await get_async_redis().get(key)
+        except RedisError as e:
+            logger.warning(f"Enhancement cache unavailable: {str(e)}")
+            return None
+        if value:
+            logger.debug(f"Reusing enhancement of a similar prompt (similarity {score:.2f})")
+        return value.decode("utf-8") if value else None
+
+    def queue_depth(self) -> int:
+        """Remote enhancements currently outstanding in this process"""
+        return _in_flight
+
+    def _use_remote(self) -> bool:
+        mode = settings.PROMPT_ENHANCEMENT_MODE
+        if mode == "local":
+            return False
+        if mode == "auto" and self.queue_depth() >= settings.PROMPT_ENHANCEMENT_AUTO_QUEUE_DEPTH:
+            return False
+        return True
+
+    async def _remote(self, prompt: str, context: str) -> Optional[str]:
+        _track_in_flight(1)
+        try:
+            if settings.PROMPT_BATCH_ENABLED:
+                # Shared with every other enhancer on this loop so their prompts batch together
+                enhanced = await get_prompt_batcher(self.google_client).enhance(prompt, context)
+            else:
+                enhanced = await self.google_client.enhance_prompt(prompt=prompt, context=context)
+        finally:
+            _track_in_flight(-1)
+        # GoogleAIClient returns the original prompt when Gemini fails
+        if not enhanced or enhanced == prompt:
+            return None
+        await self._cache_set(prompt, context, enhanced)
+        return enhanced
+
+    async def enhance(
+        self,
+        prompt: str,
+        context: str = "text-to-video",
+        params: Optional[Dict[str, Any]] = None,
+        omit: Collection[str] = ()
+    ) -> str:
+        """
+        Enhance a prompt within the configured deadline
+
+        Args:
+            prompt: Original prompt
+            context: Context type (text-to-video, image-to-video)
+            params: Style or motion parameters used by the local template
+            omit: Params the local template leaves to variant_enhance
+
+        Returns:
+            Enhanced prompt string
+        """
+        cached = await self._cache_get(prompt, context)
+        if cached:
+            metrics.inc("prompt_enhancement_total", source="cache")
+            return cached
+
+        if settings.PROMPT_SIMILARITY_ENABLED:
+            similar = await self._similar_get(prompt, context)
+            if similar:
+                metrics.inc("prompt_enhancement_total", source="similar")
+                return similar
+
+        if not self._use_remote():
+            metrics.inc("prompt_enhancement_total", source="local_skipped")
+            return local_enhance(prompt, context, params, omit)
+
+        task = asyncio.ensure_future(self._remote(prompt, context))
+        try:
+            enhanced = await asyncio.wait_for(
+                asyncio.shield(task), timeout=settings.PROMPT_ENHANCEMENT_DEADLINE
+            )
+        except asyncio.TimeoutError:
+            # Let Gemini finish in the background so its answer lands in the cache
+            background = _background.setdefault(asyncio.get_running_loop(), set())
+            background.add(task)
+            task.add_done_callback(background.discard)
+            logger.info(
+                f"Enhancement deadline exceeded, using local template for '{prompt[:50]}...'"
+            )
+            metrics.inc("prompt_enhancement_total", source="local_deadline")
+            return local_enhance(prompt, context, params, omit)
+
+        if enhanced is None:
+            metrics.inc("prompt_enhancement_total", source="local_fallback")
+            return local_enhance(prompt, context, params, omit)
+
+        metrics.inc("prompt_enhancement_total", source="remote")
+        return enhanced
@@ -0,0 +1,109 @@
+"""
+Redis-backed near-duplicate index of enhanced prompts
+
+Exact-match caching misses prompts that only differ in punctuation,
+casing, stopwords, plurals or word order ("A cat on the beach at
+sunset!" vs "sunset beach, cat"). Every cached enhancement is indexed by
+the LSH bands of the MinHash signature of its prompt's content words; a
+lookup collects the items sharing a band and verifies them with the
+exact Jaccard similarity of their word sets. Candidates whose roles are
+swapped ("a dog chasing a cat" vs "a cat chasing a dog") are rejected.
+"""
+import json
+import logging
+from typing import Optional, Tuple
+
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.minhash import MinHasher, jaccard, roles_reversed, words
+from app.core.redis_client import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+BUCKET_PREFIX = "prompt_lsh:bucket:"
+# Word sequences in prompt order (roles_reversed needs the order)
+WORDS_PREFIX = "prompt_lsh:words:"
+
+# Candidates verified per lookup; buckets of very common prompts can grow large
+MAX_CANDIDATES = 64
+
+_hasher = MinHasher()
+
+
+async def add(cache_key: str, prompt: str, context: str) -> None:
+    """
+    Index a cached enhancement under its prompt
+
+    Args:
+        cache_key: Redis key of the cached enhancement
+        prompt: Original prompt
+        context: Enhancement context; prompts only match within one context
+    """
+    sequence = words(prompt)
+    if not sequence:
+        return
+
+    ttl = settings.PROMPT_CACHE_TTL
+    try:
+        async with get_async_redis().pipeline(transaction=False) as pipe:
+            pipe.set(WORDS_PREFIX + cache_key, json.dumps(sequence), ex=ttl)
+            for band_key in _hasher.band_keys(frozenset(sequence)):
+                bucket = f"{BUCKET_PREFIX}{context}:{band_key}"
+                pipe.sadd(bucket, cache_key)
+                pipe.expire(bucket, ttl)
+            await pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Could not index prompt: {str(e)}")
+
+
+async def find(
+    prompt: str,
+    context: str,
+    threshold: Optional[float] = None
+) -> Optional[Tuple[str, float]]:
+    """
+    Find the cached enhancement of the most similar earlier prompt
+
+    Args:
+        prompt: Prompt to look up
+        context: Enhancement context
+        threshold: Minimum Jaccard similarity (PROMPT_SIMILARITY_THRESHOLD by default)
+
+    Returns:
+        (cache key, similarity) of the best match, or None
+    """
+    if threshold is None:
+        threshold = settings.PROMPT_SIMILARITY_THRESHOLD
+    sequence = words(prompt)
+    if not sequence:
+        return None
+    tokens = frozenset(sequence)
+
+    client = get_async_redis()
+    try:
+        async with client.pipeline(transaction=False) as pipe:
+            for band_key in _hasher.band_keys(tokens):
+                pipe.srandmember(f"{BUCKET_PREFIX}{context}:{band_key}", MAX_CANDIDATES)
+            buckets = await pipe.execute()
+
+        candidates = list({member for bucket in buckets for member in bucket})[:MAX_CANDIDATES]
+        if not candidates:
+            return None
+        stored = await client.mget([WORDS_PREFIX + key.decode("utf-8") for key in candidates])
+    except RedisError as e:
+        logger.warning(f"Prompt similarity index unavailable: {str(e)}")
+        return None
+
+    best = None
+    for key, raw in zip(candidates, stored):
+        if raw is None:
+            # Entry expired; its bucket memberships go with the bucket TTL
+            continue
+        other = json.loads(raw)
+        score = jaccard(tokens, other)
+        if score < threshold or (best is not None and score <= best[1]):
+            continue
+        if not roles_reversed(sequence, other):
+            best = (key.decode("utf-8"), score)
+    return best
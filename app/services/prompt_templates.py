@@ -0,0 +1,128 @@
+"""
+Deterministic local prompt enhancement from style, camera and framing params
+
+Used when Gemini misses the enhancement deadline or is skipped under load.
+Multi-variant requests enhance once without the params their variants
+override and append each variant's own clauses with variant_enhance.
+"""
+from typing import Any, Collection, Dict, List, Optional
+
+from app.schemas.video import VideoStyle, CameraMovement, AspectRatio, MotionIntensity
+
+STYLE_CLAUSES = {
+    VideoStyle.REALISTIC: "photorealistic detail with natural textures and true-to-life colors",
+    VideoStyle.ANIME: "anime-style animation with clean line art and vivid cel shading",
+    VideoStyle.CARTOON: "playful cartoon style with bold outlines and saturated colors",
+    VideoStyle.CINEMATIC: "cinematic look with shallow depth of field and a filmic color grade",
+    VideoStyle.ARTISTIC: "painterly artistic style with expressive brushwork",
+    VideoStyle.THREE_D: "polished 3D render with soft global illumination",
+}
+
+LIGHTING_CLAUSES = {
+    VideoStyle.REALISTIC: "soft natural daylight",
+    VideoStyle.ANIME: "bright even lighting with crisp highlights",
+    VideoStyle.CARTOON: "flat cheerful lighting",
+    VideoStyle.CINEMATIC: "dramatic low-key lighting with volumetric light rays",
+    VideoStyle.ARTISTIC: "warm diffused light",
+    VideoStyle.THREE_D: "studio three-point lighting",
+}
+
+CAMERA_CLAUSES = {
+    CameraMovement.STATIC: "steady locked-off camera",
+    CameraMovement.PAN: "slow smooth horizontal pan",
+    CameraMovement.ZOOM: "gradual push-in zoom toward the subject",
+    CameraMovement.ROTATE: "gentle orbiting camera around the subject",
+    CameraMovement.TRACKING: "tracking shot following the main subject",
+}
+
+FRAMING_CLAUSES = {
+    AspectRatio.RATIO_16_9: "wide 16:9 composition",
+    AspectRatio.RATIO_9_16: "vertical 9:16 composition for mobile viewing",
+    AspectRatio.RATIO_1_1: "centered square composition",
+    AspectRatio.RATIO_4_3: "classic 4:3 composition",
+    AspectRatio.RATIO_21_9: "ultra-wide anamorphic 21:9 composition",
+}
+
+MOTION_CLAUSES = {
+    MotionIntensity.LOW: "subtle, calm motion",
+    MotionIntensity.MEDIUM: "natural, fluid motion",
+    MotionIntensity.HIGH: "energetic, dynamic motion",
+}
+
+DEFAULT_STYLE = VideoStyle.CINEMATIC
+
+# Params that add a clause, in template order
+CLAUSE_KEYS = ("style", "camera_movement", "intensity", "aspect_ratio")
+
+
+def _lookup(enum_cls, value: Any, table: Dict, default: Optional[Any] = None) -> Optional[str]:
+    """Map a raw param (enum member or string) to its clause"""
+    if value is None:
+        return table.get(default) if default is not None else None
+    try:
+        return table.get(enum_cls(getattr(value, "value", value)))
+    except ValueError:
+        return None
+
+
+def _clauses(params: Dict[str, Any], keys: Collection[str]) -> List[Optional[str]]:
+    """Clauses of the params in keys, in template order"""
+    style = params.get("style")
+    clauses = []
+    if "style" in keys:
+        clauses.append(_lookup(VideoStyle, style, STYLE_CLAUSES, DEFAULT_STYLE))
+        clauses.append(_lookup(VideoStyle, style, LIGHTING_CLAUSES, DEFAULT_STYLE))
+    if "camera_movement" in keys:
+        camera = params.get("camera_movement") or params.get("camera")
+        clauses.append(_lookup(CameraMovement, camera, CAMERA_CLAUSES))
+    if "intensity" in keys:
+        clauses.append(_lookup(MotionIntensity, params.get("intensity"), MOTION_CLAUSES))
+    if "aspect_ratio" in keys:
+        clauses.append(_lookup(AspectRatio, params.get("aspect_ratio"), FRAMING_CLAUSES))
+    return clauses
+
+
+def _append(prompt: str, clauses: List[Optional[str]]) -> str:
+    details = ", ".join(clause for clause in clauses if clause)
+    if not details:
+        return prompt
+    return f"{prompt.strip().rstrip('.')}. {details[0].upper()}{details[1:]}."
+
+
+def local_enhance(
+    prompt: str,
+    context: str = "text-to-video",
+    params: Optional[Dict[str, Any]] = None,
+    omit: Collection[str] = ()
+) -> str:
+    """
+    Enhance a prompt with style, lighting, camera and framing clauses
+
+    Args:
+        prompt: Original (or image-derived) prompt
+        context: Context type (text-to-video, image-to-video)
+        params: Style or motion parameters of the request
+        omit: Params left out, because variants add their own (see variant_enhance)
+
+    Returns:
+        Enhanced prompt string (same inputs always give the same output)
+    """
+    clauses = _clauses(params or {}, [key for key in CLAUSE_KEYS if key not in omit])
+    if context == "image-to-video":
+        clauses.append("preserving the composition and subjects of the source image")
+    return _append(prompt, clauses)
+
+
+def variant_enhance(shared: str, params: Optional[Dict[str, Any]], keys: Collection[str]) -> str:
+    """
+    Specialize a multi-variant request's shared enhancement for one variant
+
+    Args:
+        shared: Enhancement of the parent, made with omit=keys
+        params: The variant's params (the parent's with its overrides applied)
+        keys: Params overridden by any variant of the request
+
+    Returns:
+        Shared enhancement followed by the variant's clauses for keys
+    """
+    return _append(shared, _clauses(params or {}, keys))
@@ -0,0 +1,130 @@
+"""
+Opt-in cache of completed generations keyed by their canonical input
+
+Templates and presets regenerate the same (enhanced prompt, duration,
+aspect ratio, style, quality) or (image, motion params) combinations over
+and over. With RESULT_CACHE_ENABLED a new job whose input matches a
+completed one is finished immediately against the existing output, without
+a Kling call. Entries expire with the outputs (OUTPUT_RETENTION) and the
+least recently used ones are evicted beyond RESULT_CACHE_MAX_ENTRIES.
+"""
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.redis_client import get_async_redis
+from app.services.coalescing import request_key
+
+logger = logging.getLogger(__name__)
+
+ENTRY_PREFIX = "result_cache:entry:"
+LRU_KEY = "result_cache:lru"
+
+# output_data fields copied to jobs served from the cache
+CACHED_FIELDS = (
+    "output_path", "output_url", "output_size", "thumbnail_url", "duration", "video_url"
+)
+
+
+def text_key(enhanced_prompt: str, style_params: Optional[Dict[str, Any]]) -> str:
+    """Cache key of a text-to-video job once its prompt is enhanced"""
+    return request_key(
+        None,
+        "text",
+        {"prompt": enhanced_prompt, "style_params": style_params or {}}
+    )
+
+
+def image_key(
+    image_digest: str,
+    prompt: Optional[str],
+    motion_params: Optional[Dict[str, Any]]
+) -> str:
+    """Cache key of an image-to-video job"""
+    return request_key(
+        None,
+        "image",
+        {"image": image_digest, "prompt": prompt, "motion_params": motion_params or {}}
+    )
+
+
+async def lookup(key: str) -> Optional[Dict[str, Any]]:
+    """
+    Find a completed output for a cache key
+
+    Args:
+        key: Key from text_key or image_key
+
+    Returns:
+        Cached output fields (plus "source_job_id") or None on a miss
+    """
+    client = get_async_redis()
+    try:
+        raw = await client.get(ENTRY_PREFIX + key)
+        if raw is None:
+            metrics.inc("result_cache_total", result="miss")
+            return None
+
+        entry = json.loads(raw)
+        if not Path(entry["output_path"]).exists():
+            # The output was cleaned up before the entry expired
+            await invalidate(key)
+            metrics.inc("result_cache_total", result="stale")
+            return None
+
+        await client.zadd(LRU_KEY, {key: time.time()})
+    except RedisError as e:
+        logger.warning(f"Result cache unavailable: {str(e)}")
+        return None
+
+    metrics.inc("result_cache_total", result="hit")
+    return entry
+
+
+async def store(key: str, job_id: str, output_data: Dict[str, Any]) -> None:
+    """
+    Remember the output of a completed job and evict the least recently used entries
+
+    Args:
+        key: Key from text_key or image_key
+        job_id: Completed job that produced the output
+        output_data: The job's output_data
+    """
+    entry = {field: output_data[field] for field in CACHED_FIELDS if field in output_data}
+    entry["source_job_id"] = job_id
+
+    client = get_async_redis()
+    try:
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.set(ENTRY_PREFIX + key, json.dumps(entry), ex=settings.OUTPUT_RETENTION)
+            pipe.zadd(LRU_KEY, {key: time.time()})
+            # Entries older than the retention have expired on their own
+            pipe.zremrangebyscore(LRU_KEY, "-inf", time.time() - settings.OUTPUT_RETENTION)
+            pipe.zcard(LRU_KEY)
+            size = (await pipe.execute())[-1]
+
+        excess = size - settings.RESULT_CACHE_MAX_ENTRIES
+        if excess > 0:
+            evicted = await client.zpopmin(LRU_KEY, excess)
+            if evicted:
+                await client.delete(
+                    *(ENTRY_PREFIX + member.decode("utf-8") for member, _ in evicted)
+                )
+                metrics.inc("result_cache_evictions_total", len(evicted))
+    except RedisError as e:
+        logger.warning(f"Could not cache result of job {job_id}: {str(e)}")
+
+
+async def invalidate(key: str) -> None:
+    """Drop a cache entry"""
+    client = get_async_redis()
+    async with client.pipeline(transaction=False) as pipe:
+        pipe.delete(ENTRY_PREFIX + key)
+        pipe.zrem(LRU_KEY, key)
+        await pipe.execute()
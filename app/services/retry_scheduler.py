@@ -0,0 +1,281 @@
+"""
+Redis-backed delayed retry scheduler for pipeline stages
+
+Instead of Celery countdown retries (ETA messages held in worker memory),
+a stage that fails transiently is recorded in a Redis sorted set scored by
+its due time. A pump moves due retries back onto the stage queues in
+batches; retries that run out of attempts or age are moved to a
+dead-letter set together with their last error. Delayed stage dispatches
+of the Celery backend (provider polls) go through the same set with
+schedule_delayed(), so no countdown message ever waits in a worker.
+
+The pump claims due retries by pushing their score RETRY_CLAIM_TIMEOUT
+ahead (like the status queue) and only deletes them once dispatch
+succeeded, so a broker outage or a crashed pump delays retries instead
+of losing them.
+"""
+import asyncio
+import json
+import logging
+import time
+from typing import List, Tuple
+
+import httpx
+
+from app.core.ai_clients.kling_ai import KlingAPIError
+from app.core.circuit_breaker import CircuitOpenError
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.rate_limiter import RateLimitExceeded
+from app.core.redis_client import get_async_redis, get_sync_redis
+from app.core.retry import exponential_jitter
+from app.models.video_job import ConcurrentUpdateError
+
+logger = logging.getLogger(__name__)
+
+DUE_KEY = "retry:due"
+PAYLOAD_KEY = "retry:payload"
+DEAD_KEY = "retry:dead"
+DEAD_PAYLOAD_KEY = "retry:dead:payload"
+
+# Claim up to ARGV[2] retries due at ARGV[1] by moving them to ARGV[3]; returns id, payload pairs
+CLAIM_DUE_SCRIPT = """
+local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+if #ids == 0 then
+    return {}
+end
+local result = {}
+for _, id in ipairs(ids) do
+    redis.call('ZADD', KEYS[1], ARGV[3], id)
+    table.insert(result, id)
+    table.insert(result, redis.call('HGET', KEYS[2], id) or false)
+end
+return result
+"""
+
+# Delete dispatched retries still claimed until ARGV[1]; a retry rescheduled meanwhile stays
+ACK_SCRIPT = """
+local removed = 0
+for i = 2, #ARGV do
+    local score = redis.call('ZSCORE', KEYS[1], ARGV[i])
+    if score and tonumber(score) == tonumber(ARGV[1]) then
+        redis.call('ZREM', KEYS[1], ARGV[i])
+        redis.call('HDEL', KEYS[2], ARGV[i])
+        removed = removed + 1
+    end
+end
+return removed
+"""
+
+
+def is_transient_error(exc: BaseException, stage: str) -> bool:
+    """
+    Whether a stage failure is worth retrying later
+
+    Submissions are only retried when the request provably never created a
+    provider job (rejected locally, connection refused or 429); anything
+    else could produce a duplicate generation.
+    """
+    if isinstance(exc, (CircuitOpenError, RateLimitExceeded, httpx.ConnectError)):
+        return True
+    if isinstance(exc, KlingAPIError):
+        if exc.status_code == 429:
+            return True
+        return stage != "submit" and exc.status_code is not None and exc.status_code >= 500
+    if stage == "submit":
+        return False
+    return isinstance(exc, (httpx.TransportError, asyncio.TimeoutError, ConcurrentUpdateError))
+
+
+async def schedule_retry(
+    stage: str,
+    job_id: str,
+    attempt: int,
+    error: str,
+    first_failed_at: float = None
+) -> bool:
+    """
+    Schedule a stage to run again after an exponential, jittered delay
+
+    Args:
+        stage: Stage name
+        job_id: Job to retry
+        attempt: Retry number (1 for the first retry)
+        error: Error message of the failure
+        first_failed_at: When the first failure happened (epoch seconds)
+
+    Returns:
+        True if a retry was scheduled, False if the job was dead-lettered
+    """
+    now = time.time()
+    retry_id = f"{stage}:{job_id}"
+    payload = {
+        "stage": stage,
+        "job_id": job_id,
+        "attempt": attempt,
+        "error": error,
+        "first_failed_at": first_failed_at or now,
+    }
+    client = get_async_redis()
+
+    expired = now - payload["first_failed_at"] > settings.RETRY_MAX_AGE
+    if attempt > settings.RETRY_MAX_ATTEMPTS or expired:
+        payload["dead_at"] = now
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.zadd(DEAD_KEY, {retry_id: now})
+            pipe.hset(DEAD_PAYLOAD_KEY, retry_id, json.dumps(payload))
+            await pipe.execute()
+        metrics.inc("retry_dead_lettered_total", stage=stage)
+        logger.error(f"Giving up on {stage} for job {job_id} after {attempt - 1} retries: {error}")
+        return False
+
+    delay = exponential_jitter(attempt, settings.RETRY_BASE_DELAY, settings.RETRY_MAX_DELAY)
+    async with client.pipeline(transaction=True) as pipe:
+        pipe.hset(PAYLOAD_KEY, retry_id, json.dumps(payload))
+        pipe.zadd(DUE_KEY, {retry_id: now + delay})
+        await pipe.execute()
+    metrics.inc("retry_scheduled_total", stage=stage)
+    logger.warning(
+        f"Retrying {stage} for job {job_id} in {delay:.1f}s (attempt {attempt}): {error}"
+    )
+    return True
+
+
+def schedule_delayed(items: List[Tuple], delay: float) -> None:
+    """
+    Run stages after a delay without countdown messages (sync, for dispatch)
+
+    The entries are pumped like retries but keep their attempt count and
+    never dead-letter; a later retry of the same stage replaces them.
+
+    Args:
+        items: (stage, job_id, attempt, first_failed_at) tuples
+        delay: Seconds until the stages are due
+    """
+    due_at = time.time() + delay
+    with get_sync_redis().pipeline(transaction=True) as pipe:
+        for stage, job_id, attempt, first_failed_at in items:
+            retry_id = f"{stage.value}:{job_id}"
+            payload = {
+                "stage": stage.value,
+                "job_id": job_id,
+                "attempt": attempt,
+                "error": None,
+                "first_failed_at": first_failed_at,
+            }
+            pipe.hset(PAYLOAD_KEY, retry_id, json.dumps(payload))
+            pipe.zadd(DUE_KEY, {retry_id: due_at})
+        pipe.execute()
+
+
+async def scheduled(retry_ids: List[str]) -> List[bool]:
+    """
+    Whether retries are still waiting in the due set
+
+    Args:
+        retry_ids: "<stage>:<job_id>" identifiers
+
+    Returns:
+        One flag per retry id
+    """
+    if not retry_ids:
+        return []
+    payloads = await get_async_redis().hmget(PAYLOAD_KEY, retry_ids)
+    return [payload is not None for payload in payloads]
+
+
+async def claim_due(limit: int) -> Tuple[float, List[Tuple[str, dict]]]:
+    """
+    Claim retries that are due
+
+    Claimed retries become due again after RETRY_CLAIM_TIMEOUT unless
+    acknowledged with ack().
+
+    Args:
+        limit: Maximum number of retries to claim
+
+    Returns:
+        (claim deadline, [(retry id, payload)]) for ack()
+    """
+    now = time.time()
+    claimed_until = now + settings.RETRY_CLAIM_TIMEOUT
+    script = get_async_redis().register_script(CLAIM_DUE_SCRIPT)
+    result = await script(keys=[DUE_KEY, PAYLOAD_KEY], args=[now, limit, claimed_until])
+    claimed = []
+    for retry_id, payload in zip(result[::2], result[1::2]):
+        if payload:
+            claimed.append((retry_id.decode("utf-8"), json.loads(payload)))
+        else:
+            # Payload lost: nothing to run, drop the entry
+            await get_async_redis().zrem(DUE_KEY, retry_id)
+    return claimed_until, claimed
+
+
+async def ack(claimed_until: float, retry_ids: List[str]) -> int:
+    """
+    Delete claimed retries after they were dispatched
+
+    Args:
+        claimed_until: Claim deadline returned by claim_due()
+        retry_ids: Retries that were dispatched
+
+    Returns:
+        Number of retries deleted
+    """
+    if not retry_ids:
+        return 0
+    script = get_async_redis().register_script(ACK_SCRIPT)
+    return int(await script(keys=[DUE_KEY, PAYLOAD_KEY], args=[claimed_until, *retry_ids]))
+
+
+async def pump(batch_size: int = None) -> int:
+    """
+    Re-enqueue all due retries in batches
+
+    Args:
+        batch_size: Retries moved per batch
+
+    Returns:
+        Number of retries re-enqueued
+
+    Raises:
+        Exception: If dispatching a batch failed (its retries stay claimed
+            and come due again after RETRY_CLAIM_TIMEOUT)
+    """
+    from app.services.pipeline import Stage, dispatch_many
+
+    batch_size = batch_size or settings.RETRY_PUMP_BATCH_SIZE
+    total = 0
+    while True:
+        claimed_until, due = await claim_due(batch_size)
+        if not due:
+            break
+        items: List[Tuple] = [
+            (Stage(item["stage"]), item["job_id"], item["attempt"], item["first_failed_at"])
+            for _, item in due
+        ]
+        if settings.PIPELINE_BACKEND == "celery":
+            # Publishing to the broker is blocking; keep it off the event loop
+            await asyncio.get_running_loop().run_in_executor(None, dispatch_many, items)
+        else:
+            dispatch_many(items)
+        await ack(claimed_until, [retry_id for retry_id, _ in due])
+        total += len(items)
+        if len(due) < batch_size:
+            break
+
+    if total:
+        metrics.inc("retry_reenqueued_total", total)
+        logger.info(f"Re-enqueued {total} delayed retries")
+    return total
+
+
+async def run_pump(interval: float = None) -> None:
+    """Pump due retries forever (used by the in-process pipeline)"""
+    interval = interval or settings.RETRY_PUMP_INTERVAL
+    while True:
+        try:
+            await pump()
+        except Exception as e:
+            logger.error(f"Retry pump failed: {str(e)}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,190 @@
+"""
+Write-through store of job status records
+
+Status reads dominate traffic: dashboards poll many jobs at once and every
+read used to open a session and query the primary database. Every job
+write (VideoJob.update, append_event, the group-commit writer, progress
+ticks) also writes the job's status record to Redis, msgpack-encoded, so
+status endpoints read Redis first and any number of API processes share
+the same view. Terminal records expire after STATUS_CACHE_TERMINAL_TTL;
+active ones after STATUS_CACHE_TTL as a safety net for missed writes.
+
+Writers race: a progress tick built from a job loaded before a cancel can
+reach Redis after the cancel did. Records carry the job's version and a
+write only replaces a record of an older version (or, at the same
+version, lower progress), so the cache never moves backwards. Only
+writers hold current state, so reads never fill the cache: a replica may
+lag behind the primary.
+"""
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+import msgpack
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.redis_client import get_async_redis
+from app.models.video_job import JobStatus, VideoJob
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "job_status:"
+
+TERMINAL_STATUSES = {JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED}
+
+SUMMARY_FIELDS = ("status", "stage", "progress", "output_url", "error")
+
+# Per key: ARGV holds version, progress, ttl and record; SET only if newer than the cached record
+SET_NEWER_SCRIPT = """
+local written = 0
+for i, key in ipairs(KEYS) do
+    local base = (i - 1) * 4
+    local version = tonumber(ARGV[base + 1])
+    local progress = tonumber(ARGV[base + 2])
+    local newer = true
+    local current = redis.call('GET', key)
+    if current then
+        local ok, cached = pcall(cmsgpack.unpack, current)
+        if ok and type(cached) == 'table' and cached['version'] then
+            local cached_version = tonumber(cached['version'])
+            newer = version > cached_version
+                or (version == cached_version and progress > (tonumber(cached['progress']) or 0))
+        end
+    end
+    if newer then
+        redis.call('SET', key, ARGV[base + 4], 'EX', ARGV[base + 3])
+        written = written + 1
+    end
+end
+return written
+"""
+
+
+def record(job: VideoJob) -> Dict[str, Any]:
+    """
+    Status record of a job, as returned by GET /jobs/{job_id}
+
+    Args:
+        job: Job to describe
+
+    Returns:
+        Dict of plain values (safe to msgpack)
+    """
+    output_data = job.output_data or {}
+    return {
+        "job_id": job.id,
+        "version": job.version or 0,
+        "status": job.status.value,
+        "stage": job.stage or output_data.get("stage"),
+        "progress": job.progress or 0,
+        "output_url": job.output_url or output_data.get("output_url"),
+        "error": job.error_message,
+        "parent_job_id": job.parent_job_id,
+        "child_job_ids": output_data.get("child_job_ids"),
+        "message": job.error_message or "",
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "updated_at": job.updated_at.isoformat() if job.updated_at else None,
+        "result": output_data if job.status == JobStatus.COMPLETED else None
+    }
+
+
+def summary(status_record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compact summary of a status record for batch lookups
+
+    Args:
+        status_record: Record built by record()
+
+    Returns:
+        Dict with status, stage, progress, output_url and error
+    """
+    return {field: status_record.get(field) for field in SUMMARY_FIELDS}
+
+
+async def get(job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Read the cached status record of a job
+
+    Args:
+        job_id: Job to look up
+
+    Returns:
+        Status record, or None on a miss
+    """
+    return (await get_many([job_id])).get(job_id)
+
+
+async def get_many(job_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Read cached status records
+
+    Args:
+        job_ids: Jobs to look up
+
+    Returns:
+        Records of the jobs found in the cache
+    """
+    job_ids = list(job_ids)
+    if not job_ids:
+        return {}
+    try:
+        values = await get_async_redis().mget([KEY_PREFIX + job_id for job_id in job_ids])
+    except RedisError as e:
+        logger.warning(f"Status cache unavailable: {str(e)}")
+        return {}
+
+    found = {
+        job_id: msgpack.unpackb(value, raw=False)
+        for job_id, value in zip(job_ids, values)
+        if value is not None
+    }
+    metrics.inc("status_cache_total", len(found), result="hit")
+    metrics.inc("status_cache_total", len(job_ids) - len(found), result="miss")
+    return found
+
+
+async def set_many(jobs: List[VideoJob]) -> None:
+    """
+    Write the status records of jobs after a write
+
+    Records older than the cached ones (lower version, or the same
+    version with less progress) are dropped, so a late writer holding a
+    stale copy cannot overwrite a newer status.
+
+    Args:
+        jobs: Jobs in the state their writer just committed
+    """
+    if not jobs:
+        return
+    keys, args = [], []
+    for job in jobs:
+        ttl = (
+            settings.STATUS_CACHE_TERMINAL_TTL
+            if job.status in TERMINAL_STATUSES
+            else settings.STATUS_CACHE_TTL
+        )
+        status_record = record(job)
+        keys.append(KEY_PREFIX + job.id)
+        args.extend([
+            status_record["version"],
+            status_record["progress"],
+            ttl,
+            msgpack.packb(status_record, use_bin_type=True)
+        ])
+    try:
+        script = get_async_redis().register_script(SET_NEWER_SCRIPT)
+        written = await script(keys=keys, args=args)
+        metrics.inc("status_cache_stale_writes_total", len(keys) - int(written))
+    except RedisError as e:
+        logger.warning(f"Status cache unavailable: {str(e)}")
+
+
+async def invalidate(*job_ids: str) -> None:
+    """Drop cached records of jobs that were deleted"""
+    if not job_ids:
+        return
+    try:
+        await get_async_redis().delete(*(KEY_PREFIX + job_id for job_id in job_ids))
+    except RedisError as e:
+        logger.warning(f"Status cache unavailable: {str(e)}")
@@ -0,0 +1,112 @@
+"""
+Redis sorted-set queue of scheduled status checks
+
+Jobs awaiting the provider are stored with their next poll time as score.
+The asyncio status worker claims due jobs by pushing their score forward
+by a visibility timeout, so a crashed worker's claims reappear instead of
+being lost; rescheduling or finishing the job replaces/removes the entry.
+A check that retries a failed poll keeps its attempt number and first
+failure time in a hash next to the set, so the retry scheduler can still
+dead-letter it.
+"""
+import json
+import time
+from typing import List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.redis_client import get_async_redis, get_sync_redis
+
+DUE_KEY = "status_check:due"
+ATTEMPT_KEY = "status_check:attempt"
+
+# Claim up to ARGV[2] jobs due at ARGV[1] by moving them to ARGV[3],
+# returning them together with their retry state
+CLAIM_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+if #due == 0 then
+    return {due, {}}
+end
+for _, job_id in ipairs(due) do
+    redis.call('ZADD', KEYS[1], ARGV[3], job_id)
+end
+return {due, redis.call('HMGET', KEYS[2], unpack(due))}
+"""
+
+# A claimed status check: job ID, retry attempt and first failure time
+StatusCheck = Tuple[str, int, Optional[float]]
+
+
+def schedule_status_check(
+    job_id: str,
+    delay: float = 0.0,
+    attempt: int = 0,
+    first_failed_at: Optional[float] = None
+) -> None:
+    """Schedule a status check (sync, for Celery tasks and dispatch)"""
+    with get_sync_redis().pipeline(transaction=True) as pipe:
+        _schedule(pipe, job_id, delay, attempt, first_failed_at)
+        pipe.execute()
+
+
+async def schedule_status_check_async(
+    job_id: str,
+    delay: float = 0.0,
+    attempt: int = 0,
+    first_failed_at: Optional[float] = None
+) -> None:
+    """Schedule a status check from async code"""
+    async with get_async_redis().pipeline(transaction=True) as pipe:
+        _schedule(pipe, job_id, delay, attempt, first_failed_at)
+        await pipe.execute()
+
+
+def _schedule(
+    pipe,
+    job_id: str,
+    delay: float,
+    attempt: int,
+    first_failed_at: Optional[float]
+) -> None:
+    if attempt:
+        pipe.hset(ATTEMPT_KEY, job_id, json.dumps([attempt, first_failed_at]))
+    else:
+        pipe.hdel(ATTEMPT_KEY, job_id)
+    pipe.zadd(DUE_KEY, {job_id: time.time() + delay})
+
+
+async def claim_due(limit: int) -> List[StatusCheck]:
+    """
+    Claim status checks that are due
+
+    Args:
+        limit: Maximum number of jobs to claim
+
+    Returns:
+        (job_id, attempt, first_failed_at) of the claimed checks
+    """
+    if limit <= 0:
+        return []
+    now = time.time()
+    script = get_async_redis().register_script(CLAIM_SCRIPT)
+    claimed, retries = await script(
+        keys=[DUE_KEY, ATTEMPT_KEY],
+        args=[now, limit, now + settings.STATUS_WORKER_VISIBILITY_TIMEOUT]
+    )
+    checks = []
+    for job_id, retry in zip(claimed, retries):
+        attempt, first_failed_at = json.loads(retry) if retry else (0, None)
+        checks.append((job_id.decode("utf-8"), attempt, first_failed_at))
+    return checks
+
+
+async def complete(job_id: str) -> None:
+    """Remove a job that no longer needs status checks"""
+    async with get_async_redis().pipeline(transaction=True) as pipe:
+        pipe.zrem(DUE_KEY, job_id)
+        pipe.hdel(ATTEMPT_KEY, job_id)
+        await pipe.execute()
+
+
+async def backlog() -> int:
+    """Number of jobs with a pending status check"""
+    return int(await get_async_redis().zcard(DUE_KEY))
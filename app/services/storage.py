@@ -0,0 +1,305 @@
+"""
+Local file layout and garbage collection for uploads, outputs and temp files
+
+Files are sharded into two levels of hash-prefix directories
+(ab/cd/<name>) so no directory grows to hundreds of thousands of entries.
+The collector runs periodically and:
+
+- deletes temp files and abandoned partial downloads older than TEMP_FILE_MAX_AGE
+- deletes uploads older than UPLOAD_RETENTION that no job references
+  (upload_refs, see app.services.upload_store) and no pending or
+  processing job uses
+- evicts outputs least recently accessed first once they are older than
+  OUTPUT_RETENTION or OUTPUT_DIR exceeds OUTPUT_DISK_BUDGET
+
+Files referenced by non-terminal jobs are never deleted. Completed jobs
+whose output was evicted lose their output_url (and thumbnail_url) and are
+flagged with output_evicted, so clients stop being handed dead links;
+archived jobs are never rewritten and keep theirs. Result cache entries
+check that their output still exists, so evicting a shared output just
+turns later lookups into misses.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.database import SessionLocal
+from app.models.upload_ref import UploadRef
+from app.models.video_job import ConcurrentUpdateError, JobStatus, VideoJob
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = [JobStatus.PENDING, JobStatus.PROCESSING]
+
+
+def sharded_path(base: Path, name: str) -> Path:
+    """
+    Location of a file under a hash-prefix sharded directory
+
+    Args:
+        base: Root directory (UPLOAD_DIR, OUTPUT_DIR)
+        name: File name
+
+    Returns:
+        base/ab/cd/name, with its parent directories created
+    """
+    digest = hashlib.sha1(name.encode("utf-8")).hexdigest()
+    path = base / digest[:2] / digest[2:4] / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def output_url(path: Path) -> str:
+    """
+    Public URL of a file under OUTPUT_DIR (served at /outputs)
+
+    Args:
+        path: File inside OUTPUT_DIR
+
+    Returns:
+        URL path
+    """
+    return "/outputs/" + Path(path).resolve().relative_to(settings.OUTPUT_DIR.resolve()).as_posix()
+
+
+def _walk(root: Path) -> Iterator[os.DirEntry]:
+    """Yield every regular file below root"""
+    stack: List[str] = [str(root)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry
+        except FileNotFoundError:
+            continue
+
+
+def _stat(entry: os.DirEntry, fresh: bool = False) -> Optional[os.stat_result]:
+    """stat() of a walked file (fresh=True bypasses the cached result), or None if it is gone"""
+    try:
+        return os.stat(entry.path) if fresh else entry.stat()
+    except FileNotFoundError:
+        return None
+
+
+def _last_access(stat: os.stat_result) -> float:
+    # relatime/noatime mounts may not bump atime on reads, so never report older than the last write
+    return max(stat.st_atime, stat.st_mtime)
+
+
+def _remove(path: str, kind: str) -> int:
+    """Delete a file and return the bytes freed (0 if it is already gone)"""
+    try:
+        size = os.stat(path).st_size
+        os.unlink(path)
+    except FileNotFoundError:
+        return 0
+    metrics.inc("storage_gc_deleted_total", kind=kind)
+    metrics.inc("storage_gc_bytes_freed_total", size, kind=kind)
+    return size
+
+
+def _referenced() -> Tuple[Set[str], Set[str]]:
+    """Absolute paths of files used by pending or processing jobs, and referenced upload digests"""
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(VideoJob.input_data, VideoJob.output_data)
+            .filter(VideoJob.status.in_(ACTIVE_STATUSES))
+            .all()
+        )
+        digests = UploadRef.referenced_digests(db)
+    finally:
+        db.close()
+
+    paths = set()
+    for input_data, output_data in rows:
+        image_path = (input_data or {}).get("image_path")
+        if image_path:
+            paths.add(os.path.abspath(image_path))
+        output_path = (output_data or {}).get("output_path")
+        if output_path:
+            paths.add(os.path.abspath(output_path))
+            paths.add(os.path.abspath(str(Path(output_path).with_suffix(".jpg"))))
+    return paths, digests
+
+
+def collect(now: Optional[float] = None) -> dict:
+    """
+    Run one garbage collection pass (blocking file system work)
+
+    Args:
+        now: Current epoch time (for tests and dry runs)
+
+    Returns:
+        Counts of deleted files and bytes freed per kind, and the URLs of
+        the evicted outputs
+    """
+    now = now or time.time()
+    referenced, referenced_digests = _referenced()
+    freed = {"temp": 0, "upload": 0, "output": 0}
+    deleted = {"temp": 0, "upload": 0, "output": 0}
+
+    def remove(path: str, kind: str) -> None:
+        size = _remove(path, kind)
+        freed[kind] += size
+        deleted[kind] += 1
+
+    # Temp files and partial downloads abandoned by crashed workers
+    # Files can vanish between the scan and the stat (other collectors, uploads being replaced)
+    for entry in _walk(settings.TEMP_DIR):
+        stat = _stat(entry)
+        if stat and now - stat.st_mtime > settings.TEMP_FILE_MAX_AGE:
+            remove(entry.path, "temp")
+
+    # Uploads are only needed until the last job using them leaves the pipeline
+    for entry in _walk(settings.UPLOAD_DIR):
+        stat = _stat(entry)
+        if stat is None:
+            continue
+        age = now - stat.st_mtime
+        if entry.name.endswith(".part"):
+            if age > settings.TEMP_FILE_MAX_AGE:
+                remove(entry.path, "temp")
+            continue
+        if os.path.abspath(entry.path) in referenced:
+            continue
+        # Content-addressed uploads are named <digest><ext>
+        if entry.name.split(".", 1)[0] in referenced_digests:
+            continue
+        if age <= settings.UPLOAD_RETENTION:
+            continue
+        # Re-check right before deleting: a new identical upload refreshes the mtime
+        stat = _stat(entry, fresh=True)
+        if stat and now - stat.st_mtime > settings.UPLOAD_RETENTION:
+            remove(entry.path, "upload")
+
+    # Outputs: age bound first, then least recently accessed until under budget
+    candidates: List[Tuple[float, int, str]] = []
+    total = 0
+    for entry in _walk(settings.OUTPUT_DIR):
+        stat = _stat(entry)
+        if stat is None:
+            continue
+        if entry.name.endswith(".part"):
+            if now - stat.st_mtime > settings.TEMP_FILE_MAX_AGE:
+                remove(entry.path, "temp")
+            else:
+                total += stat.st_size
+            continue
+        total += stat.st_size
+        if os.path.abspath(entry.path) not in referenced:
+            candidates.append((_last_access(stat), stat.st_size, entry.path))
+
+    candidates.sort()
+    evicted = []
+    for last_access, size, path in candidates:
+        if now - last_access <= settings.OUTPUT_RETENTION and total <= settings.OUTPUT_DISK_BUDGET:
+            break
+        remove(path, "output")
+        evicted.append(output_url(Path(path)))
+        total -= size
+
+    metrics.set_gauge("storage_output_bytes", total)
+    return {
+        "deleted": deleted,
+        "freed_bytes": freed,
+        "output_bytes": total,
+        "evicted_urls": evicted
+    }
+
+
+async def forget_evicted_outputs(urls: List[str]) -> int:
+    """
+    Drop the URLs of evicted files from the completed jobs serving them
+
+    A job whose video is gone loses output_url and thumbnail_url and gets
+    output_evicted set; a job that only lost its thumbnail loses
+    thumbnail_url. Jobs reusing a cached result share the source job's
+    URLs and are cleared along with it.
+
+    Args:
+        urls: URLs of evicted outputs (videos and thumbnails)
+
+    Returns:
+        Number of jobs updated
+    """
+    if not urls:
+        return 0
+    evicted = set(urls)
+    # Thumbnails live next to their video as <job>.jpg
+    video_urls = {url.rsplit(".", 1)[0] + ".mp4" for url in evicted}
+
+    db = SessionLocal()
+    try:
+        jobs = (
+            db.query(VideoJob)
+            .filter(VideoJob.status == JobStatus.COMPLETED, VideoJob.output_url.in_(video_urls))
+            .all()
+        )
+        for job in jobs:
+            db.expunge(job)
+    finally:
+        db.close()
+
+    updated = 0
+    for job in jobs:
+        output_data = dict(job.output_data or {})
+        fields: Dict[str, Any] = {}
+        if job.output_url in evicted:
+            output_data.pop("output_url", None)
+            output_data.pop("thumbnail_url", None)
+            output_data["output_evicted"] = True
+            fields["output_url"] = None
+        elif output_data.get("thumbnail_url") in evicted:
+            output_data.pop("thumbnail_url")
+        else:
+            continue
+        try:
+            await job.update(output_data=output_data, **fields)
+        except (ConcurrentUpdateError, ValueError) as e:
+            # Archived or deleted meanwhile, or lost every compare-and-set attempt
+            logger.warning(f"Could not clear evicted output of job {job.id}: {str(e)}")
+            continue
+        updated += 1
+    if updated:
+        metrics.inc("storage_gc_jobs_cleared_total", updated)
+    return updated
+
+
+async def collect_garbage() -> dict:
+    """
+    Run a garbage collection pass off the event loop
+
+    Returns:
+        Counts of deleted files and bytes freed per kind
+    """
+    result = await asyncio.get_running_loop().run_in_executor(None, collect)
+    await forget_evicted_outputs(result["evicted_urls"])
+    if any(result["deleted"].values()):
+        logger.info(
+            f"Storage GC deleted {result['deleted']} files, "
+            f"freed {sum(result['freed_bytes'].values())} bytes; "
+            f"outputs now use {result['output_bytes']} bytes"
+        )
+    return result
+
+
+async def run_collector(interval: Optional[float] = None) -> None:
+    """Collect garbage forever (used by the in-process pipeline)"""
+    interval = interval or settings.STORAGE_GC_INTERVAL
+    while True:
+        try:
+            await collect_garbage()
+        except Exception as e:
+            logger.error(f"Storage GC failed: {str(e)}")
+        await asyncio.sleep(interval)
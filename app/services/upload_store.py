@@ -0,0 +1,152 @@
+"""
+Content-addressed store of uploaded images
+
+Stock photos and templates get uploaded by many users. Each distinct
+image is stored once under its SHA-256 digest (UPLOAD_DIR/ab/cd/<digest><ext>)
+and analysed by Gemini once; the analysis is cached by digest in Redis.
+The extension comes from the image format (falling back to a normalized
+client extension), so photo.jpeg and photo.JPG are still one file.
+Every job using an upload holds its own reference (upload_refs), released
+when the job finishes, so the storage collector only removes files no job
+needs any more.
+"""
+import json
+import logging
+import os
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import aiofiles
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.redis_client import get_async_redis
+from app.models.upload_ref import UploadRef
+from app.services.storage import sharded_path
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_PREFIX = "upload:analysis:"
+
+# File signatures of the allowed image types (WebP also needs "WEBP" at offset 8)
+_SIGNATURES = (
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+    (b"GIF87a", ".gif"),
+    (b"GIF89a", ".gif"),
+)
+_ALIASES = {".jpeg": ".jpg"}
+
+
+def extension(content: bytes, ext: str) -> str:
+    """
+    Canonical extension of an image
+
+    Args:
+        content: File content
+        ext: Extension the client sent, including the dot
+
+    Returns:
+        Extension of the detected format, else the lowercased client
+        extension with aliases (.jpeg) mapped to one spelling
+    """
+    for signature, detected in _SIGNATURES:
+        if content.startswith(signature):
+            return detected
+    if content[:4] == b"RIFF" and content[8:12] == b"WEBP":
+        return ".webp"
+    ext = ext.lower()
+    return _ALIASES.get(ext, ext)
+
+
+async def save(content: bytes, digest: str, ext: str) -> Path:
+    """
+    Store an upload unless identical content is already stored
+
+    Args:
+        content: File content
+        digest: SHA-256 of the content
+        ext: File extension the client sent, including the dot
+
+    Returns:
+        Path of the stored file
+    """
+    path = sharded_path(settings.UPLOAD_DIR, f"{digest}{extension(content, ext)}")
+    try:
+        # Restart the retention clock of the shared file
+        os.utime(path)
+    except FileNotFoundError:
+        # Not stored yet, or the collector deleted it since; store it again
+        pass
+    else:
+        metrics.inc("upload_store_total", result="dedup")
+        return path
+
+    # Write under a unique name and rename, so concurrent identical uploads never see a partial file
+    partial = path.with_name(f"{path.name}.{uuid.uuid4().hex}.part")
+    async with aiofiles.open(partial, "wb") as f:
+        await f.write(content)
+    os.replace(partial, path)
+    metrics.inc("upload_store_total", result="stored")
+    return path
+
+
+async def add_refs(refs: List[Tuple[str, str]]) -> None:
+    """
+    Reference uploads from newly created jobs
+
+    Args:
+        refs: (digest, job_id) pairs
+    """
+    await UploadRef.add_many(refs)
+
+
+async def release(job_ids: Iterable[str]) -> None:
+    """
+    Release the uploads of finished jobs
+
+    Args:
+        job_ids: Jobs that reached a terminal status
+    """
+    try:
+        await UploadRef.release(job_ids)
+    except Exception as e:
+        # A leaked reference only keeps a file around; never fail the job over it
+        logger.warning(f"Could not release upload references: {str(e)}")
+
+
+async def get_analysis(digest: str) -> Optional[Dict[str, Any]]:
+    """
+    Cached Gemini analysis of an image
+
+    Args:
+        digest: SHA-256 of the image
+
+    Returns:
+        Analysis result, or None on a miss
+    """
+    try:
+        raw = await get_async_redis().get(ANALYSIS_PREFIX + digest)
+    except RedisError as e:
+        logger.warning(f"Upload analysis cache unavailable: {str(e)}")
+        return None
+    metrics.inc("upload_analysis_cache_total", result="hit" if raw else "miss")
+    return json.loads(raw) if raw else None
+
+
+async def set_analysis(digest: str, analysis: Dict[str, Any]) -> None:
+    """
+    Cache the Gemini analysis of an image
+
+    Args:
+        digest: SHA-256 of the image
+        analysis: Result of GoogleAIClient.analyze_image
+    """
+    try:
+        await get_async_redis().set(
+            ANALYSIS_PREFIX + digest, json.dumps(analysis), ex=settings.UPLOAD_ANALYSIS_TTL
+        )
+    except RedisError as e:
+        logger.warning(f"Upload analysis cache unavailable: {str(e)}")
@@ -2,190 +2,832 @@
 Video generation service that orchestrates AI services
 """
 import asyncio
+import hashlib
 import logging
-from typing import Dict, Optional, Any
+import uuid
+from typing import Dict, List, Optional, Tuple, Any
 from datetime import datetime
-import json
+from pathlib import Path
 
 from app.core.ai_clients.google_ai import GoogleAIClient
 from app.core.ai_clients.kling_ai import KlingAIClient
-from app.models.video_job import VideoJob, JobStatus
+from app.services.prompt_enhancer import PromptEnhancer
+from app.services.prompt_templates import variant_enhance
+from app.services import coalescing, result_cache, status_cache, storage, upload_store
+from app.services.job_writer import get_job_writer
+from app.services.pipeline import Stage, NextStage, dispatch_many
+from app.services.media import download_file, extract_thumbnail
+from app.models.video_job import VideoJob, JobStatus, ConcurrentUpdateError
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+TERMINAL_STATUSES = {JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED}
+
+# Stage to re-run for an unfinished job, by the last stage recorded on it
+RESUME_STAGES = {
+    "queued": Stage.PREPARE,
+    Stage.PREPARE.value: Stage.PREPARE,
+    # A parent interrupted while fanning out prepares again and fans out the rest
+    "variants": Stage.PREPARE,
+    Stage.SUBMIT.value: Stage.SUBMIT,
+    Stage.AWAIT_PROVIDER.value: Stage.AWAIT_PROVIDER,
+    Stage.DOWNLOAD.value: Stage.DOWNLOAD,
+    Stage.POSTPROCESS.value: Stage.POSTPROCESS,
+}
+
 
 class VideoGenerator:
     """
     Main service for video generation pipeline
     Coordinates between different AI services
+
+    Submission only records a PENDING job and returns its id. The job then
+    moves through the stages in app.services.pipeline; each handler below
+    runs one stage and returns the next one.
     """
     
     def __init__(self):
         self.google_client = GoogleAIClient()
         self.kling_client = KlingAIClient()
+        self.prompt_enhancer = PromptEnhancer(self.google_client)
+
+    @staticmethod
+    def text_input(
+        prompt: str,
+        style_params: Optional[Dict[str, Any]] = None,
+        use_cache: bool = True
+    ) -> Dict[str, Any]:
+        """input_data of a text-to-video job"""
+        return {
+            "original_prompt": prompt,
+            "style_params": style_params or {},
+            "use_result_cache": use_cache
+        }
+
+    @staticmethod
+    def image_input(
+        image_path: str,
+        image_digest: str,
+        prompt: Optional[str],
+        motion_params: Optional[Dict[str, Any]] = None,
+        use_cache: bool = True
+    ) -> Dict[str, Any]:
+        """input_data of an image-to-video job"""
+        return {
+            "image_path": image_path,
+            "image_digest": image_digest,
+            "original_prompt": prompt,
+            "motion_params": motion_params or {},
+            "use_result_cache": use_cache
+        }
         
     async def generate_from_prompt(
         self, 
         prompt: str, 
         user_id: str,
-        style_params: Optional[Dict[str, Any]] = None
+        style_params: Optional[Dict[str, Any]] = None,
+        public: bool = False,
+        use_cache: bool = True,
+        variants: Optional[List[Dict[str, Any]]] = None
     ) -> Dict[str, Any]:
         """
-        Generate video from text prompt
+        Accept a text-to-video request
         
         Args:
             prompt: User's text prompt
             user_id: ID of the requesting user
             style_params: Optional style parameters (duration, aspect_ratio, etc.)
+            public: Allow coalescing with identical public requests of other users
+            use_cache: Reuse the output of an identical completed job (cache: bypass turns this off)
+            variants: Style overrides, one child job per entry sharing one enhancement
             
         Returns:
-            Dict containing job_id and initial status
+            Dict containing job_id and initial status; dispatch Stage.PREPARE
+            for the job to start generation unless "coalesced" is set
         """
-        try:
-            # Step 1: Enhance prompt using Google AI
-            logger.info(f"Enhancing prompt for user {user_id}: {prompt[:50]}...")
-            enhanced_prompt = await self.google_client.enhance_prompt(
-                prompt=prompt,
-                context="text-to-video"
-            )
-            
-            # Step 2: Create database job entry
-            job = await VideoJob.create(
-                user_id=user_id,
-                input_type="text",
-                input_data={
-                    "original_prompt": prompt,
-                    "enhanced_prompt": enhanced_prompt,
-                    "style_params": style_params or {}
-                },
-                status=JobStatus.PROCESSING
-            )
-            
-            logger.info(f"Created job {job.id} for user {user_id}")
-            
-            # Step 3: Generate video with Kling AI
-            kling_response = await self.kling_client.text_to_video(
-                prompt=enhanced_prompt,
-                duration=style_params.get("duration") if style_params else None,
-                aspect_ratio=style_params.get("aspect_ratio") if style_params else None,
-                style=style_params.get("style") if style_params else None
-            )
-            
-            # Step 4: Update job with Kling AI job ID and start polling
-            await job.update(
-                output_data={
-                    "kling_job_id": kling_response["job_id"],
-                    "estimated_time": kling_response.get("estimated_time", 120)
-                }
-            )
-            
-            # Step 5: Start background polling (in real app, this would be a Celery task)
-            # For now, we'll return the job info immediately
-            
-            return {
-                "job_id": job.id,
-                "status": "processing",
-                "message": "Video generation started successfully",
-                "estimated_time": kling_response.get("estimated_time", 120)
+        key = coalescing.request_key(
+            None if public else user_id,
+            "text",
+            {
+                "prompt": coalescing.normalize_prompt(prompt),
+                "style_params": style_params or {},
+                "use_cache": use_cache,
+                "variants": variants
             }
-            
-        except Exception as e:
-            logger.error(f"Error in text-to-video generation: {str(e)}")
-            
-            # Update job status if job was created
-            if 'job' in locals() and job:
-                await job.update(
-                    status=JobStatus.FAILED,
-                    error_message=str(e)
-                )
-                return {
-                    "job_id": job.id,
-                    "status": "failed",
-                    "message": f"Video generation failed: {str(e)}"
-                }
-            
-            # If job wasn't created, raise the exception
-            raise
+        )
+        return await self._accept(
+            key,
+            user_id=user_id,
+            input_type="text",
+            input_data=self.text_input(prompt, style_params, use_cache),
+            estimated_time=120,
+            params_field="style_params",
+            variants=variants
+        )
     
     async def generate_from_image(
         self,
         image_path: str,
         prompt: Optional[str],
         user_id: str,
-        motion_params: Optional[Dict[str, Any]] = None
+        motion_params: Optional[Dict[str, Any]] = None,
+        public: bool = False,
+        image_digest: Optional[str] = None,
+        use_cache: bool = True,
+        variants: Optional[List[Dict[str, Any]]] = None
     ) -> Dict[str, Any]:
         """
-        Generate video from uploaded image
+        Accept an image-to-video request
         
         Args:
             image_path: Path to uploaded image
             prompt: Optional text prompt for context
             user_id: ID of the requesting user
             motion_params: Motion/animation parameters
+            public: Allow coalescing with identical public requests of other users
+            image_digest: SHA-256 of the image content, computed from the file if omitted
+            use_cache: Reuse the output of an identical completed job (cache: bypass turns this off)
+            variants: Motion overrides, one child job per entry sharing one analysis
             
         Returns:
-            Dict containing job_id and initial status
+            Dict containing job_id and initial status; dispatch Stage.PREPARE
+            for the job to start generation unless "coalesced" is set
+        """
+        if image_digest is None:
+            image_digest = await asyncio.get_running_loop().run_in_executor(
+                None, lambda: hashlib.sha256(Path(image_path).read_bytes()).hexdigest()
+            )
+        key = coalescing.request_key(
+            None if public else user_id,
+            "image",
+            {
+                "image": image_digest,
+                "prompt": coalescing.normalize_prompt(prompt),
+                "motion_params": motion_params or {},
+                "use_cache": use_cache,
+                "variants": variants
+            }
+        )
+        return await self._accept(
+            key,
+            user_id=user_id,
+            input_type="image",
+            input_data=self.image_input(image_path, image_digest, prompt, motion_params, use_cache),
+            estimated_time=90,
+            params_field="motion_params",
+            variants=variants
+        )
+
+    async def _accept(
+        self,
+        key: str,
+        user_id: str,
+        input_type: str,
+        input_data: Dict[str, Any],
+        estimated_time: int,
+        params_field: str,
+        variants: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Create a PENDING job, or attach to an identical one already in flight
+
+        With variants the job becomes a parent: it runs the prepare stage
+        once and each child job (its params overridden by one variant) only
+        does the provider work.
+
+        Args:
+            key: Coalescing key of the request
+            user_id: ID of the requesting user
+            input_type: "text" or "image"
+            input_data: Job input stored on the row
+            estimated_time: Estimated generation time in seconds
+            params_field: input_data entry the variant overrides apply to
+            variants: Per-variant parameter overrides
+
+        Returns:
+            Dict containing job_id, initial status and child_job_ids for variants
         """
+        job_id = str(uuid.uuid4())
+        existing = await coalescing.claim(key, job_id)
+        if existing:
+            logger.info(
+                f"Attached {input_type}-to-video request of user {user_id} "
+                f"to in-flight job {existing}"
+            )
+            result = {
+                "job_id": existing,
+                "status": JobStatus.PENDING.value,
+                "message": "Attached to an identical request already in progress",
+                "estimated_time": estimated_time,
+                "coalesced": True
+            }
+            if variants:
+                # Identical keys include the variants, so the parent has the same children
+                children = await VideoJob.get_children(existing)
+                children.sort(key=lambda child: child.input_data.get("variant_index", 0))
+                result["child_job_ids"] = [child.id for child in children]
+            return result
+
+        child_ids = [str(uuid.uuid4()) for _ in variants or []]
+        output_data = {}
+        if variants:
+            input_data = {**input_data, "variants": variants}
+            output_data["child_job_ids"] = child_ids
+
+        rows = [{
+            "id": job_id,
+            "user_id": user_id,
+            "input_type": input_type,
+            "input_data": {**input_data, "coalesce_key": key},
+            "output_data": output_data,
+            "stage": "queued",
+            "status": JobStatus.PENDING,
+            # executemany needs the same keys in every row
+            "parent_job_id": None
+        }]
+        for index, (child_id, overrides) in enumerate(zip(child_ids, variants or [])):
+            child_input = {
+                field: value for field, value in input_data.items() if field != "variants"
+            }
+            child_input[params_field] = {**(input_data.get(params_field) or {}), **overrides}
+            child_input["variant_index"] = index
+            rows.append({
+                "id": child_id,
+                "user_id": user_id,
+                "input_type": input_type,
+                "input_data": child_input,
+                "output_data": {},
+                "stage": "queued",
+                "status": JobStatus.PENDING,
+                "parent_job_id": job_id
+            })
+
         try:
-            # Step 1: Analyze image with Google AI
-            image_analysis = await self.google_client.analyze_image(image_path)
+            # Parent and variants are inserted together
+            await VideoJob.bulk_create(rows)
+            if input_type == "image":
+                # Each job holds its own reference to the shared upload
+                await upload_store.add_refs([
+                    (input_data["image_digest"], row["id"]) for row in rows
+                ])
+        except Exception:
+            await coalescing.release(key, job_id)
+            raise
+
+        logger.info(f"Accepted {input_type}-to-video job {job_id} for user {user_id}"
+                    + (f" with {len(child_ids)} variants" if child_ids else ""))
+
+        result = {
+            "job_id": job_id,
+            "status": JobStatus.PENDING.value,
+            "message": "Video generation queued",
+            "estimated_time": estimated_time
+        }
+        if child_ids:
+            result["child_job_ids"] = child_ids
+        return result
+
+    async def generate_bulk(
+        self,
+        input_type: str,
+        jobs: List[Tuple[str, Dict[str, Any]]]
+    ) -> List[str]:
+        """
+        Accept many requests at once with a single multi-row INSERT
+
+        Bulk submissions skip single-flight coalescing; the result cache
+        still applies per job in the prepare stage.
+
+        Args:
+            input_type: "text" or "image"
+            jobs: (user_id, input_data) per job, built like the single-request input
+
+        Returns:
+            Job ids in input order; dispatch Stage.PREPARE for each to start generation
+        """
+        job_ids = await VideoJob.bulk_create([
+            {
+                "user_id": user_id,
+                "input_type": input_type,
+                "input_data": input_data,
+                "output_data": {},
+                "stage": "queued",
+                "status": JobStatus.PENDING
+            }
+            for user_id, input_data in jobs
+        ])
+        if input_type == "image":
+            await upload_store.add_refs([
+                (input_data["image_digest"], job_id)
+                for (_, input_data), job_id in zip(jobs, job_ids)
+            ])
+        logger.info(f"Accepted {len(job_ids)} {input_type}-to-video jobs in bulk")
+        return job_ids
+
+    async def dispatch_new(self, job_ids: List[str]) -> None:
+        """
+        Start the prepare stage of newly accepted jobs
+
+        The jobs and their coalescing leases are already committed, so a
+        job the broker never received would stay PENDING forever and
+        identical requests would keep attaching to it. If dispatch fails
+        the jobs (and their variants) are failed, which releases leases
+        and upload references, and the error is raised to the caller.
+
+        Args:
+            job_ids: Jobs returned by generate_from_prompt/generate_from_image
+                (unless coalesced) or generate_bulk
+
+        Raises:
+            Exception: The dispatch error
+        """
+        try:
+            dispatch_many([(Stage.PREPARE, job_id, 0, None) for job_id in job_ids])
+        except Exception as e:
+            logger.error(f"Could not queue {len(job_ids)} accepted jobs, failing them: {str(e)}")
+            jobs = await VideoJob.get_many(job_ids)
+            child_ids = [
+                child_id
+                for job in jobs
+                for child_id in (job.output_data or {}).get("child_job_ids") or []
+            ]
+            await self._fail_undispatched(jobs + await VideoJob.get_many(child_ids), e)
+            raise
             
-            # Step 2: Generate enhanced prompt
+    async def recover(self) -> List[Tuple[Stage, str]]:
+        """
+        Find the stage each unfinished job has to resume from
+
+        Used when the in-process pipeline starts: its queues and delayed
+        polls died with the previous process, so PENDING/PROCESSING jobs
+        (and the coalescing leases identical requests attach to) would
+        otherwise hang. Jobs with a retry still scheduled are left to the
+        retry pump, variants still queued are left to their parent's fan
+        out, and jobs in an unknown stage are failed, which releases their
+        leases and upload references.
+
+        Returns:
+            (stage, job_id) to dispatch per resumable job
+        """
+        from app.services import retry_scheduler
+
+        resumable: List[Tuple[Stage, str]] = []
+        for job in await VideoJob.list_unfinished():
+            job_id, last_stage = str(job.id), str(job.stage)
+            if job.parent_job_id and last_stage == "queued":
+                continue
+            stage = RESUME_STAGES.get(last_stage)
+            if stage is None:
+                await self.fail(job_id, f"Interrupted in stage {last_stage} by a restart")
+                continue
+            resumable.append((stage, job_id))
+
+        try:
+            retrying = await retry_scheduler.scheduled(
+                [f"{stage.value}:{job_id}" for stage, job_id in resumable]
+            )
+        except Exception as e:
+            # The retry pump cannot run without Redis either
+            logger.warning(f"Could not check scheduled retries of unfinished jobs: {str(e)}")
+            retrying = [False] * len(resumable)
+
+        resumable = [item for item, retry in zip(resumable, retrying) if not retry]
+        logger.info(f"Resuming {len(resumable)} unfinished jobs")
+        return resumable
+
+    async def _fail_undispatched(self, jobs: List[VideoJob], error: Exception) -> None:
+        """Fail jobs whose stage could not be queued"""
+        for job in jobs:
+            if job.status in TERMINAL_STATUSES:
+                continue
+            try:
+                await self._record_stage(
+                    job,
+                    "failed",
+                    status=JobStatus.FAILED,
+                    error_message=f"Could not queue job: {str(error)}"
+                )
+            except Exception as e:
+                logger.error(f"Could not fail undispatched job {job.id}: {str(e)}")
+
+    async def _load_active(self, job_id: str) -> Optional[VideoJob]:
+        """Load a job for a stage, skipping jobs that already finished or were cancelled"""
+        job = await VideoJob.get(job_id)
+        if not job:
+            logger.error(f"Job {job_id} not found for processing")
+            return None
+        if job.status in TERMINAL_STATUSES:
+            logger.info(f"Skipping job {job_id} with status {job.status.value}")
+            return None
+        return job
+
+    async def prepare(self, job_id: str) -> NextStage:
+        """
+        Prepare stage: analyze the image (if any) and enhance the prompt
+        """
+        job = await self._load_active(job_id)
+        if not job:
+            return None
+
+        await self._record_stage(job, Stage.PREPARE.value, status=JobStatus.PROCESSING)
+        input_data = dict(job.input_data or {})
+        use_cache = settings.RESULT_CACHE_ENABLED and input_data.get("use_result_cache", True)
+        # A multi-variant parent prepares once and hands the result to its children
+        is_parent = bool(input_data.get("variants"))
+        varied = self._varied_params(input_data)
+
+        if job.input_type == "image":
+            if use_cache and not is_parent and input_data.get("image_digest"):
+                input_data["result_cache_key"] = result_cache.image_key(
+                    input_data["image_digest"],
+                    input_data.get("original_prompt"),
+                    input_data.get("motion_params")
+                )
+                # Checked before image analysis so a hit skips Gemini too
+                if await self._complete_from_cache(job, input_data):
+                    return None
+
+            # Identical uploads share one analysis
+            digest = input_data.get("image_digest")
+            image_analysis = await upload_store.get_analysis(digest) if digest else None
+            if image_analysis is None:
+                image_analysis = await self.google_client.analyze_image(input_data["image_path"])
+                # Fallback descriptions of failed analyses are not worth sharing
+                if digest and image_analysis.get("analyzed"):
+                    await upload_store.set_analysis(digest, image_analysis)
+            prompt = input_data.get("original_prompt")
             if prompt:
                 combined_prompt = f"{image_analysis['description']}. {prompt}"
             else:
                 combined_prompt = image_analysis['description']
             
-            enhanced_prompt = await self.google_client.enhance_prompt(
+            input_data["image_analysis"] = image_analysis.get("description")
+            input_data["enhanced_prompt"] = await self.prompt_enhancer.enhance(
                 combined_prompt,
-                context="image-to-video"
+                context="image-to-video",
+                params=input_data.get("motion_params"),
+                omit=varied
             )
-            
-            # Step 3: Create job entry
-            job = await VideoJob.create(
-                user_id=user_id,
-                input_type="image",
-                input_data={
-                    "image_path": image_path,
-                    "original_prompt": prompt,
-                    "enhanced_prompt": enhanced_prompt,
-                    "motion_params": motion_params
-                },
-                status=JobStatus.PROCESSING
+        else:
+            logger.info(
+                f"Enhancing prompt for job {job.id}: {input_data['original_prompt'][:50]}..."
+            )
+            input_data["enhanced_prompt"] = await self.prompt_enhancer.enhance(
+                prompt=input_data["original_prompt"],
+                context="text-to-video",
+                params=input_data.get("style_params"),
+                omit=varied
+            )
+            if use_cache and not is_parent:
+                input_data["result_cache_key"] = result_cache.text_key(
+                    input_data["enhanced_prompt"], input_data.get("style_params")
+                )
+                if await self._complete_from_cache(job, input_data):
+                    return None
+
+        await job.update(input_data=input_data)
+        if is_parent:
+            await self._fan_out(job, use_cache)
+            return None
+        return Stage.SUBMIT, 0.0
+
+    @staticmethod
+    def _varied_params(input_data: Dict[str, Any]) -> set:
+        """Params overridden by any variant of a multi-variant request"""
+        return {key for overrides in input_data.get("variants") or [] for key in overrides}
+
+    async def _fan_out(self, parent: VideoJob, use_cache: bool) -> None:
+        """
+        Specialize the parent's enhancement for its variants and submit them
+
+        Args:
+            parent: Prepared multi-variant parent job
+            use_cache: Whether variants may be served from the result cache
+        """
+        children = await VideoJob.get_children(parent.id)
+        await self._record_stage(parent, "variants")
+        varied = self._varied_params(parent.input_data)
+
+        ready = []
+        for child in children:
+            # Variants already handed on before a restart are not submitted twice
+            if child.status in TERMINAL_STATUSES or child.stage != "queued":
+                continue
+            child_input = dict(child.input_data or {})
+            # The shared enhancement left the varied params out; add this variant's
+            params_field = "motion_params" if child.input_type == "image" else "style_params"
+            child_input["enhanced_prompt"] = variant_enhance(
+                parent.input_data["enhanced_prompt"], child_input.get(params_field), varied
+            )
+            if "image_analysis" in parent.input_data:
+                child_input["image_analysis"] = parent.input_data["image_analysis"]
+
+            if use_cache:
+                if child.input_type == "image":
+                    child_input["result_cache_key"] = result_cache.image_key(
+                        child_input.get("image_digest"),
+                        child_input.get("original_prompt"),
+                        child_input.get("motion_params")
+                    )
+                else:
+                    child_input["result_cache_key"] = result_cache.text_key(
+                        child_input["enhanced_prompt"], child_input.get("style_params")
+                    )
+                if await self._complete_from_cache(child, child_input):
+                    continue
+
+            await child.update(input_data=child_input)
+            ready.append((Stage.SUBMIT, child.id, 0, None))
+
+        if ready:
+            try:
+                dispatch_many(ready)
+            except Exception as e:
+                # Failing the variants finishes the parent through refresh_parent
+                logger.error(f"Could not queue the variants of job {parent.id}: {str(e)}")
+                variants = await VideoJob.get_many([job_id for _, job_id, _, _ in ready])
+                await self._fail_undispatched(variants, e)
+                return
+        logger.info(f"Fanned out {len(ready)} of {len(children)} variants of job {parent.id}")
+
+    async def refresh_parent(self, parent_job_id: str) -> None:
+        """Finish a multi-variant parent once all of its variants finished"""
+        parent = await VideoJob.get(parent_job_id)
+        if not parent or parent.status in TERMINAL_STATUSES:
+            return
+
+        children = await VideoJob.get_children(parent_job_id)
+        if any(child.status not in TERMINAL_STATUSES for child in children):
+            return
+
+        completed = [child.id for child in children if child.status == JobStatus.COMPLETED]
+        if completed:
+            await self._record_stage(
+                parent, "completed", status=JobStatus.COMPLETED, completed_variants=completed
+            )
+        else:
+            await self._record_stage(
+                parent, "failed", status=JobStatus.FAILED, error_message="All variants failed"
             )
             
-            # Step 4: Generate video with Kling AI
+    async def _complete_from_cache(self, job: VideoJob, input_data: Dict[str, Any]) -> bool:
+        """
+        Finish a job against the output of an identical completed job
+
+        Args:
+            job: Job in the prepare stage
+            input_data: The job's input, including result_cache_key
+
+        Returns:
+            True if the job was completed from the result cache
+        """
+        cached = await result_cache.lookup(input_data["result_cache_key"])
+        if not cached:
+            return False
+
+        await job.update(input_data=input_data)
+        source_job_id = cached.pop("source_job_id")
+        await self._record_stage(
+            job,
+            "completed",
+            status=JobStatus.COMPLETED,
+            cached_from=source_job_id,
+            **cached
+        )
+        logger.info(f"Job {job.id} served from the result cache (output of job {source_job_id})")
+        return True
+
+    async def submit(self, job_id: str) -> NextStage:
+        """
+        Submit stage: create the Kling AI job
+        """
+        job = await self._load_active(job_id)
+        if not job:
+            return None
+
+        await self._record_stage(job, Stage.SUBMIT.value)
+        input_data = job.input_data
+
+        if job.input_type == "image":
             kling_response = await self.kling_client.image_to_video(
-                image_path=image_path,
-                prompt=enhanced_prompt,
-                motion_params=motion_params
+                image_path=input_data["image_path"],
+                prompt=input_data["enhanced_prompt"],
+                motion_params=input_data.get("motion_params")
+            )
+        else:
+            style_params = input_data.get("style_params") or {}
+            kling_response = await self.kling_client.text_to_video(
+                prompt=input_data["enhanced_prompt"],
+                duration=style_params.get("duration"),
+                aspect_ratio=style_params.get("aspect_ratio"),
+                style=style_params.get("style"),
+                seed=style_params.get("seed"),
+                quality=style_params.get("quality")
             )
             
-            # Step 5: Update job with result
-            await job.update(
-                status=JobStatus.COMPLETED,
-                output_data={
-                    "video_url": kling_response["video_url"],
-                    "duration": kling_response["duration"],
-                    "generated_at": datetime.utcnow().isoformat()
-                }
+        await self._record_stage(
+            job,
+            Stage.AWAIT_PROVIDER.value,
+            kling_job_id=kling_response["job_id"],
+            estimated_time=kling_response.get("estimated_time", 120),
+            submitted_at=datetime.utcnow().isoformat()
+        )
+        return Stage.AWAIT_PROVIDER, settings.STATUS_POLL_INTERVAL
+
+    async def poll(self, job_id: str) -> NextStage:
+        """
+        Await-provider stage: check Kling AI once and decide whether to poll again
+        """
+        job = await self._load_active(job_id)
+        if not job:
+            return None
+
+        output_data = job.output_data or {}
+        submitted_at = datetime.fromisoformat(output_data["submitted_at"])
+        elapsed = (datetime.utcnow() - submitted_at).total_seconds()
+        timed_out = elapsed > settings.STATUS_POLL_TIMEOUT
+
+        try:
+            status = await self.kling_client.check_status(output_data["kling_job_id"])
+        except Exception as e:
+            logger.error(f"Error polling Kling status for job {job_id}: {str(e)}")
+            if timed_out:
+                await self.fail(job_id, f"Polling timeout: {str(e)}")
+                return None
+            return Stage.AWAIT_PROVIDER, settings.STATUS_POLL_INTERVAL
+
+        if status["status"] == "completed":
+            await self._record_stage(
+                job,
+                Stage.DOWNLOAD.value,
+                progress=100,
+                video_url=status["video_url"],
+                duration=status["duration"],
+                generated_at=datetime.utcnow().isoformat()
             )
+            return Stage.DOWNLOAD, 0.0
             
-            return {
-                "job_id": job.id,
-                "status": "processing",
-                "message": "Video generation started successfully"
-            }
+        if status["status"] == "failed":
+            await self.fail(job_id, status.get("error") or "Unknown error")
+            return None
             
-        except Exception as e:
-            logger.error(f"Error in image-to-video generation: {str(e)}")
-            if 'job' in locals():
-                await job.update(
-                    status=JobStatus.FAILED,
-                    error_message=str(e)
+        if timed_out:
+            await self.fail(job_id, "Polling timeout: provider did not finish in time")
+            return None
+            
+        await self._record_progress(job, status.get("progress"))
+        return Stage.AWAIT_PROVIDER, settings.STATUS_POLL_INTERVAL
+
+    async def _record_progress(self, job: VideoJob, progress: Any) -> None:
+        """
+        Track provider progress of a job
+
+        Every poll refreshes the status cache; the row is only written once
+        progress moved PROGRESS_WRITE_DELTA points past the persisted value,
+        so polling does not hit the database on every tick.
+
+        Args:
+            job: Job being polled
+            progress: Progress percentage reported by Kling AI
+        """
+        try:
+            progress = max(0, min(100, int(progress or 0)))
+        except (TypeError, ValueError):
+            return
+        persisted = job.progress or 0
+        if progress <= persisted:
+            return
+
+        if progress - persisted < settings.PROGRESS_WRITE_DELTA:
+            job.progress = progress
+            await status_cache.set_many([job])
+        elif settings.JOB_WRITER_ENABLED:
+            # Nothing reads progress back before the next tick, so don't wait for the commit
+            get_job_writer().record_progress(job.id, progress)
+            job.progress = progress
+            await status_cache.set_many([job])
+        else:
+            # Writes through to the status cache itself
+            await job.update(progress=progress)
+
+    async def download(self, job_id: str) -> NextStage:
+        """
+        Download stage: copy the provider's video into OUTPUT_DIR
+        """
+        job = await self._load_active(job_id)
+        if not job:
+            return None
+
+        output_path = storage.sharded_path(settings.OUTPUT_DIR, f"{job.id}.mp4")
+        size = await download_file(job.output_data["video_url"], output_path)
+
+        await self._record_stage(
+            job,
+            Stage.POSTPROCESS.value,
+            output_path=str(output_path),
+            output_url=storage.output_url(output_path),
+            output_size=size
+        )
+        return Stage.POSTPROCESS, 0.0
+
+    async def postprocess(self, job_id: str) -> NextStage:
+        """
+        Post-process stage: render a thumbnail (CPU bound, off the event loop)
+        """
+        job = await self._load_active(job_id)
+        if not job:
+            return None
+
+        output_path = Path(job.output_data["output_path"])
+        thumbnail_path = output_path.with_suffix(".jpg")
+        loop = asyncio.get_running_loop()
+        has_thumbnail = await loop.run_in_executor(
+            None, extract_thumbnail, output_path, thumbnail_path
+        )
+
+        fields = {"thumbnail_url": storage.output_url(thumbnail_path)} if has_thumbnail else {}
+        await self._record_stage(job, "completed", status=JobStatus.COMPLETED, **fields)
+
+        cache_key = (job.input_data or {}).get("result_cache_key")
+        if cache_key:
+            await result_cache.store(cache_key, job.id, job.output_data)
+        return None
+
+    async def fail(self, job_id: str, message: str) -> None:
+        """
+        Mark a job as failed unless it already finished
+
+        Args:
+            job_id: Job to fail
+            message: Error message stored on the job
+        """
+        job = await VideoJob.get(job_id)
+        if job and job.status not in TERMINAL_STATUSES:
+            await self._record_stage(job, "failed", status=JobStatus.FAILED, error_message=message)
+
+    async def _record_stage(self, job: VideoJob, stage: str, **fields) -> None:
+        """
+        Record a stage transition as a job event
+
+        The event carries everything that happened; the job row only gets
+        its projection columns updated, and output_data is rewritten only
+        when the stage produced new output fields. Stage writes without a
+        status keep the job PROCESSING, so the transition check rejects
+        them once the job was cancelled or finished elsewhere.
+
+        Args:
+            job: Job being processed
+            stage: Name of the stage being entered
+            **fields: Column updates (status, error_message, progress) or output_data entries
+
+        Raises:
+            InvalidTransitionError: If the job already reached a terminal status
+        """
+        columns = {
+            key: fields.pop(key) for key in ("status", "error_message", "progress") if key in fields
+        }
+        projection = {"stage": stage, "status": JobStatus.PROCESSING, **columns}
+        if "kling_job_id" in fields:
+            projection["provider_job_id"] = fields["kling_job_id"]
+        if "output_url" in fields:
+            projection["output_url"] = fields["output_url"]
+        if fields:
+            projection["output_data"] = {**(job.output_data or {}), **fields}
+
+        payload = dict(fields)
+        if "status" in columns:
+            payload["status"] = columns["status"].value
+        if "error_message" in columns:
+            payload["error_message"] = columns["error_message"]
+        if "progress" in columns:
+            payload["progress"] = columns["progress"]
+
+        if settings.JOB_WRITER_ENABLED:
+            try:
+                # Group-committed with other jobs' writes; awaited because the next
+                # stage reads the row
+                row = await get_job_writer().record(
+                    job.id, job.version, stage, payload, **projection
                 )
-            raise
+            except ConcurrentUpdateError:
+                # Written since we loaded it: re-check and re-apply the change on the fresh row
+                await job.append_event(stage, payload, **projection)
+            else:
+                for key, value in projection.items():
+                    setattr(job, key, value)
+                job.version, job.event_seq = row.version, row.event_seq
+                job.updated_at = row.updated_at
+                await status_cache.set_many([job])
+        else:
+            # Writes through to the status cache itself
+            await job.append_event(stage, payload, **projection)
+        if columns.get("status") in TERMINAL_STATUSES:
+            await coalescing.release_job(job)
+            if job.input_type == "image":
+                await upload_store.release([job.id])
+            if job.parent_job_id:
+                await self.refresh_parent(job.parent_job_id)
     
     async def check_job_status(self, job_id: str) -> Dict[str, Any]:
         """
@@ -204,53 +846,10 @@ class VideoGenerator:
         return {
             "job_id": job.id,
             "status": job.status.value,
+            "stage": job.stage,
+            "progress": job.progress or 0,
             "created_at": job.created_at.isoformat(),
             "updated_at": job.updated_at.isoformat(),
             "output": job.output_data if job.status == JobStatus.COMPLETED else None,
             "error": job.error_message if job.status == JobStatus.FAILED else None
         }
-    
-    async def _handle_kling_polling(self, kling_job_id: str, db_job_id: str):
-        """
-        Poll Kling AI for video generation status
-        
-        Args:
-            kling_job_id: Kling AI's job ID
-            db_job_id: Our database job ID
-        """
-        max_attempts = 60  # Poll for max 10 minutes
-        poll_interval = 10  # Poll every 10 seconds
-        
-        for attempt in range(max_attempts):
-            try:
-                status = await self.kling_client.check_status(kling_job_id)
-                
-                if status["status"] == "completed":
-                    job = await VideoJob.get(db_job_id)
-                    await job.update(
-                        status=JobStatus.COMPLETED,
-                        output_data={
-                            "video_url": status["video_url"],
-                            "duration": status["duration"],
-                            "generated_at": datetime.utcnow().isoformat()
-                        }
-                    )
-                    break
-                elif status["status"] == "failed":
-                    job = await VideoJob.get(db_job_id)
-                    await job.update(
-                        status=JobStatus.FAILED,
-                        error_message=status.get("error", "Unknown error")
-                    )
-                    break
-                    
-                await asyncio.sleep(poll_interval)
-                
-            except Exception as e:
-                logger.error(f"Error polling Kling status: {str(e)}")
-                if attempt == max_attempts - 1:
-                    job = await VideoJob.get(db_job_id)
-                    await job.update(
-                        status=JobStatus.FAILED,
-                        error_message=f"Polling timeout: {str(e)}"
-                    )
\ No newline at end of file
@@ -0,0 +1,117 @@
+"""
+asyncio-native worker for provider status checks
+
+A status check is a ~200 ms I/O call, so running one per prefork process
+wastes a whole OS process per in-flight poll. This worker claims due
+checks from the Redis status queue and runs up to
+STATUS_WORKER_CONCURRENCY of them concurrently in a single event loop.
+
+Run with: python -m app.status_worker
+"""
+import asyncio
+import logging
+import signal
+from typing import Optional, Set
+
+from .core.config import settings
+from .core.metrics import metrics
+from .services import status_queue
+from .services.job_writer import get_job_writer
+from .services.pipeline import Stage, run_stage, dispatch
+from .services.video_generator import VideoGenerator
+
+logger = logging.getLogger(__name__)
+
+
+class StatusCheckWorker:
+    """
+    Bounded-concurrency consumer of the status check queue
+    """
+
+    def __init__(self, concurrency: int = None, poll_interval: float = 0.2):
+        """
+        Args:
+            concurrency: Maximum status checks in flight
+            poll_interval: Seconds to sleep when nothing is due
+        """
+        self.concurrency = concurrency or settings.STATUS_WORKER_CONCURRENCY
+        self.poll_interval = poll_interval
+        self.generator = VideoGenerator()
+        self._in_flight: Set[asyncio.Task] = set()
+        self._stopping = asyncio.Event()
+
+    def stop(self) -> None:
+        """Stop claiming new checks; in-flight checks are allowed to finish"""
+        self._stopping.set()
+
+    async def run(self) -> None:
+        """Claim and run due status checks until stopped"""
+        logger.info(f"Status worker started with concurrency {self.concurrency}")
+        while not self._stopping.is_set():
+            free = self.concurrency - len(self._in_flight)
+            try:
+                checks = await status_queue.claim_due(min(free, settings.STATUS_WORKER_BATCH_SIZE))
+            except Exception as e:
+                logger.error(f"Could not claim status checks: {str(e)}")
+                checks = []
+
+            for job_id, attempt, first_failed_at in checks:
+                task = asyncio.create_task(self._check(job_id, attempt, first_failed_at))
+                self._in_flight.add(task)
+                task.add_done_callback(self._in_flight.discard)
+
+            metrics.set_gauge("status_worker_in_flight", len(self._in_flight))
+            if not checks:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+        await get_job_writer().flush()
+        await self.generator.kling_client.client.aclose()
+        logger.info("Status worker stopped")
+
+    async def _check(
+        self,
+        job_id: str,
+        attempt: int = 0,
+        first_failed_at: Optional[float] = None
+    ) -> None:
+        try:
+            next_stage = await run_stage(
+                self.generator, Stage.AWAIT_PROVIDER, job_id, attempt, first_failed_at
+            )
+            metrics.inc("status_worker_checks_total")
+
+            if next_stage and next_stage[0] == Stage.AWAIT_PROVIDER:
+                await status_queue.schedule_status_check_async(job_id, next_stage[1])
+                return
+
+            await status_queue.complete(job_id)
+            if next_stage:
+                following, delay = next_stage
+                # Celery publishing is blocking; keep it off the event loop
+                await asyncio.get_running_loop().run_in_executor(
+                    None, dispatch, following, job_id, delay
+                )
+        except Exception as e:
+            # The claim expires after the visibility timeout and is retried
+            logger.error(f"Status check failed for job {job_id}: {str(e)}")
+
+
+async def main() -> None:
+    worker = StatusCheckWorker()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+    await worker.run()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(
+        level=logging.DEBUG if settings.DEBUG else logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+    asyncio.run(main())
@@ -1,40 +1,65 @@
 """
 Celery tasks for video generation
+
+Each pipeline stage is a task on its own queue (see app.services.pipeline)
+so stages can be scaled with independently sized workers.
 """
-from celery import current_task
+import asyncio
+from typing import Optional
 from ..worker import celery_app
 from ..services.video_generator import VideoGenerator
-from ..models.video_job import VideoJob, JobStatus
+from ..services.pipeline import Stage, run_stage, dispatch
+from ..services import archiver, retry_scheduler, storage
+from ..services.job_writer import get_job_writer
+from ..services.prompt_enhancer import cancel_background
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+async def _run_and_dispatch(
+    stage: Stage,
+    job_id: str,
+    attempt: int = 0,
+    first_failed_at: Optional[float] = None
+) -> None:
+    """Run a stage in a fresh generator and hand the job to the next stage"""
+    generator = VideoGenerator()
+    try:
+        next_stage = await run_stage(generator, stage, job_id, attempt, first_failed_at)
+    finally:
+        # Pending job writes must be committed before this task's event loop ends
+        await get_job_writer().flush()
+        # Late Gemini calls would be cut off by asyncio.run anyway; end them explicitly
+        await cancel_background()
+        await generator.kling_client.client.aclose()
+
+    if next_stage:
+        following, delay = next_stage
+        dispatch(following, job_id, delay)
+
+
+async def _accept_and_dispatch(generator: VideoGenerator, accepted) -> dict:
+    """Accept a request and start its prepare stage (failing the job if it cannot be queued)"""
+    try:
+        result = await accepted
+        if not result.get("coalesced"):
+            await generator.dispatch_new([result["job_id"]])
+        return result
+    finally:
+        await get_job_writer().flush()
+        await generator.kling_client.client.aclose()
+
+
 @celery_app.task(bind=True)
 def generate_video_from_prompt(self, prompt: str, user_id: str, style_params: dict = None):
     """
     Background task for text-to-video generation
     """
-    try:
-        # Update task status
-        self.update_state(state='PROGRESS', meta={'status': 'Starting video generation'})
-        
-        # Initialize video generator
-        generator = VideoGenerator()
-        
-        # This would be the actual async video generation
-        # For now, we'll simulate the process
-        result = {
-            'job_id': current_task.request.id,
-            'status': 'processing',
-            'message': 'Video generation in progress'
-        }
-        
-        return result
-        
-    except Exception as e:
-        logger.error(f"Error in video generation task: {str(e)}")
-        raise self.retry(exc=e, countdown=60, max_retries=3)
+    generator = VideoGenerator()
+    return asyncio.run(_accept_and_dispatch(
+        generator, generator.generate_from_prompt(prompt, user_id, style_params)
+    ))
 
 
 @celery_app.task(bind=True)
@@ -42,34 +67,71 @@ def generate_video_from_image(self, image_path: str, prompt: str, user_id: str,
     """
     Background task for image-to-video generation
     """
-    try:
-        self.update_state(state='PROGRESS', meta={'status': 'Processing image'})
-        
-        generator = VideoGenerator()
-        
-        result = {
-            'job_id': current_task.request.id,
-            'status': 'processing',
-            'message': 'Image-to-video generation in progress'
-        }
-        
-        return result
-        
-    except Exception as e:
-        logger.error(f"Error in image-to-video task: {str(e)}")
-        raise self.retry(exc=e, countdown=60, max_retries=3)
+    generator = VideoGenerator()
+    return asyncio.run(_accept_and_dispatch(
+        generator, generator.generate_from_image(image_path, prompt, user_id, motion_params)
+    ))
 
 
 @celery_app.task
-def check_kling_status(kling_job_id: str, db_job_id: str):
+def prepare_job(job_id: str, attempt: int = 0, first_failed_at: Optional[float] = None):
     """
-    Background task to poll Kling AI status
+    Stage task: image analysis and prompt enhancement
     """
-    try:
-        # This would poll Kling AI API for job status
-        # and update the database accordingly
-        pass
-        
-    except Exception as e:
-        logger.error(f"Error checking Kling status: {str(e)}")
-        raise
\ No newline at end of file
+    asyncio.run(_run_and_dispatch(Stage.PREPARE, job_id, attempt, first_failed_at))
+
+
+@celery_app.task
+def submit_job(job_id: str, attempt: int = 0, first_failed_at: Optional[float] = None):
+    """
+    Stage task: submit the job to Kling AI
+    """
+    asyncio.run(_run_and_dispatch(Stage.SUBMIT, job_id, attempt, first_failed_at))
+
+
+@celery_app.task
+def check_kling_status(job_id: str, attempt: int = 0, first_failed_at: Optional[float] = None):
+    """
+    Stage task: poll Kling AI status once, re-queueing itself until done
+    """
+    asyncio.run(_run_and_dispatch(Stage.AWAIT_PROVIDER, job_id, attempt, first_failed_at))
+
+
+@celery_app.task
+def download_output(job_id: str, attempt: int = 0, first_failed_at: Optional[float] = None):
+    """
+    Stage task: download the generated video
+    """
+    asyncio.run(_run_and_dispatch(Stage.DOWNLOAD, job_id, attempt, first_failed_at))
+
+
+@celery_app.task
+def postprocess_output(job_id: str, attempt: int = 0, first_failed_at: Optional[float] = None):
+    """
+    Stage task: CPU-bound post-processing (thumbnails)
+    """
+    asyncio.run(_run_and_dispatch(Stage.POSTPROCESS, job_id, attempt, first_failed_at))
+
+
+@celery_app.task
+def pump_delayed_retries():
+    """
+    Periodic task (celery beat): move due stage retries back onto their queues
+    """
+    return asyncio.run(retry_scheduler.pump())
+
+
+@celery_app.task
+def archive_terminal_jobs():
+    """
+    Periodic task (celery beat): move old terminal jobs to video_jobs_archive
+    """
+    return asyncio.run(archiver.archive_terminal_jobs())
+
+
+@celery_app.task
+def collect_storage_garbage():
+    """
+    Periodic task (celery beat): delete stale uploads and temp files, evict old outputs
+    """
+    return asyncio.run(storage.collect_garbage())
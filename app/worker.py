@@ -26,13 +26,53 @@ celery_app.conf.update(
     worker_max_tasks_per_child=1000,
 )
 
-# Task routing
+# Task routing: one queue per pipeline stage so each can be scaled separately
+#   celery -A app.worker worker -Q video_prepare,video_submit -c $STAGE_PREPARE_CONCURRENCY
+#   python -m app.status_worker    (status checks, STATUS_CHECK_BACKEND=asyncio)
+#   celery -A app.worker worker -Q status_check -c $STAGE_AWAIT_CONCURRENCY
+#       (status checks, STATUS_CHECK_BACKEND=celery)
+#   celery -A app.worker worker -Q video_download -c $STAGE_DOWNLOAD_CONCURRENCY
+#   celery -A app.worker worker -Q video_postprocess -c $STAGE_POSTPROCESS_CONCURRENCY
 celery_app.conf.task_routes = {
     'app.tasks.video_tasks.generate_video_from_prompt': {'queue': 'video_generation'},
     'app.tasks.video_tasks.generate_video_from_image': {'queue': 'video_generation'},
+    'app.tasks.video_tasks.prepare_job': {'queue': 'video_prepare'},
+    'app.tasks.video_tasks.submit_job': {'queue': 'video_submit'},
     'app.tasks.video_tasks.check_kling_status': {'queue': 'status_check'},
+    'app.tasks.video_tasks.download_output': {'queue': 'video_download'},
+    'app.tasks.video_tasks.postprocess_output': {'queue': 'video_postprocess'},
+    'app.tasks.video_tasks.pump_delayed_retries': {'queue': 'video_generation'},
+    'app.tasks.video_tasks.archive_terminal_jobs': {'queue': 'video_generation'},
+    'app.tasks.video_tasks.collect_storage_garbage': {'queue': 'video_generation'},
 }
 
+# Delayed stage retries live in Redis (app.services.retry_scheduler) instead of
+# countdown messages held by workers; beat pumps the due ones back:
+#   celery -A app.worker beat
+celery_app.conf.beat_schedule = {
+    'pump-delayed-retries': {
+        'task': 'app.tasks.video_tasks.pump_delayed_retries',
+        'schedule': settings.RETRY_PUMP_INTERVAL,
+        'options': {'expires': settings.RETRY_PUMP_INTERVAL * 5},
+    },
+}
+
+# Old terminal jobs move to video_jobs_archive (app.services.archiver)
+if settings.ARCHIVE_ENABLED:
+    celery_app.conf.beat_schedule['archive-terminal-jobs'] = {
+        'task': 'app.tasks.video_tasks.archive_terminal_jobs',
+        'schedule': settings.ARCHIVE_INTERVAL,
+        'options': {'expires': settings.ARCHIVE_INTERVAL},
+    }
+
+# Disk budget and cleanup of uploads, outputs and temp files (app.services.storage)
+if settings.STORAGE_GC_ENABLED:
+    celery_app.conf.beat_schedule['collect-storage-garbage'] = {
+        'task': 'app.tasks.video_tasks.collect_storage_garbage',
+        'schedule': settings.STORAGE_GC_INTERVAL,
+        'options': {'expires': settings.STORAGE_GC_INTERVAL},
+    }
+
 # Autodiscover tasks
 celery_app.autodiscover_tasks()
 
@@ -0,0 +1,121 @@
+"""
+Benchmark job state writes: one commit per update vs. write-behind group commit
+
+Simulates a status sweep where every job gets a stream of status/progress
+updates. "per-update" mirrors VideoJob.update (one transaction per
+change); "group" mirrors app.services.job_writer (changes coalesced per
+job, flushed every --batch jobs in one transaction with executemany).
+Runs against a file-backed SQLite database so commit (fsync) cost shows.
+
+Usage: python -m scripts.bench_group_commit [--jobs 2000] [--updates 10] [--batch 200]
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+
+def _setup(path: str, jobs: int) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=FULL")
+    conn.execute(
+        "CREATE TABLE video_jobs (id TEXT PRIMARY KEY, status TEXT, stage TEXT, progress INTEGER, "
+        "updated_at REAL)"
+    )
+    conn.execute("BEGIN")
+    conn.executemany(
+        "INSERT INTO video_jobs VALUES (?, 'processing', 'await_provider', 0, 0)",
+        [(f"job-{i}",) for i in range(jobs)]
+    )
+    conn.execute("COMMIT")
+    return conn
+
+
+def _updates(jobs: int, updates: int):
+    # Interleaved like a sweep: every job progresses a little each round
+    for round_ in range(updates):
+        for i in range(jobs):
+            progress = (round_ + 1) * 100 // updates
+            status = "completed" if progress == 100 else "processing"
+            yield f"job-{i}", status, progress
+
+
+def per_update(conn: sqlite3.Connection, jobs: int, updates: int) -> dict:
+    commits = 0
+    wall, cpu = time.perf_counter(), time.process_time()
+    for job_id, status, progress in _updates(jobs, updates):
+        conn.execute("BEGIN")
+        conn.execute(
+            "UPDATE video_jobs SET status = ?, progress = ?, updated_at = ? WHERE id = ?",
+            (status, progress, time.time(), job_id)
+        )
+        conn.execute("COMMIT")
+        commits += 1
+    return {
+        "commits": commits,
+        "wall": time.perf_counter() - wall,
+        "cpu": time.process_time() - cpu
+    }
+
+
+def group(conn: sqlite3.Connection, jobs: int, updates: int, batch: int) -> dict:
+    commits = 0
+    pending = {}
+
+    def flush() -> None:
+        nonlocal commits
+        conn.execute("BEGIN")
+        conn.executemany(
+            "UPDATE video_jobs SET status = ?, progress = ?, updated_at = ? WHERE id = ?",
+            [
+                (status, progress, time.time(), job_id)
+                for job_id, (status, progress) in pending.items()
+            ]
+        )
+        conn.execute("COMMIT")
+        commits += 1
+        pending.clear()
+
+    wall, cpu = time.perf_counter(), time.process_time()
+    for job_id, status, progress in _updates(jobs, updates):
+        # Latest state wins within a flush
+        pending[job_id] = (status, progress)
+        if len(pending) >= batch:
+            flush()
+    if pending:
+        flush()
+    return {
+        "commits": commits,
+        "wall": time.perf_counter() - wall,
+        "cpu": time.process_time() - cpu
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=2000)
+    parser.add_argument("--updates", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=200)
+    args = parser.parse_args()
+
+    total = args.jobs * args.updates
+    with tempfile.TemporaryDirectory() as tmp:
+        before = per_update(_setup(os.path.join(tmp, "a.db"), args.jobs), args.jobs, args.updates)
+        after = group(
+            _setup(os.path.join(tmp, "b.db"), args.jobs), args.jobs, args.updates, args.batch
+        )
+
+    runs = (("per-update commit", before), (f"group commit (batch {args.batch})", after))
+    for name, result in runs:
+        print(
+            f"{name:28s} {total} updates in {result['wall']:.2f}s: "
+            f"{result['commits']} commits ({result['commits'] / result['wall']:.0f}/s), "
+            f"{total / result['wall']:.0f} updates/s, CPU {result['cpu']:.2f}s "
+            f"({result['cpu'] * 1e6 / total:.1f} us/update)"
+        )
+
+
+if __name__ == "__main__":
+    main()
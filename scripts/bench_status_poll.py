@@ -0,0 +1,82 @@
+"""
+Model of status polls per second per core: asyncio worker vs prefork pool
+
+This is a model, not a measurement of either worker. Both sides are
+simulated in one process: each poll is an asyncio.sleep of 200 ms (the
+typical Kling status call) plus a JSON decode, and "prefork" is the same
+coroutine awaited one poll at a time. Neither Celery, httpx, request
+signing, the database nor Redis is involved, so the numbers only show the
+shape of the difference: the prefork model holds one poll per process
+(worker_prefetch_multiplier=1), so its ceiling is 1 / latency polls per
+second per process regardless of CPU, while the asyncio model runs many
+polls concurrently and is bounded by the CPU spent per poll, which real
+checks make far larger than this model does.
+
+Usage: python -m scripts.bench_status_poll [--polls 20000] [--concurrency 2000]
+"""
+import argparse
+import asyncio
+import json
+import time
+
+LATENCY = 0.2
+RESPONSE = json.dumps({"status": "processing", "progress": 42, "video_url": None})
+
+
+async def fake_status_check() -> dict:
+    await asyncio.sleep(LATENCY)
+    return json.loads(RESPONSE)
+
+
+async def run_asyncio(polls: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with semaphore:
+            await fake_status_check()
+
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    await asyncio.gather(*(one() for _ in range(polls)))
+    wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+    return {"wall": wall, "cpu": cpu, "polls_per_sec": polls / wall}
+
+
+async def run_prefork_equivalent(polls: int) -> dict:
+    # One process handles one poll at a time
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    for _ in range(polls):
+        await fake_status_check()
+    wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+    return {"wall": wall, "cpu": cpu, "polls_per_sec": polls / wall}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--polls", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=2000)
+    args = parser.parse_args()
+
+    prefork = asyncio.run(run_prefork_equivalent(25))
+    aio = asyncio.run(run_asyncio(args.polls, args.concurrency))
+
+    # A core saturates when its busy CPU time reaches wall time
+    aio_per_core = args.polls / aio["cpu"] if aio["cpu"] else float("inf")
+    print(
+        f"Simulated polls ({LATENCY * 1000:.0f} ms sleep each); "
+        "a model, not a measurement of the workers"
+    )
+    print(
+        "prefork model (1 poll in flight per process): "
+        f"{prefork['polls_per_sec']:.1f} polls/s per process"
+    )
+    print(
+        f"asyncio model (concurrency {args.concurrency}): {aio['polls_per_sec']:.0f} polls/s wall, "
+        f"{aio['cpu']:.2f}s CPU for {args.polls} polls "
+        f"-> ~{aio_per_core:.0f} polls/s per core upper bound"
+    )
+    ratio = aio["polls_per_sec"] / prefork["polls_per_sec"]
+    print(f"prefork processes the model needs per asyncio process: {ratio:.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Bring an existing database up to the current models
+
+init_db (create_all) only creates missing tables; databases created
+before the pipeline work lack the video_jobs columns added since
+(stage, provider_job_id, output_url, progress, event_seq, version,
+parent_job_id) and their indexes. This script adds missing tables,
+columns and indexes and never touches existing ones, so it is safe to
+run on every deploy. NOT NULL columns are added with their scalar
+default as server default so existing rows get a value.
+
+Usage: python -m scripts.migrate_schema [--dry-run]
+"""
+import argparse
+from typing import List
+
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+import app.models  # noqa: F401  (registers every table on Base.metadata)
+from app.database import Base, engine
+
+
+def _add_column_sql(table, column) -> str:
+    preparer = engine.dialect.identifier_preparer
+    sql = (
+        f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {preparer.format_column(column)} "
+        f"{column.type.compile(dialect=engine.dialect)}"
+    )
+    default = None
+    if column.default is not None and column.default.is_scalar:
+        default = column.default.arg
+    if default is not None:
+        sql += f" DEFAULT {default!r}" if isinstance(default, str) else f" DEFAULT {default}"
+    if not column.nullable and not column.primary_key:
+        sql += " NOT NULL"
+    return sql
+
+
+def plan() -> List[str]:
+    """
+    DDL needed to reach the current models
+
+    Returns:
+        Statements in execution order (empty when up to date)
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    statements = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            statements.append(str(CreateTable(table).compile(dialect=engine.dialect)).strip())
+            statements.extend(
+                str(CreateIndex(index).compile(dialect=engine.dialect)) for index in table.indexes
+            )
+            continue
+
+        existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing_columns:
+                statements.append(_add_column_sql(table, column))
+
+        existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                statements.append(str(CreateIndex(index).compile(dialect=engine.dialect)))
+    return statements
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Print the statements without running them"
+    )
+    args = parser.parse_args()
+
+    statements = plan()
+    if not statements:
+        print("Schema is up to date")
+        return
+    for statement in statements:
+        print(f"{statement};")
+    if args.dry_run:
+        return
+    # One transaction where the database supports transactional DDL (PostgreSQL, SQLite)
+    with engine.begin() as conn:
+        for statement in statements:
+            conn.execute(text(statement))
+    print(f"Applied {len(statements)} statements")
+
+
+if __name__ == "__main__":
+    main()
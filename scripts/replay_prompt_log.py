@@ -0,0 +1,135 @@
+"""
+Replay a prompt log and compare enhancement cache hit rates: exact match
+only vs. exact match plus the MinHash near-duplicate index.
+
+The log is one prompt per line (or JSON lines with a "prompt" field). With
+--synthetic a log is generated from a few base prompts with the kinds of
+edits users make: casing, punctuation, word order and filler words.
+
+Usage: python -m scripts.replay_prompt_log [prompts.txt] [--threshold 0.8]
+       python -m scripts.replay_prompt_log --synthetic 5000
+"""
+import argparse
+import json
+import random
+from typing import List
+
+from app.core.minhash import LSHIndex, words
+
+BASE_PROMPTS = [
+    "a cat on a beach at sunset",
+    "drone shot of a mountain lake at dawn",
+    "a robot walking through a neon city in the rain",
+    "slow motion waves crashing on rocks",
+    "a chef cooking pasta in a busy kitchen",
+    "time lapse of clouds over a desert",
+    "a dog running through autumn leaves in a park",
+    "product shot of a perfume bottle on marble",
+    "astronaut floating above the earth",
+    "a busy street market in tokyo at night",
+    "a hummingbird drinking from a red flower",
+    "vintage car driving along a coastal road",
+]
+
+FILLERS = ["please", "make a video of", "show", "the", "a", "very"]
+
+
+def _vary(prompt: str, rng: random.Random) -> str:
+    words = prompt.split()
+    if rng.random() < 0.3:
+        rng.shuffle(words)
+    if rng.random() < 0.3:
+        words.insert(rng.randrange(len(words) + 1), rng.choice(FILLERS))
+    text = " ".join(words)
+    if rng.random() < 0.4:
+        text = text.capitalize()
+    if rng.random() < 0.3:
+        text = text.upper() if rng.random() < 0.2 else text.title()
+    if rng.random() < 0.4:
+        text = text.replace(" at ", ", ").replace(" in ", ", ")
+    if rng.random() < 0.3:
+        text += rng.choice([".", "!", "...", ""])
+    return text
+
+
+def synthetic_log(size: int, seed: int = 7) -> List[str]:
+    """Prompt log with repeated, lightly edited base prompts and unique prompts"""
+    rng = random.Random(seed)
+    log = []
+    for i in range(size):
+        if rng.random() < 0.2:
+            # One-off prompts that should never match
+            subject = rng.choice(["fox", "ship", "tower"])
+            log.append(f"unique scene number {i} with {subject} {rng.random():.6f}")
+        else:
+            log.append(_vary(rng.choice(BASE_PROMPTS), rng))
+    return log
+
+
+def load_log(path: str) -> List[str]:
+    prompts = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            prompts.append(json.loads(line)["prompt"] if line.startswith("{") else line)
+    return prompts
+
+
+def replay(prompts: List[str], threshold: float) -> dict:
+    exact_cache = set()
+    exact_hits = 0
+    similar_hits = 0
+    index = LSHIndex()
+
+    for prompt in prompts:
+        # The enhancer's exact cache is keyed on the prompt as submitted
+        if prompt in exact_cache:
+            exact_hits += 1
+            continue
+        sequence = words(prompt)
+        if index.query(sequence, threshold):
+            similar_hits += 1
+        else:
+            # A miss goes to Gemini; its result is cached and indexed
+            index.add(prompt, sequence)
+        exact_cache.add(prompt)
+
+    total = len(prompts)
+    return {
+        "prompts": total,
+        "exact_hit_rate": exact_hits / total if total else 0.0,
+        "combined_hit_rate": (exact_hits + similar_hits) / total if total else 0.0,
+        "similar_hits": similar_hits,
+        "remote_calls_exact": total - exact_hits,
+        "remote_calls_combined": total - exact_hits - similar_hits,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("log", nargs="?")
+    parser.add_argument(
+        "--synthetic", type=int, default=0, help="Generate a synthetic log of this size"
+    )
+    parser.add_argument("--threshold", type=float, default=0.8)
+    args = parser.parse_args()
+
+    if args.log:
+        prompts = load_log(args.log)
+    else:
+        prompts = synthetic_log(args.synthetic or 5000)
+
+    result = replay(prompts, args.threshold)
+    print(f"prompts replayed:        {result['prompts']}")
+    print(f"exact-match hit rate:    {result['exact_hit_rate']:.1%}")
+    print(f"with similarity index:   {result['combined_hit_rate']:.1%} "
+          f"(+{result['combined_hit_rate'] - result['exact_hit_rate']:.1%}, "
+          f"{result['similar_hits']} near-duplicate hits, threshold {args.threshold})")
+    print(f"Gemini calls:            {result['remote_calls_combined']} "
+          f"(exact only: {result['remote_calls_exact']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Drive the AIMD submission limiter against a local stand-in provider whose
+capacity drops and recovers, printing how the concurrency limit follows.
+
+Usage: python -m scripts.simulate_aimd
+"""
+import asyncio
+import random
+import time
+
+from app.core.concurrency import AIMDLimiter
+
+
+class Overloaded(Exception):
+    """Stand-in for a 429 from the provider"""
+
+
+class StandInProvider:
+    """Accepts up to `capacity` concurrent submissions, rejects the rest"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.in_flight = 0
+        self.accepted = 0
+        self.rejected = 0
+
+    async def submit(self) -> None:
+        if self.in_flight >= self.capacity:
+            self.rejected += 1
+            await asyncio.sleep(0.005)
+            raise Overloaded()
+        self.in_flight += 1
+        try:
+            await asyncio.sleep(random.uniform(0.04, 0.06))
+            self.accepted += 1
+        finally:
+            self.in_flight -= 1
+
+
+async def main() -> None:
+    provider = StandInProvider(capacity=16)
+    limiter = AIMDLimiter(
+        "simulation",
+        initial_limit=4,
+        max_limit=64,
+        is_overload=lambda exc: isinstance(exc, Overloaded)
+    )
+    # (seconds from start, capacity)
+    schedule = [(0.0, 16), (4.0, 4), (8.0, 12)]
+
+    async def client() -> None:
+        while True:
+            try:
+                async with limiter.slot():
+                    await provider.submit()
+            except Overloaded:
+                pass
+
+    workers = [asyncio.create_task(client()) for _ in range(64)]
+    start = time.monotonic()
+    try:
+        while (elapsed := time.monotonic() - start) < 12.0:
+            provider.capacity = [cap for at, cap in schedule if at <= elapsed][-1]
+            print(
+                f"t={elapsed:5.1f}s capacity={provider.capacity:3d} limit={limiter.limit:3d} "
+                f"accepted={provider.accepted:5d} rejected={provider.rejected:4d}"
+            )
+            await asyncio.sleep(0.5)
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
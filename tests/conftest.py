@@ -0,0 +1,54 @@
+"""
+Shared fixtures for tests that need Redis or the database
+
+Both fixtures wipe what they use, so they only run with ENVIRONMENT=test
+(as in CI) against scratch services, and skip when those are unreachable.
+Settings and service clients are imported inside the fixtures so pure
+tests collect without them.
+"""
+import pytest
+import pytest_asyncio
+
+
+def _require_test_environment(service: str) -> None:
+    from app.core.config import settings
+
+    if settings.ENVIRONMENT != "test":
+        pytest.skip(f"{service} tests wipe data; run them with ENVIRONMENT=test")
+
+
+@pytest_asyncio.fixture
+async def redis():
+    """Empty Redis database on the running event loop's client"""
+    from redis.exceptions import RedisError
+
+    from app.core.redis_client import get_async_redis
+
+    _require_test_environment("Redis")
+    client = get_async_redis()
+    try:
+        await client.ping()
+    except RedisError as e:
+        pytest.skip(f"Redis unavailable: {str(e)}")
+    await client.flushdb()
+    yield client
+    await client.flushdb()
+
+
+@pytest.fixture
+def db():
+    """Database with every table created, emptied after the test"""
+    from sqlalchemy.exc import OperationalError
+
+    import app.models  # noqa: F401  (registers every table on Base.metadata)
+    from app.database import Base, engine
+
+    _require_test_environment("Database")
+    try:
+        Base.metadata.create_all(bind=engine)
+    except OperationalError as e:
+        pytest.skip(f"Database unavailable: {str(e)}")
+    yield engine
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
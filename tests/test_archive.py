@@ -0,0 +1,83 @@
+"""
+Job lookups and listings falling back to video_jobs_archive
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.models.video_job import JobStatus, VideoJob
+from app.services.archiver import archive_batch
+
+
+async def _create(status: JobStatus, created_at: datetime, **kwargs) -> VideoJob:
+    return await VideoJob.create(
+        user_id="user-1",
+        input_type="text",
+        input_data={"original_prompt": "a lighthouse at dusk"},
+        output_data={"output_url": "/outputs/x.mp4"} if status == JobStatus.COMPLETED else {},
+        status=status,
+        created_at=created_at,
+        **kwargs
+    )
+
+
+def _archive_terminal_jobs() -> int:
+    return archive_batch(datetime.now(timezone.utc) + timedelta(days=1), batch_size=100)
+
+
+@pytest.mark.asyncio
+async def test_archived_job_is_still_found_by_id(db):
+    now = datetime.now(timezone.utc)
+    done = await _create(JobStatus.COMPLETED, now)
+    running = await _create(JobStatus.PROCESSING, now)
+
+    assert _archive_terminal_jobs() == 1
+
+    archived = await VideoJob.get(done.id)
+    assert archived.status == JobStatus.COMPLETED
+    assert archived.output_data == {"output_url": "/outputs/x.mp4"}
+    assert archived.input_data["original_prompt"] == "a lighthouse at dusk"
+    found = await VideoJob.get_many([done.id, running.id, "missing"])
+    assert {job.id for job in found} == {done.id, running.id}
+
+
+@pytest.mark.asyncio
+async def test_children_include_archived_variants_in_creation_order(db):
+    now = datetime.now(timezone.utc)
+    parent = await _create(JobStatus.PROCESSING, now - timedelta(minutes=3))
+    first = await _create(JobStatus.COMPLETED, now - timedelta(minutes=2), parent_job_id=parent.id)
+    second = await _create(
+        JobStatus.PROCESSING, now - timedelta(minutes=1), parent_job_id=parent.id
+    )
+
+    _archive_terminal_jobs()
+
+    assert [job.id for job in await VideoJob.get_children(parent.id)] == [first.id, second.id]
+
+
+@pytest.mark.asyncio
+async def test_listing_merges_live_and_archived_jobs_newest_first(db):
+    now = datetime.now(timezone.utc)
+    jobs = [
+        await _create(status, now - timedelta(minutes=age))
+        for age, status in enumerate([
+            JobStatus.PROCESSING,
+            JobStatus.COMPLETED,
+            JobStatus.PENDING,
+            JobStatus.FAILED,
+            JobStatus.COMPLETED
+        ])
+    ]
+    _archive_terminal_jobs()
+
+    page, total = await VideoJob.list_jobs(user_id="user-1", limit=2, offset=1)
+    assert total == 5
+    assert [job.id for job in page] == [jobs[1].id, jobs[2].id]
+
+    completed, total = await VideoJob.list_jobs(user_id="user-1", status=JobStatus.COMPLETED)
+    assert total == 2
+    assert [job.id for job in completed] == [jobs[1].id, jobs[4].id]
+
+    # Active statuses never reach the archive
+    pending, total = await VideoJob.list_jobs(user_id="user-1", status=JobStatus.PENDING)
+    assert (total, [job.id for job in pending]) == (1, [jobs[2].id])
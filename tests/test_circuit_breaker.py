@@ -0,0 +1,142 @@
+"""
+Closed / open / half-open transitions of the provider circuit breaker
+"""
+import asyncio
+
+import pytest
+
+from app.core.circuit_breaker import CircuitBreaker, CircuitOpenError, CircuitState, get_breaker
+
+
+class ProviderDown(Exception):
+    """Failure that counts against the provider"""
+
+
+class BadRequest(Exception):
+    """Caller error that says nothing about provider health"""
+
+
+def _breaker(
+    name: str,
+    recovery_timeout: float = 60.0,
+    half_open_max_calls: int = 1
+) -> CircuitBreaker:
+    return CircuitBreaker(
+        "test",
+        name,
+        failure_threshold=3,
+        recovery_timeout=recovery_timeout,
+        half_open_max_calls=half_open_max_calls,
+        is_failure=lambda exc: isinstance(exc, ProviderDown)
+    )
+
+
+async def _call(breaker: CircuitBreaker, error: Exception = None) -> None:
+    async with breaker.guard():
+        if error:
+            raise error
+
+
+async def _fail(breaker: CircuitBreaker, times: int) -> None:
+    for _ in range(times):
+        with pytest.raises(ProviderDown):
+            await _call(breaker, ProviderDown())
+
+
+def test_opens_after_consecutive_failures_and_fails_fast():
+    breaker = _breaker("opens")
+
+    async def scenario():
+        await _fail(breaker, 2)
+        assert breaker.state == CircuitState.CLOSED
+        await _fail(breaker, 1)
+        assert breaker.state == CircuitState.OPEN
+        with pytest.raises(CircuitOpenError) as info:
+            await _call(breaker)
+        assert 0 < info.value.retry_after <= 60.0
+
+    asyncio.run(scenario())
+
+
+def test_success_resets_the_failure_count():
+    breaker = _breaker("resets")
+
+    async def scenario():
+        await _fail(breaker, 2)
+        await _call(breaker)
+        await _fail(breaker, 2)
+        assert breaker.state == CircuitState.CLOSED
+
+    asyncio.run(scenario())
+
+
+def test_caller_errors_do_not_count():
+    breaker = _breaker("caller_errors")
+
+    async def scenario():
+        for _ in range(5):
+            with pytest.raises(BadRequest):
+                await _call(breaker, BadRequest())
+        assert breaker.state == CircuitState.CLOSED
+
+    asyncio.run(scenario())
+
+
+def test_half_open_trial_closes_on_success_and_reopens_on_failure():
+    breaker = _breaker("half_open", recovery_timeout=0.05)
+
+    async def scenario():
+        await _fail(breaker, 3)
+        await asyncio.sleep(0.06)
+        assert breaker.state == CircuitState.HALF_OPEN
+        await _fail(breaker, 1)
+        assert breaker.state == CircuitState.OPEN
+
+        await asyncio.sleep(0.06)
+        await _call(breaker)
+        assert breaker.state == CircuitState.CLOSED
+
+    asyncio.run(scenario())
+
+
+def test_half_open_admits_limited_trials_and_releases_on_caller_error():
+    breaker = _breaker("trials", recovery_timeout=0.05)
+
+    async def scenario():
+        await _fail(breaker, 3)
+        await asyncio.sleep(0.06)
+
+        trial = asyncio.Event()
+
+        async def slow_trial():
+            async with breaker.guard():
+                await trial.wait()
+
+        task = asyncio.create_task(slow_trial())
+        await asyncio.sleep(0)
+        # The only trial slot is taken
+        with pytest.raises(CircuitOpenError):
+            await _call(breaker)
+        trial.set()
+        await task
+        assert breaker.state == CircuitState.CLOSED
+
+    asyncio.run(scenario())
+
+    other = _breaker("released", recovery_timeout=0.05)
+
+    async def released():
+        await _fail(other, 3)
+        await asyncio.sleep(0.06)
+        with pytest.raises(BadRequest):
+            await _call(other, BadRequest())
+        # The caller error gave the trial slot back
+        await _call(other)
+        assert other.state == CircuitState.CLOSED
+
+    asyncio.run(released())
+
+
+def test_registry_shares_one_breaker_per_endpoint():
+    assert get_breaker("test", "shared") is get_breaker("test", "shared")
+    assert get_breaker("test", "shared") is not get_breaker("test", "other")
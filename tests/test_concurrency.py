@@ -0,0 +1,135 @@
+"""
+AIMD concurrency limiter against a fake overloaded provider
+"""
+import asyncio
+import threading
+
+from app.core.concurrency import AIMDLimiter, get_limiter
+
+
+class Overloaded(Exception):
+    """429 from the fake provider"""
+
+
+class FakeProvider:
+    """Endpoint that rejects calls beyond its capacity"""
+
+    def __init__(self, capacity: int, latency: float = 0.002):
+        self.capacity = capacity
+        self.latency = latency
+        self.in_flight = 0
+        self.peak = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    async def call(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            overloaded = self.in_flight > self.capacity
+        try:
+            if overloaded:
+                self.rejected += 1
+                raise Overloaded()
+            await asyncio.sleep(self.latency)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+def _limiter(name: str, initial_limit: int) -> AIMDLimiter:
+    return AIMDLimiter(
+        name,
+        initial_limit=initial_limit,
+        min_limit=1,
+        max_limit=64,
+        # Latency is not the signal under test
+        latency_tolerance=1000.0,
+        is_overload=lambda exc: isinstance(exc, Overloaded)
+    )
+
+
+async def _drive(limiter: AIMDLimiter, provider: FakeProvider, calls: int, workers: int) -> int:
+    """Run calls through the limiter from concurrent workers; returns the rejected calls"""
+    remaining = [calls]
+    rejected = [0]
+
+    async def worker():
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            try:
+                async with limiter.slot():
+                    await provider.call()
+            except Overloaded:
+                rejected[0] += 1
+
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    return rejected[0]
+
+
+def test_limit_backs_off_to_provider_capacity():
+    provider = FakeProvider(capacity=8)
+    limiter = _limiter("test_backoff", initial_limit=48)
+
+    first = asyncio.run(_drive(limiter, provider, calls=300, workers=64))
+    second = asyncio.run(_drive(limiter, provider, calls=300, workers=64))
+
+    assert first > 0
+    # Once the limit has backed off, additive increase only probes past capacity now and then
+    assert second < first
+    assert limiter.limit <= 2 * provider.capacity
+    assert limiter.in_flight == 0
+
+
+def test_limit_grows_while_provider_keeps_up():
+    provider = FakeProvider(capacity=64)
+    limiter = _limiter("test_growth", initial_limit=2)
+
+    rejected = asyncio.run(_drive(limiter, provider, calls=400, workers=32))
+
+    assert rejected == 0
+    assert limiter.limit > 2
+    assert provider.peak <= limiter.limit
+
+
+def test_shared_limiter_keeps_learned_limit_across_event_loops():
+    options = dict(
+        initial_limit=48,
+        min_limit=1,
+        max_limit=64,
+        latency_tolerance=1000.0,
+        is_overload=lambda exc: isinstance(exc, Overloaded)
+    )
+    provider = FakeProvider(capacity=4)
+
+    # Each Celery task runs in its own asyncio.run
+    asyncio.run(_drive(get_limiter("test_shared", **options), provider, calls=200, workers=48))
+    learned = get_limiter("test_shared", **options).limit
+
+    assert get_limiter("test_shared", **options) is get_limiter("test_shared")
+    assert learned < 48
+    assert get_limiter("test_shared").limit == learned
+
+
+def test_waiters_on_other_event_loops_are_woken():
+    provider = FakeProvider(capacity=64)
+    limiter = _limiter("test_threads", initial_limit=2)
+    limiter.max_limit = limiter.min_limit = 2
+    errors = []
+
+    def run():
+        try:
+            asyncio.run(_drive(limiter, provider, calls=50, workers=4))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+
+    assert not any(thread.is_alive() for thread in threads)
+    assert not errors
+    assert provider.peak <= 2
+    assert limiter.in_flight == 0
@@ -0,0 +1,105 @@
+"""
+Group-committed job writes: compare-and-set conflicts and progress ticks
+"""
+import asyncio
+
+import pytest
+
+from app.models.video_job import ConcurrentUpdateError, InvalidTransitionError, JobStatus, VideoJob
+from app.models.video_job_event import VideoJobEvent
+from app.services.job_writer import JobWriter
+
+
+async def _create(status: JobStatus = JobStatus.PROCESSING) -> VideoJob:
+    return await VideoJob.create(user_id="user-1", input_type="text", input_data={}, status=status)
+
+
+@pytest.mark.asyncio
+async def test_stage_write_commits_projection_and_event(db):
+    job = await _create()
+    writer = JobWriter(flush_interval_ms=5)
+
+    row = await writer.record(job.id, job.version, "download", {"size": 42}, stage="download")
+
+    assert row.version == job.version + 1
+    stored = await VideoJob.get(job.id)
+    assert stored.stage == "download"
+    assert stored.version == row.version
+    events = await VideoJobEvent.for_job(job.id)
+    assert [(event.seq, event.type, event.payload) for event in events] == [
+        (1, "download", {"size": 42})
+    ]
+
+
+@pytest.mark.asyncio
+async def test_second_write_from_same_version_conflicts_in_one_batch(db):
+    job = await _create()
+    writer = JobWriter(flush_interval_ms=5)
+
+    first, second = await asyncio.gather(
+        writer.record(job.id, job.version, "postprocess", stage="postprocess"),
+        writer.record(job.id, job.version, "failed", stage="failed", status=JobStatus.FAILED),
+        return_exceptions=True
+    )
+
+    assert first.version == job.version + 1
+    assert isinstance(second, ConcurrentUpdateError)
+    stored = await VideoJob.get(job.id)
+    assert stored.status == JobStatus.PROCESSING
+    assert [event.type for event in await VideoJobEvent.for_job(job.id)] == ["postprocess"]
+
+
+@pytest.mark.asyncio
+async def test_write_loses_to_direct_update(db):
+    job = await _create()
+    loaded_version = job.version
+    await job.update(stage="cancelled", status=JobStatus.CANCELLED)
+
+    with pytest.raises(InvalidTransitionError):
+        await JobWriter(flush_interval_ms=5).record(
+            job.id, loaded_version, "completed", stage="completed", status=JobStatus.COMPLETED
+        )
+    with pytest.raises(ConcurrentUpdateError):
+        await JobWriter(flush_interval_ms=5).record(
+            job.id, loaded_version, "download", stage="download"
+        )
+
+
+@pytest.mark.asyncio
+async def test_missing_job_is_reported(db):
+    with pytest.raises(ValueError):
+        await JobWriter(flush_interval_ms=5).record("missing", 0, "download", stage="download")
+
+
+@pytest.mark.asyncio
+async def test_progress_only_moves_forward_on_active_jobs(db):
+    active = await _create()
+    cancelled = await _create(JobStatus.CANCELLED)
+    writer = JobWriter(flush_interval_ms=5)
+
+    writer.record_progress(active.id, 40)
+    writer.record_progress(active.id, 20)
+    writer.record_progress(cancelled.id, 90)
+    await writer.flush()
+    writer.record_progress(active.id, 10)
+    await writer.flush()
+
+    stored = await VideoJob.get(active.id)
+    assert stored.progress == 40
+    # Ticks are unversioned, so they never make a stage write conflict
+    assert stored.version == active.version
+    assert (await VideoJob.get(cancelled.id)).progress == 0
+
+
+@pytest.mark.asyncio
+async def test_stage_write_and_progress_tick_commit_in_one_flush(db):
+    polled = await _create()
+    advancing = await _create()
+    writer = JobWriter(flush_interval_ms=5)
+
+    writer.record_progress(polled.id, 55)
+    row = await writer.record(advancing.id, advancing.version, "download", stage="download")
+
+    assert row.version == advancing.version + 1
+    assert (await VideoJob.get(polled.id)).progress == 55
+    assert (await VideoJob.get(advancing.id)).stage == "download"
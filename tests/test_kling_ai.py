@@ -0,0 +1,129 @@
+"""
+Request bodies sent by the Kling AI client
+"""
+import json
+
+import httpx
+import pytest
+import pytest_asyncio
+import respx
+
+from app.core.ai_clients.kling_ai import KlingAIClient
+from app.core.config import settings
+from app.core.latency import LatencyTracker
+from app.schemas.video import (
+    CameraMovement, MotionIntensity, QualityLevel, VideoStyle, VideoVariant
+)
+
+
+@pytest_asyncio.fixture
+async def kling(monkeypatch):
+    # CI sets no provider credentials; requests are signed but never leave respx
+    monkeypatch.setattr(settings, "KLING_API_ACCESS_KEY", "test-access-key")
+    monkeypatch.setattr(settings, "KLING_API_SECRET_KEY", "test-secret-key")
+    client = KlingAIClient()
+
+    async def acquire():
+        return None
+
+    # Rate limit budgets live in Redis; these tests only look at request bodies
+    client.submit_bucket.acquire = acquire
+    client.status_bucket.acquire = acquire
+    yield client
+    await client.client.aclose()
+
+
+def _body(route) -> dict:
+    return json.loads(route.calls.last.request.content)
+
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_text_variant_overrides_reach_request_body(kling):
+    route = respx.post(f"{settings.KLING_API_BASE_URL}/generate/text-to-video").mock(
+        return_value=httpx.Response(200, json={"job_id": "kling-1"})
+    )
+    variant = VideoVariant(style=VideoStyle.ANIME, quality=QualityLevel.ULTRA, seed=7)
+    style_params = {"duration": 5, "aspect_ratio": "16:9", "style": "realistic", "quality": "high"}
+    style_params.update(variant.style_overrides())
+
+    await kling.text_to_video(
+        prompt="a lighthouse at dusk",
+        duration=style_params["duration"],
+        aspect_ratio=style_params["aspect_ratio"],
+        style=style_params["style"],
+        seed=style_params["seed"],
+        quality=style_params["quality"]
+    )
+
+    body = _body(route)
+    assert body["style"] == "anime"
+    assert body["quality"] == "ultra"
+    assert body["seed"] == 7
+
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_image_variant_overrides_reach_request_body(kling, tmp_path):
+    route = respx.post(f"{settings.KLING_API_BASE_URL}/generate/image-to-video").mock(
+        return_value=httpx.Response(200, json={"job_id": "kling-2"})
+    )
+    image = tmp_path / "input.png"
+    image.write_bytes(b"\x89PNG\r\n\x1a\n")
+    variant = VideoVariant(
+        motion_intensity=MotionIntensity.HIGH,
+        camera_movement=CameraMovement.ZOOM,
+        quality=QualityLevel.STANDARD,
+        seed=3
+    )
+    motion_params = {"intensity": "low", "camera_movement": "static", "duration": 5}
+    motion_params.update(variant.motion_overrides())
+
+    await kling.image_to_video(str(image), prompt="waves", motion_params=motion_params)
+
+    body = _body(route)
+    assert body["motion_intensity"] == "high"
+    assert body["camera_movement"] == "zoom"
+    assert body["quality"] == "standard"
+    assert body["seed"] == 3
+
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_legacy_camera_key_is_still_sent(kling, tmp_path):
+    route = respx.post(f"{settings.KLING_API_BASE_URL}/generate/image-to-video").mock(
+        return_value=httpx.Response(200, json={"job_id": "kling-3"})
+    )
+    image = tmp_path / "input.png"
+    image.write_bytes(b"\x89PNG\r\n\x1a\n")
+
+    await kling.image_to_video(str(image), motion_params={"intensity": "medium", "camera": "pan"})
+
+    assert _body(route)["camera_movement"] == "pan"
+
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_submit_uses_fixed_timeout(kling):
+    route = respx.post(f"{settings.KLING_API_BASE_URL}/generate/text-to-video").mock(
+        return_value=httpx.Response(200, json={"job_id": "kling-4"})
+    )
+
+    await kling.text_to_video(prompt="a lighthouse at dusk")
+
+    assert route.calls.last.request.extensions["timeout"]["read"] == settings.KLING_SUBMIT_TIMEOUT
+
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_timeouts_are_recorded_as_latency_samples(kling):
+    respx.get(f"{settings.KLING_API_BASE_URL}/jobs/kling-5/status").mock(
+        side_effect=httpx.ReadTimeout("timed out")
+    )
+    tracker = LatencyTracker("kling", "test_timeouts")
+
+    for _ in range(settings.PROVIDER_LATENCY_MIN_SAMPLES):
+        with pytest.raises(httpx.TimeoutException):
+            await kling._send("GET", "/jobs/kling-5/status", tracker, timeout=0.25)
+
+    assert tracker.percentile(0.5) == 0.25
@@ -0,0 +1,57 @@
+"""
+Near-duplicate prompt detection
+"""
+from app.core.minhash import LSHIndex, jaccard, roles_reversed, tokenize, words
+
+THRESHOLD = 0.8
+
+
+def test_casing_punctuation_stopwords_and_plurals_do_not_matter():
+    a = tokenize("A cat on the beach at sunset!")
+    b = tokenize("cats on a beach at sunset")
+    assert jaccard(a, b) == 1.0
+
+
+def test_reordered_prompt_is_a_duplicate():
+    a = words("a cat on a beach at sunset")
+    b = words("sunset beach, cat")
+
+    assert jaccard(a, b) == 1.0
+    assert not roles_reversed(a, b)
+
+
+def test_reversed_roles_are_detected():
+    assert roles_reversed(words("a dog chasing a cat"), words("a cat chasing a dog"))
+    assert roles_reversed(
+        words("a small girl feeding a big horse in a sunny meadow"),
+        words("a big horse feeding a small girl in a sunny meadow")
+    )
+
+
+def test_reordering_around_an_action_is_not_a_reversal():
+    assert not roles_reversed(
+        words("a dog running on a beach"), words("on the beach a dog running")
+    )
+    assert not roles_reversed(words("the dog chasing the cats"), words("a dog chasing a cat"))
+
+
+def test_index_finds_reordered_near_duplicate():
+    index = LSHIndex()
+    index.add("beach", words("a cat on a beach at sunset"))
+    index.add("lake", words("drone shot of a mountain lake at dawn"))
+
+    assert index.query(words("Cat on the beach at sunset."), THRESHOLD) == ("beach", 1.0)
+    assert index.query(words("sunset beach, cat"), THRESHOLD) == ("beach", 1.0)
+
+
+def test_index_rejects_reversed_roles():
+    index = LSHIndex()
+    index.add("dog-chases-cat", words("a dog chasing a cat"))
+
+    assert index.query(words("a cat chasing a dog"), THRESHOLD) is None
+    assert index.query(words("the dog chasing the cats"), THRESHOLD) == ("dog-chases-cat", 1.0)
+
+
+def test_empty_prompt_has_no_words():
+    assert words("the a of") == []
+    assert LSHIndex().query(words("the a of"), THRESHOLD) is None
@@ -0,0 +1,45 @@
+"""
+Local prompt templates and per-variant specialization
+"""
+from app.services.prompt_templates import (
+    CAMERA_CLAUSES, STYLE_CLAUSES, local_enhance, variant_enhance
+)
+from app.schemas.video import CameraMovement, VideoStyle
+
+
+def test_local_enhance_is_deterministic():
+    params = {"style": "anime", "camera_movement": "pan"}
+    assert local_enhance("a fox", params=params) == local_enhance("a fox", params=params)
+
+
+def test_shared_enhancement_leaves_out_varied_params():
+    params = {"style": "realistic", "camera_movement": "static"}
+    shared = local_enhance(
+        "a fox in the snow", "image-to-video", params, omit={"style", "camera_movement"}
+    )
+
+    assert STYLE_CLAUSES[VideoStyle.REALISTIC] not in shared
+    assert CAMERA_CLAUSES[CameraMovement.STATIC] not in shared
+
+
+def test_variant_enhance_adds_only_the_variant_clauses():
+    varied = {"style", "camera_movement"}
+    parent = {"style": "realistic", "camera_movement": "static"}
+    shared = local_enhance("a fox in the snow", "image-to-video", parent, omit=varied)
+
+    anime = variant_enhance(shared, {**parent, "style": "anime"}, varied)
+    zoom = variant_enhance(shared, {**parent, "camera_movement": "zoom"}, varied)
+
+    assert anime.startswith(shared.rstrip("."))
+    # The first appended clause starts a sentence and is capitalized
+    anime, zoom = anime.lower(), zoom.lower()
+    assert STYLE_CLAUSES[VideoStyle.ANIME].lower() in anime
+    assert STYLE_CLAUSES[VideoStyle.REALISTIC].lower() not in anime
+    assert CAMERA_CLAUSES[CameraMovement.STATIC].lower() in anime
+    assert CAMERA_CLAUSES[CameraMovement.ZOOM].lower() in zoom
+    assert CAMERA_CLAUSES[CameraMovement.STATIC].lower() not in zoom
+
+
+def test_variant_enhance_without_clause_params_keeps_shared_prompt():
+    shared = local_enhance("a fox", params={"style": "anime"})
+    assert variant_enhance(shared, {"seed": 4, "quality": "ultra"}, {"seed", "quality"}) == shared
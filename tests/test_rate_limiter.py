@@ -0,0 +1,57 @@
+"""
+Redis token bucket shared by every process using a provider key
+"""
+import asyncio
+
+import pytest
+
+from app.core.rate_limiter import RateLimitExceeded, TokenBucket
+
+
+@pytest.mark.asyncio
+async def test_burst_is_granted_then_bucket_runs_dry(redis):
+    bucket = TokenBucket("test:burst", requests_per_minute=60, burst=3)
+
+    for _ in range(3):
+        await bucket.acquire(max_wait=0)
+
+    with pytest.raises(RateLimitExceeded) as info:
+        await bucket.acquire(max_wait=0)
+    assert 0 < info.value.wait <= 1.0
+
+
+@pytest.mark.asyncio
+async def test_caller_waits_for_refill_within_max_wait(redis):
+    # 20 tokens per second: the next token is 50 ms away
+    bucket = TokenBucket("test:refill", requests_per_minute=1200, burst=1)
+    await bucket.acquire(max_wait=0)
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    await bucket.acquire(max_wait=1.0)
+    assert loop.time() - started >= 0.03
+
+
+@pytest.mark.asyncio
+async def test_buckets_are_shared_per_key_and_separate_across_keys(redis):
+    first = TokenBucket("test:shared", requests_per_minute=60, burst=1, key_id="key-a")
+    same_key = TokenBucket("test:shared", requests_per_minute=60, burst=1, key_id="key-a")
+    other_key = TokenBucket("test:shared", requests_per_minute=60, burst=1, key_id="key-b")
+
+    await first.acquire(max_wait=0)
+    with pytest.raises(RateLimitExceeded):
+        await same_key.acquire(max_wait=0)
+    await other_key.acquire(max_wait=0)
+    assert "key-a" not in first.key
+
+
+@pytest.mark.asyncio
+async def test_disabled_limiter_never_touches_redis(monkeypatch):
+    from app.core import rate_limiter
+
+    monkeypatch.setattr(rate_limiter.settings, "RATE_LIMIT_ENABLED", False)
+    monkeypatch.setattr(rate_limiter, "get_async_redis", lambda: pytest.fail("Redis was used"))
+
+    bucket = TokenBucket("test:disabled", requests_per_minute=1, burst=1)
+    for _ in range(5):
+        await bucket.acquire(max_wait=0)
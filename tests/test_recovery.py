@@ -0,0 +1,60 @@
+"""
+Resuming unfinished jobs when the in-process pipeline starts
+"""
+import pytest
+
+from app.core.config import settings
+from app.models.video_job import JobStatus, VideoJob
+from app.services import retry_scheduler
+from app.services.pipeline import Stage
+from app.services.video_generator import VideoGenerator
+
+
+@pytest.fixture
+def generator(monkeypatch):
+    # Recovery only reads and fails jobs; the provider clients are never called
+    monkeypatch.setattr(settings, "GOOGLE_AI_API_KEY", "test-google-key")
+    monkeypatch.setattr(settings, "KLING_API_ACCESS_KEY", "test-access-key")
+    monkeypatch.setattr(settings, "KLING_API_SECRET_KEY", "test-secret-key")
+    return VideoGenerator()
+
+
+async def _create(stage: str, status: JobStatus = JobStatus.PROCESSING, **kwargs) -> VideoJob:
+    return await VideoJob.create(
+        user_id="user-1", input_type="text", input_data={}, stage=stage, status=status, **kwargs
+    )
+
+
+@pytest.mark.asyncio
+async def test_unfinished_jobs_resume_from_their_last_stage(db, redis, generator):
+    queued = await _create("queued", JobStatus.PENDING)
+    polling = await _create(Stage.AWAIT_PROVIDER.value)
+    downloading = await _create(Stage.DOWNLOAD.value)
+    await _create("completed", JobStatus.COMPLETED)
+
+    assert await generator.recover() == [
+        (Stage.PREPARE, queued.id),
+        (Stage.AWAIT_PROVIDER, polling.id),
+        (Stage.DOWNLOAD, downloading.id),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_retrying_jobs_and_queued_variants_are_skipped(db, redis, generator, monkeypatch):
+    monkeypatch.setattr(settings, "RETRY_BASE_DELAY", 60.0)
+    retrying = await _create(Stage.SUBMIT.value)
+    await retry_scheduler.schedule_retry(Stage.SUBMIT.value, retrying.id, 1, "429")
+    parent = await _create("variants")
+    await _create("queued", JobStatus.PENDING, parent_job_id=parent.id)
+
+    assert await generator.recover() == [(Stage.PREPARE, parent.id)]
+
+
+@pytest.mark.asyncio
+async def test_job_in_unknown_stage_is_failed(db, redis, generator):
+    job = await _create("rendering")
+
+    assert await generator.recover() == []
+    stored = await VideoJob.get(job.id)
+    assert stored.status == JobStatus.FAILED
+    assert "restart" in stored.error_message
@@ -0,0 +1,119 @@
+"""
+Delayed stage retries in Redis: scheduling, claims, acks and dead letters
+"""
+import json
+import time
+
+import pytest
+
+from app.services import retry_scheduler
+from app.services.retry_scheduler import DEAD_KEY, DUE_KEY, PAYLOAD_KEY
+
+
+@pytest.fixture
+def immediate(monkeypatch):
+    """Retries are due as soon as they are scheduled"""
+    monkeypatch.setattr(retry_scheduler.settings, "RETRY_BASE_DELAY", 0.0)
+    monkeypatch.setattr(retry_scheduler.settings, "RETRY_MAX_DELAY", 0.0)
+    monkeypatch.setattr(retry_scheduler.settings, "PIPELINE_BACKEND", "inprocess")
+
+
+@pytest.fixture
+def dispatched(monkeypatch):
+    """Batches handed to pipeline.dispatch_many"""
+    from app.services import pipeline
+
+    batches = []
+    monkeypatch.setattr(pipeline, "dispatch_many", lambda items: batches.append(list(items)))
+    return batches
+
+
+@pytest.mark.asyncio
+async def test_claimed_retry_is_deleted_only_after_ack(redis, immediate):
+    await retry_scheduler.schedule_retry("submit", "job-1", 1, "429")
+
+    claimed_until, due = await retry_scheduler.claim_due(10)
+    assert [retry_id for retry_id, _ in due] == ["submit:job-1"]
+    assert due[0][1]["attempt"] == 1
+    # Claimed: no longer due, but still stored
+    assert (await retry_scheduler.claim_due(10))[1] == []
+    assert await redis.zscore(DUE_KEY, "submit:job-1") == pytest.approx(claimed_until)
+
+    assert await retry_scheduler.ack(claimed_until, ["submit:job-1"]) == 1
+    assert await redis.zcard(DUE_KEY) == 0
+    assert await redis.hlen(PAYLOAD_KEY) == 0
+
+
+@pytest.mark.asyncio
+async def test_unacked_claim_comes_due_again(redis, immediate, monkeypatch):
+    monkeypatch.setattr(retry_scheduler.settings, "RETRY_CLAIM_TIMEOUT", 0.0)
+    await retry_scheduler.schedule_retry("download", "job-1", 2, "timeout")
+
+    await retry_scheduler.claim_due(10)
+    _, due = await retry_scheduler.claim_due(10)
+    assert [retry_id for retry_id, _ in due] == ["download:job-1"]
+
+
+@pytest.mark.asyncio
+async def test_ack_keeps_a_retry_rescheduled_after_the_claim(redis, immediate):
+    await retry_scheduler.schedule_retry("download", "job-1", 1, "timeout")
+    claimed_until, _ = await retry_scheduler.claim_due(10)
+
+    # The dispatched stage failed again before the pump acknowledged the claim
+    await retry_scheduler.schedule_retry("download", "job-1", 2, "timeout again")
+
+    assert await retry_scheduler.ack(claimed_until, ["download:job-1"]) == 0
+    payload = json.loads(await redis.hget(PAYLOAD_KEY, "download:job-1"))
+    assert payload["attempt"] == 2
+
+
+@pytest.mark.asyncio
+async def test_pump_dispatches_in_batches_and_acks(redis, immediate, dispatched):
+    from app.services.pipeline import Stage
+
+    for n in range(5):
+        await retry_scheduler.schedule_retry("await_provider", f"job-{n}", 1, "503")
+
+    assert await retry_scheduler.pump(batch_size=2) == 5
+    assert [len(batch) for batch in dispatched] == [2, 2, 1]
+    assert {item[0] for batch in dispatched for item in batch} == {Stage.AWAIT_PROVIDER}
+    assert await redis.zcard(DUE_KEY) == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_dispatch_keeps_retries(redis, immediate, monkeypatch):
+    from app.services import pipeline
+
+    def broker_down(items):
+        raise ConnectionError("broker unavailable")
+
+    monkeypatch.setattr(pipeline, "dispatch_many", broker_down)
+    await retry_scheduler.schedule_retry("await_provider", "job-1", 1, "503")
+
+    with pytest.raises(ConnectionError):
+        await retry_scheduler.pump()
+    assert await redis.zscore(DUE_KEY, "await_provider:job-1") > time.time()
+    assert await redis.hexists(PAYLOAD_KEY, "await_provider:job-1")
+
+
+@pytest.mark.asyncio
+async def test_retries_past_max_attempts_are_dead_lettered(redis, immediate, monkeypatch):
+    monkeypatch.setattr(retry_scheduler.settings, "RETRY_MAX_ATTEMPTS", 2)
+
+    assert await retry_scheduler.schedule_retry("await_provider", "job-1", 3, "503") is False
+    assert await redis.zcard(DUE_KEY) == 0
+    assert await redis.zscore(DEAD_KEY, "await_provider:job-1") is not None
+
+
+@pytest.mark.asyncio
+async def test_delayed_dispatch_waits_in_the_due_set(redis, immediate, dispatched):
+    from app.services.pipeline import Stage
+
+    retry_scheduler.schedule_delayed([(Stage.AWAIT_PROVIDER, "job-1", 0, None)], 60.0)
+
+    assert await retry_scheduler.pump() == 0
+    assert await redis.zscore(DUE_KEY, "await_provider:job-1") > time.time()
+
+    await redis.zadd(DUE_KEY, {"await_provider:job-1": 0})
+    assert await retry_scheduler.pump() == 1
+    assert dispatched == [[(Stage.AWAIT_PROVIDER, "job-1", 0, None)]]
@@ -0,0 +1,71 @@
+"""
+Versioned writes of cached job status records
+"""
+import pytest
+
+from app.models.video_job import JobStatus, VideoJob
+from app.services import status_cache
+
+
+def _job(version: int, status: JobStatus = JobStatus.PROCESSING, progress: int = 0) -> VideoJob:
+    return VideoJob(
+        id="job-1",
+        user_id="user-1",
+        input_type="text",
+        status=status,
+        stage=status.value,
+        version=version,
+        progress=progress,
+        output_data={}
+    )
+
+
+@pytest.mark.asyncio
+async def test_newer_version_replaces_record(redis):
+    await status_cache.set_many([_job(1, progress=10)])
+    await status_cache.set_many([_job(2, JobStatus.COMPLETED, progress=100)])
+
+    cached = await status_cache.get("job-1")
+    assert cached["version"] == 2
+    assert cached["status"] == "completed"
+
+
+@pytest.mark.asyncio
+async def test_late_write_of_older_version_is_dropped(redis):
+    await status_cache.set_many([_job(3, JobStatus.CANCELLED)])
+    # A progress tick built from the job before it was cancelled
+    await status_cache.set_many([_job(2, progress=80)])
+
+    cached = await status_cache.get("job-1")
+    assert cached["status"] == "cancelled"
+    assert cached["version"] == 3
+
+
+@pytest.mark.asyncio
+async def test_same_version_only_moves_progress_forward(redis):
+    await status_cache.set_many([_job(4, progress=50)])
+    await status_cache.set_many([_job(4, progress=30)])
+    assert (await status_cache.get("job-1"))["progress"] == 50
+
+    await status_cache.set_many([_job(4, progress=70)])
+    assert (await status_cache.get("job-1"))["progress"] == 70
+
+
+@pytest.mark.asyncio
+async def test_batch_write_checks_each_key(redis):
+    other = _job(1)
+    other.id = "job-2"
+    await status_cache.set_many([_job(5)])
+
+    await status_cache.set_many([_job(4, progress=90), other])
+
+    cached = await status_cache.get_many(["job-1", "job-2"])
+    assert cached["job-1"]["version"] == 5
+    assert cached["job-2"]["version"] == 1
+
+
+@pytest.mark.asyncio
+async def test_invalidate_drops_record(redis):
+    await status_cache.set_many([_job(1)])
+    await status_cache.invalidate("job-1")
+    assert await status_cache.get("job-1") is None
@@ -0,0 +1,34 @@
+"""
+Scheduled status checks keeping the retry state of failed polls
+"""
+import pytest
+
+from app.services import status_queue
+from app.services.status_queue import ATTEMPT_KEY, DUE_KEY
+
+
+@pytest.mark.asyncio
+async def test_retried_check_is_claimed_with_its_attempt(redis):
+    await status_queue.schedule_status_check_async("retried", attempt=3, first_failed_at=1000.0)
+    await status_queue.schedule_status_check_async("polling")
+
+    claimed = sorted(await status_queue.claim_due(10))
+    assert claimed == [("polling", 0, None), ("retried", 3, 1000.0)]
+    assert await status_queue.claim_due(10) == []
+
+
+@pytest.mark.asyncio
+async def test_successful_poll_resets_the_attempt(redis):
+    await status_queue.schedule_status_check_async("job-1", attempt=2, first_failed_at=1000.0)
+    await status_queue.schedule_status_check_async("job-1")
+
+    assert await status_queue.claim_due(10) == [("job-1", 0, None)]
+
+
+@pytest.mark.asyncio
+async def test_complete_removes_check_and_attempt(redis):
+    await status_queue.schedule_status_check_async("job-1", attempt=1, first_failed_at=1000.0)
+
+    await status_queue.complete("job-1")
+    assert await redis.zcard(DUE_KEY) == 0
+    assert await redis.hlen(ATTEMPT_KEY) == 0
@@ -0,0 +1,112 @@
+"""
+Garbage collection of reference-counted uploads and evicted outputs
+"""
+import hashlib
+import os
+import time
+
+import pytest
+
+from app.models.video_job import JobStatus, VideoJob
+from app.services import storage, upload_store
+
+JPEG = b"\xff\xd8\xff\xe0" + b"stock photo" * 64
+
+
+@pytest.fixture
+def dirs(monkeypatch, tmp_path):
+    """UPLOAD_DIR, OUTPUT_DIR and TEMP_DIR inside the test's temp directory"""
+    for name in ("UPLOAD_DIR", "OUTPUT_DIR", "TEMP_DIR"):
+        path = tmp_path / name.lower()
+        path.mkdir()
+        monkeypatch.setattr(storage.settings, name, path)
+    return tmp_path
+
+
+def _after_upload_retention() -> float:
+    return time.time() + storage.settings.UPLOAD_RETENTION + 60
+
+
+@pytest.mark.asyncio
+async def test_shared_upload_is_kept_until_last_reference_is_released(db, dirs):
+    digest = hashlib.sha256(JPEG).hexdigest()
+    path = await upload_store.save(JPEG, digest, ".jpg")
+    assert await upload_store.save(JPEG, digest, ".jpeg") == path
+    await upload_store.add_refs([(digest, "job-1"), (digest, "job-2")])
+
+    storage.collect(now=_after_upload_retention())
+    assert path.exists()
+
+    await upload_store.release(["job-1"])
+    storage.collect(now=_after_upload_retention())
+    assert path.exists()
+
+    await upload_store.release(["job-2"])
+    result = storage.collect(now=_after_upload_retention())
+    assert not path.exists()
+    assert result["deleted"]["upload"] == 1
+
+
+@pytest.mark.asyncio
+async def test_unreferenced_upload_is_kept_for_retention(db, dirs):
+    digest = hashlib.sha256(JPEG).hexdigest()
+    path = await upload_store.save(JPEG, digest, ".jpg")
+
+    storage.collect()
+    assert path.exists()
+
+    storage.collect(now=_after_upload_retention())
+    assert not path.exists()
+
+
+@pytest.mark.asyncio
+async def test_upload_of_active_job_is_kept_without_reference(db, dirs):
+    digest = hashlib.sha256(JPEG).hexdigest()
+    path = await upload_store.save(JPEG, digest, ".jpg")
+    await VideoJob.create(
+        user_id="user-1",
+        input_type="image",
+        input_data={"image_path": str(path)},
+        status=JobStatus.PROCESSING
+    )
+
+    storage.collect(now=_after_upload_retention())
+    assert path.exists()
+
+
+def test_file_deleted_after_the_scan_is_skipped(dirs):
+    path = storage.sharded_path(storage.settings.TEMP_DIR, "gone.tmp")
+    path.write_bytes(b"partial")
+    entry = next(storage._walk(storage.settings.TEMP_DIR))
+    os.unlink(path)
+
+    assert storage._stat(entry) is None
+    assert storage._stat(entry, fresh=True) is None
+
+
+@pytest.mark.asyncio
+async def test_evicted_output_is_cleared_from_completed_job(db, dirs):
+    job = await VideoJob.create(
+        user_id="user-1", input_type="text", input_data={}, status=JobStatus.PROCESSING
+    )
+    video = storage.sharded_path(storage.settings.OUTPUT_DIR, f"{job.id}.mp4")
+    thumbnail = video.with_suffix(".jpg")
+    video.write_bytes(b"video")
+    thumbnail.write_bytes(b"thumbnail")
+    urls = {
+        "output_url": storage.output_url(video),
+        "thumbnail_url": storage.output_url(thumbnail),
+        "output_path": str(video),
+    }
+    await job.update(status=JobStatus.COMPLETED, output_url=urls["output_url"], output_data=urls)
+
+    result = storage.collect(now=time.time() + storage.settings.OUTPUT_RETENTION + 60)
+    assert not video.exists()
+    assert sorted(result["evicted_urls"]) == sorted([urls["output_url"], urls["thumbnail_url"]])
+
+    assert await storage.forget_evicted_outputs(result["evicted_urls"]) == 1
+    stored = await VideoJob.get(job.id)
+    assert stored.output_url is None
+    assert "output_url" not in stored.output_data
+    assert "thumbnail_url" not in stored.output_data
+    assert stored.output_data["output_evicted"] is True
@@ -0,0 +1,50 @@
+"""
+Content-addressed upload storage
+"""
+import hashlib
+
+import pytest
+
+from app.services import upload_store
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"template" * 64
+
+
+@pytest.fixture
+def upload_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(upload_store.settings, "UPLOAD_DIR", tmp_path)
+    return tmp_path
+
+
+def test_extension_comes_from_the_image_format():
+    assert upload_store.extension(PNG, ".jpg") == ".png"
+    assert upload_store.extension(b"RIFF\x00\x00\x00\x00WEBPVP8 ", ".png") == ".webp"
+    assert upload_store.extension(b"\xff\xd8\xff\xdb", ".JPEG") == ".jpg"
+
+
+def test_unknown_format_normalizes_client_extension():
+    assert upload_store.extension(b"not an image", ".JPEG") == ".jpg"
+    assert upload_store.extension(b"not an image", ".PNG") == ".png"
+
+
+@pytest.mark.asyncio
+async def test_identical_uploads_share_one_file_whatever_their_name(upload_dir):
+    digest = hashlib.sha256(PNG).hexdigest()
+
+    first = await upload_store.save(PNG, digest, ".png")
+    second = await upload_store.save(PNG, digest, ".PNG")
+
+    assert first == second
+    assert first.name == f"{digest}.png"
+    assert len([path for path in upload_dir.rglob("*") if path.is_file()]) == 1
+
+
+@pytest.mark.asyncio
+async def test_upload_collected_before_dedup_is_written_again(upload_dir):
+    digest = hashlib.sha256(PNG).hexdigest()
+    path = await upload_store.save(PNG, digest, ".png")
+    # The collector removed the file between two identical uploads
+    path.unlink()
+
+    assert await upload_store.save(PNG, digest, ".png") == path
+    assert path.read_bytes() == PNG